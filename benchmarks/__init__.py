@@ -0,0 +1,4 @@
+"""Benchmarks and load tests for the SoulMine bot.
+
+Each module is runnable on its own, e.g. ``python -m bot.benchmarks.handler_latency``.
+"""
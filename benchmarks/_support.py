@@ -0,0 +1,69 @@
+"""Shared helpers for the benchmark scripts."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+from types import SimpleNamespace
+from typing import Any, Dict, Sequence
+
+from telegram import User
+from telegram.ext import ExtBot
+
+
+def configure_database(url: str | None) -> None:
+    """Point the bot at ``url`` before any of its modules are imported."""
+
+    if url:
+        os.environ["DATABASE_URL"] = url
+    else:
+        os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Summarise latency samples (seconds) as milliseconds."""
+
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def fake_message_update(telegram_id: int, text: str = "", api_latency: float = 0.0) -> SimpleNamespace:
+    """Build the subset of :class:`telegram.Update` used by message handlers."""
+
+    async def reply_text(*args, **kwargs):
+        await asyncio.sleep(api_latency)
+
+    user = SimpleNamespace(
+        id=telegram_id,
+        username=f"user{telegram_id}",
+        first_name="Bench",
+        last_name=None,
+        language_code="ru",
+    )
+    message = SimpleNamespace(text=text, reply_text=reply_text)
+    return SimpleNamespace(effective_user=user, message=message, callback_query=None)
+
+
+class OfflineBot(ExtBot):
+    """Bot that never talks to Telegram; enough for handlers that do not reply."""
+
+    async def get_me(self, *args: Any, **kwargs: Any) -> User:
+        self._bot_user = User(id=1, first_name="Bench", is_bot=True, username="bench_bot")
+        return self._bot_user
@@ -0,0 +1,183 @@
+"""Benchmark: broadcast throughput against a fake Bot with latency and 429s.
+
+The fake enforces a server-side messages-per-second limit (answering
+``RetryAfter`` when exceeded) and injects random 429s. The legacy sequential
+loop is compared with :class:`BroadcastEngine`::
+
+    python -m bot.benchmarks.broadcast --recipients 1000 --server-limit 300
+
+``--from-db N`` instead seeds N subscribers into the database and compares
+peak Python memory of loading full ``User`` rows with the streaming pipeline::
+
+    python -m bot.benchmarks.broadcast --from-db 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Deque, Dict, List
+
+from telegram.error import RetryAfter, TelegramError
+
+from ._support import configure_database
+
+
+class FakeBot:
+    """Minimal stand-in for :class:`telegram.Bot` with simulated latency and flood control."""
+
+    def __init__(
+        self, latency: float, server_limit: int, error_rate: float, seed: int = 0, track: bool = True
+    ) -> None:
+        self.latency = latency
+        self.server_limit = server_limit
+        self.error_rate = error_rate
+        self.track = track
+        self.sent = 0
+        self.delivered: Dict[str, int] = collections.Counter()
+        self.rejected = 0
+        self._window: Deque[float] = collections.deque()
+        self._random = random.Random(seed)
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.server_limit or self._random.random() < self.error_rate:
+            self.rejected += 1
+            raise RetryAfter(1)
+        self._window.append(now)
+        self.sent += 1
+        if self.track:
+            self.delivered[chat_id] += 1
+
+
+async def _legacy(bot: FakeBot, recipients: List[str]) -> Dict[str, float]:
+    """The pre-engine loop: one awaited send after another, 429s count as failures."""
+
+    success = fail = 0
+    for chat_id in recipients:
+        try:
+            await bot.send_message(chat_id=chat_id, text="hello")
+            success += 1
+        except TelegramError:
+            fail += 1
+    return {"success_count": success, "fail_count": fail}
+
+
+async def _engine(bot: FakeBot, recipients: List[str], args: argparse.Namespace) -> Dict[str, float]:
+    from ..bot.services.broadcast import BroadcastEngine
+
+    engine = BroadcastEngine(
+        bot,
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        progress_interval=5.0,
+    )
+    return (await engine.run(recipients, "hello")).as_dict()
+
+
+def _seed_subscribers(count: int) -> None:
+    from sqlalchemy import delete, insert
+
+    from ..config.database import SessionLocal, init_db
+    from ..models import User
+
+    init_db()
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.id.like("bench-sub-%")))
+        rows = [
+            {"id": f"bench-sub-{i:09d}", "telegram_id": str(10_000_000 + i), "notifications_enabled": True}
+            for i in range(count)
+        ]
+        for start in range(0, count, 10_000):
+            db.execute(insert(User), rows[start : start + 10_000])
+        db.commit()
+
+
+def _measure_peak(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _memory(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    from ..bot.services.broadcast import BroadcastEngine, prefetch
+    from ..bot.utils.database import iter_subscriber_batches
+    from ..config.database import SessionLocal
+    from ..models import User
+
+    _seed_subscribers(args.from_db)
+
+    # Measure live memory rather than uncollected cycles left by the drivers.
+    gc.collect()
+
+    def load_all() -> None:
+        with SessionLocal() as db:
+            users = db.query(User).filter(User.notifications_enabled.is_(True)).all()
+            assert len(users) >= args.from_db
+
+    def stream() -> None:
+        bot = FakeBot(0.0, server_limit=10**9, error_rate=0.0, track=False)
+        engine = BroadcastEngine(bot, concurrency=args.concurrency, rate_limit=10**9, progress_interval=60)
+        stats = asyncio.run(engine.run(prefetch(iter_subscriber_batches(1000)), "hello"))
+        assert stats.success >= args.from_db
+
+    return {
+        label: {"subscribers": args.from_db, "peak_kb": round(_measure_peak(func) / 1024)}
+        for label, func in (("load_all_users", load_all), ("streamed_broadcast", stream))
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--server-limit", type=int, default=300, help="fake server messages/sec")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="random 429 probability")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate-limit", type=float, default=250.0)
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--from-db", type=int, default=0, metavar="N")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args(argv)
+
+    if args.from_db:
+        configure_database(args.database_url)
+        print(json.dumps(_memory(args), indent=2))
+        return
+
+    recipients = [str(100_000 + i) for i in range(args.recipients)]
+    runs = [("engine", lambda bot: _engine(bot, recipients, args))]
+    if not args.skip_legacy:
+        runs.insert(0, ("legacy", lambda bot: _legacy(bot, recipients)))
+
+    results = {}
+    for label, run in runs:
+        bot = FakeBot(args.latency_ms / 1000, args.server_limit, args.error_rate)
+        started = time.perf_counter()
+        outcome = asyncio.run(run(bot))
+        elapsed = time.perf_counter() - started
+        results[label] = {
+            **outcome,
+            "elapsed_seconds": round(elapsed, 3),
+            "delivered_per_sec": round(bot.sent / elapsed, 2),
+            "server_429s": bot.rejected,
+            "duplicates": sum(count - 1 for count in bot.delivered.values() if count > 1),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Regression check: a busy chat must not delay other chats' updates.
+
+Feeds ``--backlog`` slow updates from one chat and then one instant update
+from another chat to an :class:`Application` using
+:class:`ChatOrderedUpdateProcessor` with ``--slots`` concurrency slots, and
+reports when the other chat's update finished. The busy chat's updates must
+still run one at a time, in order. Exits with status 1 if the other chat
+waited longer than ``--max-delay-ms`` or the order was broken::
+
+    python -m bot.benchmarks.chat_fairness --slots 4 --backlog 6 --work-ms 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+
+from ..bot.sharding import ChatOrderedUpdateProcessor
+from ._support import OfflineBot
+
+BUSY_CHAT, OTHER_CHAT = 1, 2
+
+
+def _update(update_id: int, chat_id: int, seq: int, bot: Any) -> Update:
+    return Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+                "text": str(seq),
+            },
+        },
+        bot,
+    )
+
+
+async def _run(slots: int, backlog: int, work: float) -> Dict[str, Any]:
+    finished: Dict[int, List[float]] = {BUSY_CHAT: [], OTHER_CHAT: []}
+    busy_order: List[int] = []
+    running = 0
+    max_running = 0
+    done = asyncio.Event()
+    started = 0.0
+
+    async def handle(update: Update, context: Any) -> None:
+        nonlocal running, max_running
+        chat_id = update.effective_chat.id
+        if chat_id == BUSY_CHAT:
+            running += 1
+            max_running = max(max_running, running)
+            busy_order.append(int(update.message.text))
+            await asyncio.sleep(work)
+            running -= 1
+        finished[chat_id].append(time.perf_counter() - started)
+        if len(finished[BUSY_CHAT]) == backlog and finished[OTHER_CHAT]:
+            done.set()
+
+    application = (
+        Application.builder()
+        .bot(OfflineBot("1:bench"))
+        .updater(None)
+        .concurrent_updates(ChatOrderedUpdateProcessor(slots))
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, handle))
+    async with application:
+        await application.start()
+        started = time.perf_counter()
+        for seq in range(backlog):
+            application.update_queue.put_nowait(_update(seq, BUSY_CHAT, seq, application.bot))
+        application.update_queue.put_nowait(_update(backlog, OTHER_CHAT, 0, application.bot))
+        await asyncio.wait_for(done.wait(), timeout=backlog * work + 10)
+        await application.stop()
+
+    return {
+        "other_chat_finished_ms": round(finished[OTHER_CHAT][0] * 1000, 1),
+        "busy_chat_finished_ms": round(finished[BUSY_CHAT][-1] * 1000, 1),
+        "busy_chat_in_order": busy_order == sorted(busy_order),
+        "busy_chat_max_concurrent": max_running,
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--backlog", type=int, default=6)
+    parser.add_argument("--work-ms", type=float, default=500.0)
+    parser.add_argument("--max-delay-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(_run(args.slots, args.backlog, args.work_ms / 1000))
+    failures = []
+    if result["other_chat_finished_ms"] > args.max_delay_ms:
+        failures.append(f"other chat waited {result['other_chat_finished_ms']} ms behind the busy chat")
+    if not result["busy_chat_in_order"] or result["busy_chat_max_concurrent"] != 1:
+        failures.append("busy chat's updates were not processed one at a time in order")
+    print(json.dumps({**result, "failures": failures}, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
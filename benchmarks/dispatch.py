@@ -0,0 +1,121 @@
+"""Benchmark: cost of resolving the handler for an update.
+
+Compares the former list of ``MessageHandler(filters.Regex(...))`` and
+``CallbackQueryHandler(pattern=...)`` handlers with the handlers registered
+by ``create_application`` (exact-match dispatch tables), scanning them the way
+``Application.process_update`` does::
+
+    python -m bot.benchmarks.dispatch --rounds 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Sequence
+
+from telegram import Update
+from telegram.ext import BaseHandler, CallbackQueryHandler, CommandHandler, MessageHandler, filters
+
+from ._support import OfflineBot, configure_database
+
+CALLBACK_DATA = [
+    "link_wallet",
+    "open_web_app",
+    "open_mini_app",
+    "main_menu",
+    "send_email",
+    "call_support",
+    "contact_support",
+    "latest_news",
+    "enable_notifications",
+    "disable_notifications",
+]
+BUTTONS = ["📱 Приложение", "🤝 Поддержка", "📰 Новости"]
+
+
+async def _noop(update: Any, context: Any) -> None:
+    pass
+
+
+def _legacy_handlers() -> List[BaseHandler]:
+    handlers: List[BaseHandler] = [CommandHandler("start", _noop)]
+    handlers += [MessageHandler(filters.Regex(f"^{text}$"), _noop) for text in BUTTONS]
+    handlers += [CallbackQueryHandler(_noop, pattern=f"^{data}$") for data in CALLBACK_DATA]
+    return handlers
+
+
+def _updates(bot: OfflineBot) -> List[Update]:
+    user = {"id": 42, "is_bot": False, "first_name": "Bench"}
+    chat = {"id": 42, "type": "private"}
+    payloads: List[Dict[str, Any]] = []
+    for text in BUTTONS + ["hello", "/start"]:
+        entities = [{"type": "bot_command", "offset": 0, "length": len(text)}] if text.startswith("/") else []
+        payloads.append(
+            {
+                "update_id": len(payloads),
+                "message": {"message_id": 1, "date": 0, "chat": chat, "from": user, "text": text, "entities": entities},
+            }
+        )
+    for data in CALLBACK_DATA:
+        payloads.append(
+            {
+                "update_id": len(payloads),
+                "callback_query": {"id": str(len(payloads)), "from": user, "chat_instance": "1", "data": data},
+            }
+        )
+    return [Update.de_json(payload, bot) for payload in payloads]
+
+
+def _resolve(handlers: Sequence[BaseHandler], update: Update) -> bool:
+    for handler in handlers:
+        check = handler.check_update(update)
+        if check is not None and check is not False:
+            return True
+    return False
+
+
+def _measure(handlers: Sequence[BaseHandler], updates: Sequence[Update], rounds: int) -> Dict[str, float]:
+    matched = sum(_resolve(handlers, update) for update in updates)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for update in updates:
+            _resolve(handlers, update)
+    elapsed = time.perf_counter() - started
+    return {
+        "handlers": len(handlers),
+        "matched": matched,
+        "us_per_update": round(elapsed / (rounds * len(updates)) * 1e6, 3),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    configure_database(None)
+    from ..bot.main import create_application
+
+    bot = OfflineBot("1:bench")
+    asyncio.run(bot.get_me())
+    updates = _updates(bot)
+    legacy = _measure(_legacy_handlers(), updates, args.rounds)
+    routed = _measure(create_application().handlers[0], updates, args.rounds)
+    print(
+        json.dumps(
+            {
+                "updates_per_round": len(updates),
+                "regex_handlers": legacy,
+                "dispatch_tables": routed,
+                "speedup": round(legacy["us_per_update"] / routed["us_per_update"], 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""A local stand-in for the Telegram Bot API, for load tests.
+
+Answers the methods the bot calls (``getMe``, ``sendMessage``,
+``editMessageText``, ``answerCallbackQuery``, ...) with well-formed results
+after a configurable latency, optionally enforcing a global messages-per-second
+limit with ``429 Too Many Requests``. Point the bot at it with
+``TELEGRAM_API_BASE_URL=http://127.0.0.1:<port>/bot``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import time
+from typing import Any, Deque, Dict, Optional
+
+from aiohttp import web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+# Methods that send a message and count against the rate limit.
+_SENDING = {"sendMessage", "editMessageText"}
+
+
+class FakeBotAPI:
+    """Serves ``/bot<token>/<method>`` on ``127.0.0.1``; use as an async context manager."""
+
+    def __init__(self, latency: float = 0.0, rate_limit: Optional[float] = None, port: int = 0) -> None:
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.port = port
+        self.calls: Dict[str, int] = collections.Counter()
+        self.rejected = 0
+        self._window: Deque[float] = collections.deque()
+        self._message_ids = iter(range(1, 1 << 62))
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    async def __aenter__(self) -> "FakeBotAPI":
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _throttled(self) -> bool:
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.rate_limit:
+            return True
+        self._window.append(now)
+        return False
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params: Dict[str, Any] = {}
+        if request.content_type == "application/json":
+            params = await request.json()
+        elif request.can_read_body:
+            params = {key: value for key, value in (await request.post()).items() if isinstance(value, str)}
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method in _SENDING and self._throttled():
+            self.rejected += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "getMe":
+            return BOT_USER
+        if method in _SENDING:
+            chat_id = int(params.get("chat_id") or 0)
+            message_id = params.get("message_id")
+            return {
+                "message_id": int(message_id) if message_id else next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        if method == "getUpdates":
+            return []
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        return True
+
+
+async def _serve(port: int, latency: float, rate_limit: Optional[float]) -> None:
+    async with FakeBotAPI(latency, rate_limit, port) as api:
+        print(json.dumps({"base_url": api.base_url}), flush=True)
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.port, args.latency_ms / 1000, args.rate_limit))
+    except KeyboardInterrupt:
+        pass
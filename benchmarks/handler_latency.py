@@ -0,0 +1,107 @@
+"""Load test: update latency of the menu handlers under concurrent users.
+
+Compares the legacy handler shape (synchronous session inside the coroutine)
+with the async database layer. ``--db-latency-ms`` adds a simulated network
+round-trip to every statement so the effect is visible on a local SQLite file;
+point ``--database-url`` at PostgreSQL for real numbers::
+
+    python -m bot.benchmarks.handler_latency --users 200 --taps 5 --db-latency-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, List
+
+from ._support import configure_database, fake_message_update, summarize
+
+
+def _install_latency(seconds: float) -> None:
+    from sqlalchemy import event
+    from sqlalchemy.util import await_only
+
+    from ..config.database import async_engine, engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sync_delay(*_args) -> None:
+        time.sleep(seconds)
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _async_delay(*_args) -> None:
+        # Runs inside SQLAlchemy's greenlet bridge, so the wait yields to the loop.
+        await_only(asyncio.sleep(seconds))
+
+
+def _seed(users: int) -> None:
+    from ..config.database import SessionLocal, init_db
+    from ..models import User
+
+    init_db()
+    with SessionLocal() as db:
+        existing = {row for (row,) in db.query(User.telegram_id)}
+        db.add_all(
+            User(id=f"bench-{i}", telegram_id=str(i), first_name="Bench")
+            for i in range(1, users + 1)
+            if str(i) not in existing
+        )
+        db.commit()
+
+
+async def _legacy_handle_app_button(update, context) -> None:
+    """The pre-async handler shape: a blocking query inside the coroutine."""
+
+    from ..config.database import get_db
+    from ..bot.utils.database import get_user_by_telegram_id
+
+    with get_db() as db:
+        get_user_by_telegram_id(db, str(update.effective_user.id))
+    await update.message.reply_text("")
+
+
+async def _run(
+    handler: Callable[..., Awaitable[None]], users: int, taps: int, api_latency: float
+) -> List[float]:
+    latencies: List[float] = []
+
+    async def session(telegram_id: int) -> None:
+        for _ in range(taps):
+            update = fake_message_update(telegram_id, api_latency=api_latency)
+            started = time.perf_counter()
+            await handler(update, None)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(session(i) for i in range(1, users + 1)))
+    return latencies
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--taps", type=int, default=5)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    parser.add_argument("--api-latency-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    configure_database(args.database_url)
+    from ..bot.handlers.app import handle_app_button
+
+    _seed(args.users)
+    if args.db_latency_ms:
+        _install_latency(args.db_latency_ms / 1000)
+
+    results = {}
+    for label, handler in (("sync", _legacy_handle_app_button), ("async", handle_app_button)):
+        started = time.perf_counter()
+        latencies = asyncio.run(_run(handler, args.users, args.taps, args.api_latency_ms / 1000))
+        elapsed = time.perf_counter() - started
+        results[label] = {**summarize(latencies), "updates_per_sec": len(latencies) / elapsed}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Import-time budget: how long a fresh worker takes to import and bootstrap the bot.
+
+Imports ``bot.main`` in fresh interpreters under ``-X importtime`` and reports
+the median cumulative import time, the slowest modules, and the time
+:func:`create_application` then takes. Also checks that neither step has
+side effects: importing must not load handler modules, SQLAlchemy or Redis,
+and bootstrapping must not create database engines or a Redis client. Exits
+with status 1 when the import exceeds ``--budget-ms`` or a check fails, so it
+can gate CI::
+
+    python -m bot.benchmarks.import_time --budget-ms 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+TARGET = f"{PACKAGE}.bot.main"
+
+# Runs in a fresh interpreter; prints a JSON report on its last line.
+_BOOTSTRAP = f"""
+import json, sys, time
+import {TARGET} as main
+
+heavy = ("sqlalchemy", "redis", "aiohttp", "{PACKAGE}.bot.handlers.", "{PACKAGE}.config.database")
+loaded_on_import = sorted({{name.split(".")[0] if not name.startswith("{PACKAGE}") else name
+                           for name in sys.modules if name.startswith(heavy)}})
+started = time.perf_counter()
+main.create_application()
+bootstrap_ms = (time.perf_counter() - started) * 1000
+
+from {PACKAGE}.config import database, redis
+print(json.dumps({{
+    "bootstrap_ms": bootstrap_ms,
+    "loaded_on_import": loaded_on_import,
+    "engines_created": database._database is not None,
+    "redis_client_created": redis._client is not None,
+}}))
+"""
+
+
+def _import_profile() -> Tuple[float, List[Tuple[float, str]]]:
+    """Import :data:`TARGET` under ``-X importtime``; return its cumulative ms and per-module self ms."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    modules: List[Tuple[float, str]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (field.strip() for field in line[len("import time:") :].split("|"))
+        if not self_us.isdigit():
+            continue  # the header line
+        modules.append((int(self_us) / 1000, name))
+        if name == TARGET:
+            total = int(cumulative_us) / 1000
+    return total, modules
+
+
+def _bootstrap() -> Dict[str, Any]:
+    completed = subprocess.run([sys.executable, "-c", _BOOTSTRAP], capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="maximum median import time")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    profiles = [_import_profile() for _ in range(args.runs)]
+    import_ms = statistics.median(total for total, _ in profiles)
+    slowest = sorted(profiles[-1][1], reverse=True)[: args.top]
+    bootstraps = [_bootstrap() for _ in range(args.runs)]
+    side_effects = bootstraps[-1]
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import took {import_ms:.1f} ms, budget {args.budget_ms:.0f} ms")
+    if side_effects["loaded_on_import"]:
+        failures.append(f"importing loaded {', '.join(side_effects['loaded_on_import'])}")
+    if side_effects["engines_created"]:
+        failures.append("create_application() created the database engines")
+    if side_effects["redis_client_created"]:
+        failures.append("create_application() created the Redis client")
+
+    print(
+        json.dumps(
+            {
+                "module": TARGET,
+                "import_ms": round(import_ms, 1),
+                "budget_ms": args.budget_ms,
+                "bootstrap_ms": round(statistics.median(run["bootstrap_ms"] for run in bootstraps), 1),
+                "slowest_modules_self_ms": {name: round(ms, 1) for ms, name in slowest},
+                **{key: value for key, value in side_effects.items() if key != "bootstrap_ms"},
+                "failures": failures,
+            },
+            indent=2,
+        )
+    )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
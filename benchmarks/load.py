@@ -0,0 +1,371 @@
+"""Load test: the full application under synthetic update streams and a fake Bot API.
+
+Runs :func:`create_application` against :class:`FakeBotAPI` and its own SQLite
+file (``load.db``, or ``--database-url`` for PostgreSQL), feeding updates
+through the real update queue, handlers and flood guard. Scenarios:
+
+* ``start`` – every user sends ``/start`` (registration burst);
+* ``menu`` – every user taps the reply-keyboard buttons ``--taps`` times;
+* ``callbacks`` – every user fires ``--callbacks`` inline-button taps at once;
+* ``broadcast`` – one broadcast to all subscribers (their count is reported
+  as ``recipients``; on ``load.db`` these are only the load-test users).
+
+Each scenario reports updates/sec, p50/p95/p99 handler and end-to-end
+latency, database statements and Bot API calls per update (per message for
+the broadcast), flood guard drops and peak RSS. Results are written as JSON; ``--compare`` prints the change
+against an earlier results file. Each run first deletes the users with the
+load test's telegram ids; ``DATABASE_URL`` from the environment is ignored, a
+database other than ``load.db`` must be named with ``--database-url``::
+
+    python -m bot.benchmarks.load --users 500
+    python -m bot.benchmarks.load --users 500 --compare benchmark-results/<earlier>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ._support import configure_database, summarize
+from .fake_bot_api import BOT_USER, FakeBotAPI
+
+SCENARIOS = ("start", "menu", "callbacks", "broadcast")
+# Not the benchmarks' shared benchmark.db: other benchmarks seed subscribers there.
+LOAD_DATABASE_URL = "sqlite:///./load.db"
+# Telegram ids of load-test users: FIRST_USER_ID, FIRST_USER_ID + 1, ...
+FIRST_USER_ID = 7_700_000_000
+# No "disable_notifications": the broadcast scenario needs the users subscribed.
+CALLBACK_DATA = ("enable_notifications", "latest_news", "main_menu", "link_wallet")
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {
+        "id": user_id,
+        "is_bot": False,
+        "first_name": f"User{user_id}",
+        "username": f"user{user_id}",
+        "language_code": "ru",
+    }
+
+
+def _message(update_id: int, user_id: int, text: str) -> Dict[str, Any]:
+    message: Dict[str, Any] = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+def _callback(update_id: int, user_id: int, data: str) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": BOT_USER,
+                "text": "menu",
+            },
+        },
+    }
+
+
+def _payloads(scenario: str, args: argparse.Namespace, first_update_id: int) -> List[Dict[str, Any]]:
+    from ..bot.keyboards.main_keyboard import APP_BUTTON, NEWS_BUTTON, SUPPORT_BUTTON
+
+    users = range(FIRST_USER_ID, FIRST_USER_ID + args.users)
+    update_ids = iter(range(first_update_id, first_update_id + 10**9))
+    if scenario == "start":
+        return [_message(next(update_ids), user_id, "/start") for user_id in users]
+    if scenario == "menu":
+        buttons = (APP_BUTTON, SUPPORT_BUTTON, NEWS_BUTTON)
+        return [
+            _message(next(update_ids), user_id, buttons[tap % len(buttons)])
+            for tap in range(args.taps)
+            for user_id in users
+        ]
+    return [
+        _callback(next(update_ids), user_id, CALLBACK_DATA[tap % len(CALLBACK_DATA)])
+        for user_id in users
+        for tap in range(args.callbacks)
+    ]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class _Probe:
+    """Counts database statements and Bot API calls over one scenario."""
+
+    def __init__(self, api: FakeBotAPI) -> None:
+        from sqlalchemy import event
+
+        from ..config.database import async_engine, engine
+
+        self.api = api
+        self.statements = 0
+
+        def count(*_args: Any) -> None:
+            self.statements += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+    def snapshot(self) -> Dict[str, Any]:
+        from ..bot.flood_guard import flood_guard
+
+        return {
+            "statements": self.statements,
+            "api_calls": sum(self.api.calls.values()),
+            "dropped": sum(flood_guard.dropped.values()),
+            "rejected": self.api.rejected,
+        }
+
+
+async def _run_updates(application: Any, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from telegram import Update
+
+    handler_seconds: List[float] = []
+    end_to_end_seconds: List[float] = []
+    queued_at: Dict[int, float] = {}
+    finished = asyncio.Event()
+    process_update = application.process_update
+
+    async def timed(update: object) -> None:
+        started = time.perf_counter()
+        try:
+            await process_update(update)
+        finally:
+            done = time.perf_counter()
+            handler_seconds.append(done - started)
+            end_to_end_seconds.append(done - queued_at.pop(update.update_id, started))
+            if len(handler_seconds) == len(payloads):
+                finished.set()
+
+    application.process_update = timed
+    try:
+        updates = [Update.de_json(payload, application.bot) for payload in payloads]
+        started = time.perf_counter()
+        for update in updates:
+            queued_at[update.update_id] = time.perf_counter()
+            application.update_queue.put_nowait(update)
+        await finished.wait()
+        elapsed = time.perf_counter() - started
+    finally:
+        del application.process_update
+
+    return {
+        "updates": len(payloads),
+        "elapsed_seconds": round(elapsed, 3),
+        "updates_per_second": round(len(payloads) / elapsed, 1),
+        "handler_latency": summarize(handler_seconds),
+        "end_to_end_latency": summarize(end_to_end_seconds),
+    }
+
+
+def _count_subscribers() -> int:
+    from sqlalchemy import func, select
+
+    from ..config.database import SessionLocal
+    from ..models import User
+
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count()).select_from(User).where(User.notifications_enabled.is_(True), User.is_active.is_(True))
+        )
+
+
+async def _run_broadcast(application: Any) -> Dict[str, Any]:
+    from ..bot.services.notification_service import get_notification_service
+
+    recipients = _count_subscribers()
+    started = time.perf_counter()
+    result = await get_notification_service(application.bot).broadcast_notification("Load test broadcast")
+    elapsed = time.perf_counter() - started
+    return {
+        "recipients": recipients,
+        "messages": result["total_sent"],
+        "elapsed_seconds": round(elapsed, 3),
+        "messages_per_second": round(result["total_sent"] / elapsed, 1) if elapsed else 0.0,
+        "success_count": result.get("success_count", 0),
+        "fail_count": result.get("fail_count", 0),
+    }
+
+
+def _reset_users(users: int) -> None:
+    """Delete the users with the telegram ids this run uses, and no others."""
+
+    from sqlalchemy import delete, func
+
+    from ..config.database import SessionLocal, init_db
+    from ..models import User
+
+    first, last = str(FIRST_USER_ID), str(FIRST_USER_ID + users - 1)
+    assert len(first) == len(last)  # Equal-length digit strings compare like the numbers.
+    init_db()
+    with SessionLocal() as db:
+        db.execute(
+            delete(User).where(User.telegram_id.between(first, last), func.length(User.telegram_id) == len(first))
+        )
+        db.commit()
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    async with FakeBotAPI(args.api_latency_ms / 1000, args.api_rate_limit) as api:
+        # Settings are read on first import, so everything bot-related is imported from here on.
+        os.environ["TELEGRAM_API_BASE_URL"] = api.base_url
+        from ..bot.main import create_application
+        from ..config.database import engine
+
+        _reset_users(args.users)
+        application = create_application()
+        probe = _Probe(api)
+        await application.initialize()
+        if application.post_init is not None:
+            await application.post_init(application)
+        await application.start()
+
+        results: Dict[str, Any] = {}
+        first_update_id = 1
+        try:
+            for scenario in args.scenarios:
+                before = probe.snapshot()
+                if args.trace_memory:
+                    tracemalloc.start()
+                if scenario == "broadcast":
+                    outcome = await _run_broadcast(application)
+                else:
+                    payloads = _payloads(scenario, args, first_update_id)
+                    first_update_id += len(payloads)
+                    outcome = await _run_updates(application, payloads)
+                if args.trace_memory:
+                    outcome["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                    tracemalloc.stop()
+
+                after = probe.snapshot()
+                per = max(outcome.get("updates", outcome.get("messages", 0)), 1)
+                outcome.update(
+                    db_statements_per_update=round((after["statements"] - before["statements"]) / per, 2),
+                    api_calls_per_update=round((after["api_calls"] - before["api_calls"]) / per, 2),
+                    flood_guard_dropped=after["dropped"] - before["dropped"],
+                    api_rate_limited=after["rejected"] - before["rejected"],
+                    rss_peak_mb=_peak_rss_mb(),
+                )
+                results[scenario] = outcome
+                print(f"{scenario}: {json.dumps(outcome)}", file=sys.stderr)
+        finally:
+            await application.stop()
+            await application.shutdown()
+            if application.post_shutdown is not None:
+                await application.post_shutdown(application)
+
+        return {"database": engine.dialect.name, "scenarios": results}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _numeric_leaves(data: Any, prefix: str = "") -> Dict[str, float]:
+    if isinstance(data, dict):
+        leaves: Dict[str, float] = {}
+        for key, value in data.items():
+            leaves.update(_numeric_leaves(value, f"{prefix}.{key}" if prefix else key))
+        return leaves
+    if isinstance(data, (int, float)) and not isinstance(data, bool):
+        return {prefix: float(data)}
+    return {}
+
+
+def _compare(baseline: Dict[str, Any], current: Dict[str, Any], emit: Callable[[str], None]) -> None:
+    old = _numeric_leaves(baseline["scenarios"])
+    new = _numeric_leaves(current["scenarios"])
+    emit(f"Compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        emit(f"  {key:<45} {old[key]:>12.3f} -> {new[key]:>12.3f}  {change:+7.1f}%")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--taps", type=int, default=3, help="reply-keyboard taps per user")
+    parser.add_argument("--callbacks", type=int, default=5, help="inline-button taps per user")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), type=lambda value: value.split(","))
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    parser.add_argument("--api-rate-limit", type=float, default=None, help="fake API messages/sec")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--trace-memory", action="store_true", help="also report peak Python heap (slow)")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, metavar="RESULTS_JSON")
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=args.log_level)
+    configure_database(args.database_url or LOAD_DATABASE_URL)
+    # Measure the bot, not Telegram's limits or a missing Redis outbox.
+    os.environ.setdefault("OUTBOX_BACKEND", "memory")
+    os.environ.setdefault("BROADCAST_RATE_LIMIT", "1000000")
+    os.environ.setdefault("BROADCAST_PER_CHAT_INTERVAL", "0")
+
+    report = asyncio.run(_run(args))
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "database": report.pop("database"),
+        "args": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+    }
+    results = {"meta": meta, **report}
+
+    output = args.output or Path("benchmark-results") / (
+        f"load-{meta['timestamp'].replace(':', '')}-{meta['commit'] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results["scenarios"], indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare is not None:
+        _compare(json.loads(args.compare.read_text()), results, print)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark: per-send cost of building and serialising a menu reply.
+
+Compares building the keyboard per call (the former factories) with the
+prebuilt payloads in :mod:`bot.bot.messages`, both run through the request
+serialisation python-telegram-bot performs for ``sendMessage``::
+
+    python -m bot.benchmarks.payloads --iterations 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.request._requestdata import RequestData
+from telegram.request._requestparameter import RequestParameter
+
+from ..bot.messages import NEWS_MENU
+
+
+def _legacy_news_keyboard() -> InlineKeyboardMarkup:
+    keyboard = [
+        [InlineKeyboardButton("📢 Последние новости", callback_data="latest_news")],
+        [InlineKeyboardButton("🔔 Включить уведомления", callback_data="enable_notifications")],
+        [InlineKeyboardButton("🔕 Выключить уведомления", callback_data="disable_notifications")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _serialize(params: Dict[str, Any]) -> bytes:
+    return RequestData(
+        [RequestParameter.from_input(key, value) for key, value in params.items() if value is not None]
+    ).json_payload
+
+
+def _legacy_send() -> bytes:
+    return _serialize(
+        {
+            "chat_id": 42,
+            "text": NEWS_MENU.text,
+            "reply_markup": _legacy_news_keyboard(),
+            "parse_mode": "Markdown",
+        }
+    )
+
+
+def _payload_send() -> bytes:
+    return _serialize(
+        {
+            "chat_id": 42,
+            "text": NEWS_MENU.render(),
+            "reply_markup": NEWS_MENU.reply_markup,
+            "parse_mode": NEWS_MENU.parse_mode,
+        }
+    )
+
+
+def _measure(send: Callable[[], bytes], iterations: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        send()
+    elapsed = time.perf_counter() - started
+
+    samples = min(iterations, 1000)
+    tracemalloc.start()
+    peak = 0
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        send()
+        peak += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return {
+        "us_per_send": round(elapsed / iterations * 1e6, 2),
+        "peak_bytes_per_send": round(peak / samples),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    assert _legacy_send() == _payload_send()
+    print(
+        json.dumps(
+            {
+                "per_call_keyboard": _measure(_legacy_send, args.iterations),
+                "prebuilt_payload": _measure(_payload_send, args.iterations),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""EXPLAIN checks: the bot's hot queries use the indexes built for them.
+
+Seeds ``--rows`` users (some unsubscribed or unreachable) and the deliveries
+of one broadcast job, applies the schema migrations, refreshes the planner
+statistics, then EXPLAINs the statements the bot issues and checks each plan
+uses its index. On PostgreSQL covering indexes must give an index-only scan.
+Exits with status 1 if any check fails::
+
+    python -m bot.benchmarks.query_plans --database-url postgresql://... --rows 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List
+
+from ._support import configure_database
+
+JOB_ID = "bench-plan-job"
+
+
+@dataclass(frozen=True)
+class Check:
+    name: str
+    statement: Any
+    indexes: FrozenSet[str]  # any of these satisfies the check
+    index_only: bool = False  # required on PostgreSQL only; SQLite has no INCLUDE
+
+
+def _seed(rows: int) -> None:
+    from sqlalchemy import func, insert, select
+
+    from ..config.database import SessionLocal
+    from ..models import BroadcastDelivery, BroadcastJob, User
+
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count()).select_from(User).where(User.id.like("bench-plan-%")))
+        rng = random.Random(0)
+        for start in range(existing, rows, 50_000):
+            db.execute(
+                insert(User),
+                [
+                    {
+                        "id": f"bench-plan-{i:09d}",
+                        "telegram_id": str(40_000_000 + i),
+                        "first_name": f"User {i}",
+                        "language_code": rng.choice(["ru", "en"]),
+                        "notifications_enabled": rng.random() < 0.8,
+                        "is_active": rng.random() < 0.95,
+                    }
+                    for i in range(start, min(rows, start + 50_000))
+                ],
+            )
+            db.commit()
+
+        if db.get(BroadcastJob, JOB_ID) is None:
+            db.add(BroadcastJob(id=JOB_ID, message="bench", status="completed"))
+            db.flush()
+            for start in range(0, rows // 2, 50_000):
+                db.execute(
+                    insert(BroadcastDelivery),
+                    [
+                        {
+                            "job_id": JOB_ID,
+                            "telegram_id": str(40_000_000 + i),
+                            "user_id": f"bench-plan-{i:09d}",
+                            "success": True,
+                        }
+                        for i in range(start, min(rows // 2, start + 50_000))
+                    ],
+                )
+            db.commit()
+
+
+def _refresh_statistics(engine: Any) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if engine.dialect.name == "postgresql":
+            # VACUUM also sets the visibility map bits index-only scans rely on.
+            connection.exec_driver_sql("VACUUM ANALYZE users")
+            connection.exec_driver_sql("VACUUM ANALYZE broadcast_deliveries")
+        else:
+            connection.exec_driver_sql("ANALYZE")
+
+
+def _checks(rows: int) -> List[Check]:
+    from sqlalchemy import select
+
+    from ..bot.services.broadcast_jobs import _delivered_after_query
+    from ..bot.utils.database import subscriber_page_query
+    from ..models import User, UserSnapshot
+
+    middle = f"bench-plan-{rows // 4:09d}"
+    subscribers = frozenset({"idx_users_subscribers"})
+    return [
+        Check("subscriber_page_first", subscriber_page_query(1000), subscribers, index_only=True),
+        Check("subscriber_page_next", subscriber_page_query(1000, middle), subscribers, index_only=True),
+        Check(
+            "subscriber_page_template_columns",
+            subscriber_page_query(1000, middle, ("language_code", "first_name")),
+            subscribers,
+        ),
+        Check(
+            "delivered_after_checkpoint",
+            _delivered_after_query(JOB_ID, middle),
+            frozenset({"idx_broadcast_deliveries_job_user_telegram"}),
+            index_only=True,
+        ),
+        Check(
+            "user_snapshot_by_telegram_id",
+            select(*UserSnapshot.columns()).where(User.telegram_id == str(40_000_000 + rows // 3)).limit(1),
+            # Created by the models, or by the UNIQUE constraint in init.sql.
+            frozenset({"ix_users_telegram_id", "users_telegram_id_key"}),
+        ),
+    ]
+
+
+def _plan(connection: Any, sql: str) -> List[Dict[str, Any]]:
+    """Return the plan's scan nodes as ``{"node": ..., "index": ...}`` dicts."""
+
+    if connection.dialect.name == "postgresql":
+        (document,) = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar_one()
+        nodes, pending = [], [document["Plan"]]
+        while pending:
+            node = pending.pop()
+            nodes.append({"node": node["Node Type"], "index": node.get("Index Name")})
+            pending.extend(node.get("Plans", ()))
+        return nodes
+    return [
+        {"node": detail, "index": detail.split(" INDEX ", 1)[1].split()[0] if " INDEX " in detail else None}
+        for *_, detail in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+    ]
+
+
+def _run_check(connection: Any, check: Check, repeat: int) -> Dict[str, Any]:
+    sql = str(check.statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    nodes = _plan(connection, sql)
+    used = [node for node in nodes if node["index"] in check.indexes]
+    passed = bool(used)
+    if passed and check.index_only and connection.dialect.name == "postgresql":
+        passed = any(node["node"] == "Index Only Scan" for node in used)
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.exec_driver_sql(sql).fetchall()
+        samples.append(time.perf_counter() - started)
+    return {
+        "passed": passed,
+        "expected": sorted(check.indexes) + (["index-only"] if check.index_only else []),
+        "plan": nodes,
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args(argv)
+
+    configure_database(args.database_url)
+    from ..config.database import get_engine, init_db
+    from ..config.schema import migrate
+
+    init_db()
+    migrate()
+    _seed(args.rows)
+    engine = get_engine()
+    _refresh_statistics(engine)
+
+    with engine.connect() as connection:
+        results = {check.name: _run_check(connection, check, args.repeat) for check in _checks(args.rows)}
+    print(json.dumps({"database": engine.dialect.name, "checks": results}, indent=2))
+    if not all(result["passed"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark: update throughput as worker processes are added.
+
+Drives synthetic message updates through :class:`ShardRouter` into 1..N
+spawned workers, each running an :class:`Application` whose handler burns a
+fixed amount of CPU (standing in for handler and serialisation work), and
+checks that every chat's updates were handled in order::
+
+    python -m bot.benchmarks.sharding --workers 1 2 4 --updates 20000 --work-ms 0.5
+
+Throughput can only scale up to the number of available cores.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+
+from ..bot.sharding import ChatOrderedUpdateProcessor, ShardRouter, WorkerPool
+from ._support import OfflineBot
+
+
+def _bench_application(handled: Any, out_of_order: Any, work_ms: float) -> Application:
+    last_seen: Dict[int, int] = {}
+
+    async def handle(update: Update, context: Any) -> None:
+        deadline = time.perf_counter() + work_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        chat_id, seq = update.effective_chat.id, int(update.message.text)
+        if seq <= last_seen.get(chat_id, -1):
+            with out_of_order.get_lock():
+                out_of_order.value += 1
+        last_seen[chat_id] = seq
+        with handled.get_lock():
+            handled.value += 1
+
+    application = (
+        Application.builder()
+        .bot(OfflineBot("1:bench"))
+        .updater(None)
+        .concurrent_updates(ChatOrderedUpdateProcessor(64))
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, handle))
+    return application
+
+
+def _payload(update_id: int, chat_id: int, seq: int) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": str(seq),
+        },
+    }
+
+
+def _wait_for(pool: WorkerPool, counter: Any, target: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while counter.value < target:
+        if pool.alive() < len(pool.processes):
+            raise RuntimeError("a worker process exited")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"only {counter.value} of {target} updates handled")
+        time.sleep(0.005)
+
+
+def _run(workers: int, updates: int, chats: int, work_ms: float, batch: int) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    handled = context.Value("q", 0)
+    out_of_order = context.Value("q", 0)
+    pool = WorkerPool(functools.partial(_bench_application, handled, out_of_order, work_ms), workers)
+    router = ShardRouter(pool.inboxes)
+    pool.start()
+    try:
+        # One warm-up update per shard so start-up cost is excluded.
+        router.route(_payload(-1 - i, i, 0) for i in range(workers))
+        _wait_for(pool, handled, workers, timeout=120)
+
+        seqs = [0] * chats
+        payloads: List[Dict[str, Any]] = []
+        for update_id in range(updates):
+            chat_id = 1_000 + update_id % chats
+            payloads.append(_payload(update_id, chat_id, seqs[chat_id - 1_000]))
+            seqs[chat_id - 1_000] += 1
+
+        started = time.perf_counter()
+        for start in range(0, updates, batch):
+            router.route(payloads[start:start + batch])
+        _wait_for(pool, handled, workers + updates, timeout=600)
+        elapsed = time.perf_counter() - started
+    finally:
+        router.close()
+        for process in pool.processes:
+            process.join()
+
+    return {
+        "workers": workers,
+        "updates": updates,
+        "elapsed_seconds": round(elapsed, 3),
+        "updates_per_second": round(updates / elapsed, 1),
+        "out_of_order": out_of_order.value,
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--work-ms", type=float, default=0.5)
+    parser.add_argument("--batch", type=int, default=100, help="updates per getUpdates-sized batch")
+    args = parser.parse_args(argv)
+
+    results = [_run(n, args.updates, args.chats, args.work_ms, args.batch) for n in args.workers]
+    baseline = results[0]["updates_per_second"]
+    for result in results:
+        result["speedup"] = round(result["updates_per_second"] / baseline, 2)
+    print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: rendering personalised broadcast texts for a page of recipients.
+
+Compares formatting each recipient's text from scratch (pick the language,
+``str.format`` every time, look up the level name) with
+:meth:`NotificationTemplate.render_rows` on the same rows::
+
+    python -m bot.benchmarks.templates --recipients 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from ..bot.services.templates import NotificationTemplate
+from ..bot.utils.helpers import get_user_level
+
+DEFAULT = "Привет, {first_name}! У вас {points} очков, уровень «{level}»."
+VARIANTS = {"en": "Hi {first_name}! You have {points} points, level “{level}”."}
+
+
+def _rows(count: int) -> List[Any]:
+    rng = random.Random(0)
+    return [
+        SimpleNamespace(
+            telegram_id=str(i),
+            first_name=f"User{i}",
+            language_code=rng.choice(["ru", "en", "en-US", "de", None]),
+            total_points=rng.randrange(10_000),
+            loyalty_level=rng.randrange(1, 6),
+        )
+        for i in range(count)
+    ]
+
+
+def _naive(rows: List[Any]) -> List[Any]:
+    rendered = []
+    for row in rows:
+        code = (row.language_code or "").lower()
+        text = VARIANTS.get(code) or VARIANTS.get(code.split("-")[0]) or DEFAULT
+        rendered.append(
+            (
+                row.telegram_id,
+                text.format(
+                    first_name=row.first_name or "",
+                    points=row.total_points or 0,
+                    level=get_user_level(row.loyalty_level or 1),
+                ),
+            )
+        )
+    return rendered
+
+
+def _measure(render: Callable[[List[Any]], List[Any]], pages: List[List[Any]]) -> Dict[str, float]:
+    started = time.perf_counter()
+    count = sum(len(render(page)) for page in pages)
+    elapsed = time.perf_counter() - started
+    return {"seconds": round(elapsed, 3), "recipients_per_second": round(count / elapsed)}
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    rows = _rows(args.recipients)
+    pages = [rows[i : i + args.page_size] for i in range(0, len(rows), args.page_size)]
+    template = NotificationTemplate(DEFAULT, VARIANTS)
+
+    assert _naive(pages[0]) == template.render_rows(pages[0])
+    print(
+        json.dumps(
+            {
+                "per_recipient_format": _measure(_naive, pages),
+                "compiled_template": _measure(template.render_rows, pages),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: loading users for the request path as ORM entities vs snapshots.
+
+Compares :func:`get_user_by_telegram_id_async` (a full ``User`` with its JSON
+columns, tracked by the session) with :func:`get_user_snapshot_async` on the
+same seeded users: lookup latency, bytes allocated per lookup, and the memory
+a warm :class:`UserLookupCache` of ``--users`` entries holds::
+
+    python -m bot.benchmarks.user_snapshot --users 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+
+from ._support import configure_database, summarize
+
+FIRST_ID = 30_000_000
+
+
+def _seed(users: int) -> None:
+    from sqlalchemy import func, insert, select
+
+    from ..config.database import SessionLocal, init_db
+    from ..models import User
+
+    init_db()
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count()).select_from(User).where(User.id.like("bench-snap-%")))
+        if existing >= users:
+            return
+        db.execute(
+            insert(User),
+            [
+                {
+                    "id": f"bench-snap-{i:09d}",
+                    "telegram_id": str(FIRST_ID + i),
+                    "username": f"user{i}",
+                    "first_name": f"User {i}",
+                    "last_name": "Bench",
+                    "language_code": "ru",
+                    "preferences": {"theme": "dark", "notify": {"news": True, "matches": True}},
+                    "profile_metadata": {"bio": "x" * 200, "interests": ["music", "travel", "books"]},
+                }
+                for i in range(existing, users)
+            ],
+        )
+        db.commit()
+
+
+async def _measure(load: Callable[[Any, str], Awaitable[Any]], users: int) -> Dict[str, Any]:
+    from ..bot.utils.database import UserLookupCache
+    from ..config.database import get_async_db
+
+    telegram_ids = [str(FIRST_ID + i) for i in range(users)]
+    latencies: List[float] = []
+    for telegram_id in telegram_ids:
+        # One session per lookup, as in a handler.
+        async with get_async_db() as db:
+            started = time.perf_counter()
+            await load(db, telegram_id)
+            latencies.append(time.perf_counter() - started)
+
+    # Memory is traced in a second pass; tracing slows every allocation down.
+    cache = UserLookupCache(maxsize=users)
+    allocated = 0
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for telegram_id in telegram_ids:
+        async with get_async_db() as db:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            user = await load(db, telegram_id)
+            allocated += tracemalloc.get_traced_memory()[1] - baseline
+        cache.store(telegram_id, user)
+    retained = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    return {
+        "lookup_latency": summarize(latencies),
+        "peak_bytes_per_lookup": round(allocated / users),
+        "cache_bytes_per_entry": round(retained / users),
+    }
+
+
+async def _run(users: int) -> Dict[str, Any]:
+    from ..bot.utils.database import get_user_by_telegram_id_async, get_user_snapshot_async
+
+    await _measure(get_user_snapshot_async, min(users, 100))  # warm up the engine and statement caches
+    return {
+        "orm_user": await _measure(get_user_by_telegram_id_async, users),
+        "user_snapshot": await _measure(get_user_snapshot_async, users),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args(argv)
+
+    configure_database(args.database_url)
+    _seed(args.users)
+    print(json.dumps(asyncio.run(_run(args.users)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
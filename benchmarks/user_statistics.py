@@ -0,0 +1,114 @@
+"""Benchmark: user statistics on a large seeded ``users`` table.
+
+Compares the legacy seven ``count()`` queries with the single grouped
+aggregate and with reading the Redis snapshot (skipped if Redis is down)::
+
+    python -m bot.benchmarks.user_statistics --rows 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from ._support import configure_database, summarize
+
+
+def _seed(rows: int) -> None:
+    from sqlalchemy import func, insert, select
+
+    from ..config.database import SessionLocal, init_db
+    from ..models import User
+
+    init_db()
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count()).select_from(User).where(User.id.like("bench-stat-%")))
+        rng = random.Random(0)
+        for start in range(existing, rows, 50_000):
+            db.execute(
+                insert(User),
+                [
+                    {
+                        "id": f"bench-stat-{i:09d}",
+                        "telegram_id": str(20_000_000 + i),
+                        "loyalty_level": rng.randint(1, 5),
+                        "is_active": rng.random() < 0.8,
+                    }
+                    for i in range(start, min(rows, start + 50_000))
+                ],
+            )
+            db.commit()
+
+
+def _legacy(db) -> dict:
+    from ..models import User
+
+    return {
+        "total_users": db.query(User).count(),
+        "active_users": db.query(User).filter(User.is_active.is_(True)).count(),
+        "users_by_level": {
+            level: db.query(User).filter(User.loyalty_level == level).count() for level in range(1, 6)
+        },
+    }
+
+
+def _time(func: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def _time_async(func: Callable[[], Awaitable[object]], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    configure_database(args.database_url)
+    from ..bot.services.user_service import UserService, statistics_snapshot
+    from ..config.database import SessionLocal
+
+    _seed(args.rows)
+    results: Dict[str, Dict[str, float]] = {}
+    with SessionLocal() as db:
+        expected = _legacy(db)
+        results["legacy_counts"] = summarize(_time(lambda: _legacy(db), args.repeat))
+
+    # One event loop throughout: pooled async connections are bound to it.
+    async def run() -> None:
+        with SessionLocal() as db:
+            service = UserService(db)
+            assert await service.get_user_statistics() == expected
+            results["grouped_query"] = summarize(
+                await _time_async(service.get_user_statistics, args.repeat)
+            )
+
+        await statistics_snapshot.refresh()
+        if await statistics_snapshot.read() is None:
+            results["snapshot_read"] = {"skipped": "redis unavailable"}
+        else:
+            results["snapshot_read"] = summarize(await _time_async(statistics_snapshot.read, args.repeat))
+
+    asyncio.run(run())
+    print(json.dumps({"rows": expected["total_users"], **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
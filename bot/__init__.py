@@ -3,10 +3,40 @@
 from __future__ import annotations
 
 from importlib import metadata
+from typing import TYPE_CHECKING
 
-__all__ = ["__version__"]
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from telegram.ext import Application
+
+__all__ = ["__version__", "build_application"]
 
 try:
     __version__ = metadata.version("soulmine-bot")
 except metadata.PackageNotFoundError:  # pragma: no cover - package metadata absent
-    __version__ = "5.0.0"
\ No newline at end of file
+    __version__ = "5.0.0"
+
+
+def build_application() -> "Application":
+    """Return an :class:`Application` for the configured bot token with lifecycle hooks."""
+
+    from telegram.ext import Application
+
+    from ..config.settings import get_settings
+    from .lifecycle import on_shutdown, on_startup
+    from .sharding import ChatOrderedUpdateProcessor
+
+    settings = get_settings()
+    builder = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .base_url(settings.TELEGRAM_API_BASE_URL)
+        .concurrent_updates(ChatOrderedUpdateProcessor(settings.UPDATE_CONCURRENCY))
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if settings.METRICS_ENABLED:
+        from .metrics import InstrumentedRequest
+
+        # Same pool size the builder would use by default.
+        builder = builder.request(InstrumentedRequest(connection_pool_size=256))
+    return builder.build()
@@ -0,0 +1,220 @@
+"""Flood guard run in front of every handler.
+
+Registered as a :class:`TypeHandler` in group ``-1``, it stops an update
+(raising :class:`ApplicationHandlerStop`) before any handler or database
+access when:
+
+* its callback button belongs to a message the bot can no longer access
+  (deleted, or too old for Telegram to return it); buttons on old but
+  accessible messages, e.g. a pinned menu, keep working;
+* it repeats the user's previous accepted callback (same button on the same
+  message) within ``FLOOD_DEBOUNCE_SECONDS``;
+* the user's token bucket (``FLOOD_USER_RATE`` per second, bursts of
+  ``FLOOD_USER_BURST``) or the optional process-wide bucket is empty.
+
+Per-user state lives in a bounded in-process LRU. With ``FLOOD_GUARD_REDIS``
+the debounce and bucket checks run as one Redis script instead, so the
+limits hold across replicas and shards; Redis errors fall back to the
+in-process state.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+from telegram import Message, Update
+from telegram.error import TelegramError
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from ..config.redis import get_redis
+from ..config.settings import get_settings
+from .messages import STALE_MENU_ANSWER, THROTTLED_ANSWER
+from .services.broadcast import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["FloodGuard", "flood_guard"]
+
+ALLOWED = "allowed"
+STALE = "stale"
+DUPLICATE = "duplicate"
+THROTTLED = "throttled"
+
+# KEYS: bucket hash, last-callback key. ARGV: now (s), rate, burst, debounce (ms),
+# callback fingerprint ("" for non-callback updates).
+# Returns 0 if allowed, 1 if throttled, 2 if a duplicate callback. Only allowed
+# callbacks start a debounce window, so dropped taps cannot extend it.
+_REDIS_CHECK = """
+if ARGV[5] ~= '' and redis.call('GET', KEYS[2]) == ARGV[5] then
+  return 2
+end
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local result = 1
+if tokens >= 1 then
+  tokens = tokens - 1
+  result = 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+if result == 0 and ARGV[5] ~= '' then
+  redis.call('SET', KEYS[2], ARGV[5], 'PX', ARGV[4])
+end
+return result
+"""
+_REDIS_RESULTS = {0: ALLOWED, 1: THROTTLED, 2: DUPLICATE}
+
+
+@dataclass
+class _UserState:
+    bucket: TokenBucket
+    last_callback: Optional[str] = None
+    last_callback_at: float = 0.0
+
+
+class FloodGuard:
+    """Per-user throttling, callback debouncing and stale-callback filtering."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        debounce: float,
+        global_rate: Optional[float] = None,
+        max_users: int = 100_000,
+        use_redis: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.debounce = debounce
+        self.max_users = max_users
+        self.use_redis = use_redis
+        self._clock = clock
+        self._global = TokenBucket(global_rate, clock=clock) if global_rate else None
+        self._users: "OrderedDict[int, _UserState]" = OrderedDict()
+        self._script: Optional[AsyncScript] = None
+        self.dropped: Counter = Counter()
+
+    @classmethod
+    def from_settings(cls) -> "FloodGuard":
+        settings = get_settings()
+        return cls(
+            rate=settings.FLOOD_USER_RATE,
+            burst=settings.FLOOD_USER_BURST,
+            debounce=settings.FLOOD_DEBOUNCE_SECONDS,
+            global_rate=settings.FLOOD_GLOBAL_RATE,
+            use_redis=settings.FLOOD_GUARD_REDIS,
+        )
+
+    def _state(self, user_id: int) -> _UserState:
+        state = self._users.get(user_id)
+        if state is None:
+            state = _UserState(TokenBucket(self.rate, self.burst, clock=self._clock))
+            self._users[user_id] = state
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return state
+
+    def _is_stale(self, update: Update) -> bool:
+        message = update.callback_query.message
+        if message is None:
+            # Inline-mode messages carry no message; nothing to judge staleness by.
+            return update.callback_query.inline_message_id is None
+        # Telegram sends an InaccessibleMessage for messages it no longer returns.
+        return not isinstance(message, Message)
+
+    def check_local(self, user_id: int, fingerprint: Optional[str]) -> str:
+        """Apply the debounce and bucket checks against in-process state."""
+
+        state = self._state(user_id)
+        now = self._clock()
+        if (
+            fingerprint is not None
+            and fingerprint == state.last_callback
+            and now - state.last_callback_at < self.debounce
+        ):
+            return DUPLICATE
+        if not state.bucket.try_acquire():
+            return THROTTLED
+        # Only accepted taps start a debounce window, so dropped ones cannot extend it.
+        if fingerprint is not None:
+            state.last_callback, state.last_callback_at = fingerprint, now
+        return ALLOWED
+
+    async def _check_redis(self, user_id: int, fingerprint: Optional[str]) -> str:
+        client = get_redis()
+        if self._script is None:
+            self._script = client.register_script(_REDIS_CHECK)
+        result = await self._script(
+            keys=[f"flood:bucket:{user_id}", f"flood:callback:{user_id}"],
+            args=[
+                time.time(),
+                self.rate,
+                self.burst,
+                int(self.debounce * 1000),
+                fingerprint if fingerprint is not None and self.debounce > 0 else "",
+            ],
+            client=client,
+        )
+        return _REDIS_RESULTS[int(result)]
+
+    async def check(self, update: Update) -> str:
+        """Return :data:`ALLOWED` or the reason ``update`` should be dropped."""
+
+        user = update.effective_user
+        if user is None:
+            return ALLOWED
+
+        fingerprint = None
+        query = update.callback_query
+        if query is not None:
+            if self._is_stale(update):
+                return STALE
+            message_id = query.message.message_id if query.message is not None else query.inline_message_id
+            fingerprint = f"{message_id}:{query.data}"
+
+        if self.use_redis:
+            try:
+                verdict = await self._check_redis(user.id, fingerprint)
+            except RedisError as exc:
+                logger.warning("Flood guard falling back to local state: %s", exc)
+                verdict = self.check_local(user.id, fingerprint)
+        else:
+            verdict = self.check_local(user.id, fingerprint)
+
+        if verdict == ALLOWED and self._global is not None and not self._global.try_acquire():
+            return THROTTLED
+        return verdict
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        verdict = await self.check(update)
+        if verdict == ALLOWED:
+            return
+
+        self.dropped[verdict] += 1
+        logger.debug("Dropped %s update %s from %s", verdict, update.update_id, update.effective_user.id)
+        query = update.callback_query
+        if query is not None:
+            # Answer anyway so the button's loading spinner stops.
+            try:
+                await query.answer({STALE: STALE_MENU_ANSWER, THROTTLED: THROTTLED_ANSWER}.get(verdict))
+            except TelegramError:
+                logger.debug("Could not answer dropped callback %s", query.id, exc_info=True)
+        raise ApplicationHandlerStop
+
+
+flood_guard = FloodGuard.from_settings()
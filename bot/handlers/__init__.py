@@ -1,25 +1,13 @@
-"""Telegram update handlers for the SoulMine bot."""
+"""Telegram update handlers for the SoulMine bot.
 
-from .app import (
-    back_to_main_callback,
-    handle_app_button,
-    link_wallet_callback,
-    open_mini_app_callback,
-    open_web_app_callback,
-)
-from .news import (
-    disable_notifications_callback,
-    enable_notifications_callback,
-    handle_news_button,
-    latest_news_callback,
-)
-from .start import start
-from .support import (
-    call_support_callback,
-    contact_support_callback,
-    handle_support_button,
-    send_email_callback,
-)
+Handler modules are imported on first access of one of their callbacks,
+normally when :func:`~bot.main.create_application` registers them.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Any
 
 __all__ = [
     "back_to_main_callback",
@@ -36,4 +24,30 @@ __all__ = [
     "contact_support_callback",
     "handle_support_button",
     "send_email_callback",
-]
\ No newline at end of file
+]
+
+_SUBMODULES = {
+    "back_to_main_callback": ".app",
+    "handle_app_button": ".app",
+    "link_wallet_callback": ".app",
+    "open_mini_app_callback": ".app",
+    "open_web_app_callback": ".app",
+    "disable_notifications_callback": ".news",
+    "enable_notifications_callback": ".news",
+    "handle_news_button": ".news",
+    "latest_news_callback": ".news",
+    "start": ".start",
+    "call_support_callback": ".support",
+    "contact_support_callback": ".support",
+    "handle_support_button": ".support",
+    "send_email_callback": ".support",
+}
+
+
+def __getattr__(name: str) -> Any:
+    submodule = _SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(submodule, __name__), name)
+    globals()[name] = value
+    return value
@@ -7,13 +7,16 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from ...config.database import get_db
-from ..keyboards.main_keyboard import (
-    get_app_keyboard,
-    get_back_to_main_keyboard,
-    get_main_keyboard,
+from ..messages import (
+    APP_MENU,
+    LINK_WALLET,
+    MAIN_MENU,
+    MAIN_MENU_TITLE,
+    MINI_APP,
+    REGISTRATION_REQUIRED,
+    WEB_APP,
 )
-from ..utils.database import get_user_by_telegram_id
+from ..utils.database import get_user_cached_async
 
 logger = logging.getLogger(__name__)
 
@@ -22,29 +25,13 @@ async def handle_app_button(update: Update, context: ContextTypes.DEFAULT_TYPE)
     """Handle the "Приложение" button from the main menu."""
 
     user = update.effective_user
-    with get_db() as db:
-        user_obj = get_user_by_telegram_id(db, str(user.id))
+    user_obj = await get_user_cached_async(None, str(user.id))
 
     if not user_obj:
-        await update.message.reply_text(
-            "Пожалуйста, сначала зарегистрируйтесь, используя команду /start",
-        )
+        await REGISTRATION_REQUIRED.reply_to(update.message)
         return
 
-    app_message = (
-        "📱 *Приложение SoulMine*\n\n"
-        "Выберите, как вы хотите использовать приложение:\n\n"
-        "• 🌐 Веб-приложение — полная версия на сайте\n"
-        "• 📱 Mini App — лёгкая версия в Telegram\n"
-        "• 🔗 Привязать кошелёк — для работы с токенами $LOVE\n\n"
-        "Что вы хотите сделать?"
-    )
-
-    await update.message.reply_text(
-        app_message,
-        reply_markup=get_app_keyboard(),
-        parse_mode="Markdown",
-    )
+    await APP_MENU.reply_to(update.message)
 
 
 async def link_wallet_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -53,21 +40,7 @@ async def link_wallet_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     await query.answer()
 
-    wallet_message = (
-        "🔗 *Привязка кошелька*\n\n"
-        "Чтобы подключить TON-кошелёк:\n"
-        "1. Откройте приложение SoulMine.\n"
-        "2. Перейдите в раздел «Кошелёк».\n"
-        "3. Следуйте инструкциям на экране или используйте ссылку ниже.\n\n"
-        "👉 [Привязать кошелёк](https://soulmine.app/wallet)\n\n"
-        "После привязки вы сможете управлять токенами $LOVE и получать награды."
-    )
-
-    await query.edit_message_text(
-        wallet_message,
-        reply_markup=get_back_to_main_keyboard(),
-        parse_mode="Markdown",
-    )
+    await LINK_WALLET.edit(query)
 
 
 async def open_web_app_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -76,20 +49,7 @@ async def open_web_app_callback(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     await query.answer()
 
-    web_app_message = (
-        "🌐 *Веб-приложение SoulMine*\n\n"
-        "Полная версия доступна в браузере и поддерживает все функции платформы:\n"
-        "• Расширенный профиль\n"
-        "• Продвинутый поиск\n"
-        "• Управление наградами и кошельком\n\n"
-        "👉 [Открыть веб-приложение](https://soulmine.app)"
-    )
-
-    await query.edit_message_text(
-        web_app_message,
-        reply_markup=get_back_to_main_keyboard(),
-        parse_mode="Markdown",
-    )
+    await WEB_APP.edit(query)
 
 
 async def open_mini_app_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -98,23 +58,7 @@ async def open_mini_app_callback(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
 
-    mini_app_message = (
-        "📱 *Mini App SoulMine*\n\n"
-        "Используйте лёгкую версию приложения прямо в Telegram:\n\n"
-        "👉 [Открыть Mini App](https://t.me/soulmine_bot?startapp=mini_app)\n\n"
-        "Mini App позволяет:\n"
-        "• Быстро общаться с пользователями\n"
-        "• Получать базовые награды\n"
-        "• Просматривать профили\n"
-        "• Участвовать в чатах\n\n"
-        "Идеально для быстрого использования!"
-    )
-
-    await query.edit_message_text(
-        mini_app_message,
-        reply_markup=get_back_to_main_keyboard(),
-        parse_mode="Markdown",
-    )
+    await MINI_APP.edit(query)
 
 
 async def back_to_main_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -123,12 +67,5 @@ async def back_to_main_callback(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     await query.answer()
 
-    await query.edit_message_text(
-        "🏠 *Главное меню*",
-        parse_mode="Markdown",
-    )
-
-    await query.message.reply_text(
-        "Выберите действие из меню ниже:",
-        reply_markup=get_main_keyboard(),
-    )
\ No newline at end of file
+    await MAIN_MENU_TITLE.edit(query)
+    await MAIN_MENU.reply_to(query.message)
\ No newline at end of file
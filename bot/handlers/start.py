@@ -7,10 +7,9 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from ...config.database import get_db
-from ..keyboards.main_keyboard import get_main_keyboard
-from ..utils.database import get_or_create_user
-from ..utils.helpers import generate_referral_code
+from ...config.database import get_async_db
+from ..messages import WELCOME
+from ..utils.database import upsert_user_async
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +19,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
     user = update.effective_user
 
-    with get_db() as db:
-        user_obj = get_or_create_user(
+    async with get_async_db() as db:
+        await upsert_user_async(
             db,
             str(user.id),
             username=user.username,
@@ -30,15 +29,5 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             language_code=user.language_code,
         )
 
-        if not user_obj.referral_code:
-            user_obj.referral_code = generate_referral_code(str(user.id))
-            db.commit()
-
-    welcome_message = (
-        f"👋 Привет, {user.first_name or 'друг'}!\n\n"
-        "Добро пожаловать в SoulMine — платформу Web3 знакомств с майнингом $LOVE токенов!\n\n"
-        "Выберите действие из меню ниже:"
-    )
-
-    await update.message.reply_text(welcome_message, reply_markup=get_main_keyboard())
+    await WELCOME.reply_to(update.message, first_name=user.first_name or "друг")
     logger.info("User %s started the bot", user.id)
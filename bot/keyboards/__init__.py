@@ -1,6 +1,9 @@
 """Reply and inline keyboard factories used by the bot."""
 
 from .main_keyboard import (
+    APP_BUTTON,
+    NEWS_BUTTON,
+    SUPPORT_BUTTON,
     get_app_keyboard,
     get_back_to_main_keyboard,
     get_main_keyboard,
@@ -9,6 +12,9 @@ from .main_keyboard import (
 )
 
 __all__ = [
+    "APP_BUTTON",
+    "NEWS_BUTTON",
+    "SUPPORT_BUTTON",
     "get_app_keyboard",
     "get_back_to_main_keyboard",
     "get_main_keyboard",
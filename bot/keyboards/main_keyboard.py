@@ -1,48 +1,104 @@
+from typing import Any, Dict
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram import KeyboardButton, ReplyKeyboardMarkup
 
-def get_main_keyboard() -> ReplyKeyboardMarkup:
-    """Get main keyboard with three buttons"""
-    keyboard = [
-        [KeyboardButton("📱 Приложение")],
-        [KeyboardButton("🤝 Поддержка")],
-        [KeyboardButton("📰 Новости")]
-    ]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
+# Reply-keyboard button texts; incoming messages are routed on these exact strings.
+APP_BUTTON = "📱 Приложение"
+SUPPORT_BUTTON = "🤝 Поддержка"
+NEWS_BUTTON = "📰 Новости"
 
-def get_app_keyboard() -> InlineKeyboardMarkup:
-    """Get application keyboard"""
-    keyboard = [
+
+class PrebuiltInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """Inline keyboard whose Bot API representation is computed once.
+
+    The library calls ``to_dict()`` on every request carrying a markup; the
+    keyboards below never change, so they are serialised at import time and
+    the same (read-only) dict is returned on each send.
+    """
+
+    __slots__ = ("_api_dict",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        with self._unfrozen():
+            self._api_dict = super().to_dict()
+
+    def to_dict(self, recursive: bool = True) -> Dict[str, Any]:
+        return self._api_dict if recursive else super().to_dict(recursive=False)
+
+
+class PrebuiltReplyKeyboardMarkup(ReplyKeyboardMarkup):
+    """Reply keyboard whose Bot API representation is computed once."""
+
+    __slots__ = ("_api_dict",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        with self._unfrozen():
+            self._api_dict = super().to_dict()
+
+    def to_dict(self, recursive: bool = True) -> Dict[str, Any]:
+        return self._api_dict if recursive else super().to_dict(recursive=False)
+
+
+_BACK_TO_MAIN_BUTTON = InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")
+
+MAIN_KEYBOARD = PrebuiltReplyKeyboardMarkup(
+    [
+        [KeyboardButton(APP_BUTTON)],
+        [KeyboardButton(SUPPORT_BUTTON)],
+        [KeyboardButton(NEWS_BUTTON)]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False,
+)
+
+APP_KEYBOARD = PrebuiltInlineKeyboardMarkup(
+    [
         [InlineKeyboardButton("🌐 Открыть веб-приложение", url="https://soulmine.app")],
         [InlineKeyboardButton("📱 Открыть Mini App", web_app={"url": "https://soulmine.app/mini-app"})],
         [InlineKeyboardButton("🔗 Привязать кошелёк", callback_data="link_wallet")],
-        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
+        [_BACK_TO_MAIN_BUTTON]
     ]
-    return InlineKeyboardMarkup(keyboard)
+)
 
-def get_support_keyboard() -> InlineKeyboardMarkup:
-    """Get support keyboard"""
-    keyboard = [
+SUPPORT_KEYBOARD = PrebuiltInlineKeyboardMarkup(
+    [
         [InlineKeyboardButton("💬 Написать в поддержку", url=f"tg://resolve?domain=soulmine_support")],
         [InlineKeyboardButton("📧 Отправить письмо", callback_data="send_email")],
         [InlineKeyboardButton("📞 Звонок в поддержку", callback_data="call_support")],
-        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
+        [_BACK_TO_MAIN_BUTTON]
     ]
-    return InlineKeyboardMarkup(keyboard)
+)
 
-def get_news_keyboard() -> InlineKeyboardMarkup:
-    """Get news keyboard"""
-    keyboard = [
+NEWS_KEYBOARD = PrebuiltInlineKeyboardMarkup(
+    [
         [InlineKeyboardButton("📢 Последние новости", callback_data="latest_news")],
         [InlineKeyboardButton("🔔 Включить уведомления", callback_data="enable_notifications")],
         [InlineKeyboardButton("🔕 Выключить уведомления", callback_data="disable_notifications")],
-        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
+        [_BACK_TO_MAIN_BUTTON]
     ]
-    return InlineKeyboardMarkup(keyboard)
+)
+
+BACK_TO_MAIN_KEYBOARD = PrebuiltInlineKeyboardMarkup([[_BACK_TO_MAIN_BUTTON]])
+
+def get_main_keyboard() -> ReplyKeyboardMarkup:
+    """Get main keyboard with three buttons"""
+    return MAIN_KEYBOARD
+
+def get_app_keyboard() -> InlineKeyboardMarkup:
+    """Get application keyboard"""
+    return APP_KEYBOARD
+
+def get_support_keyboard() -> InlineKeyboardMarkup:
+    """Get support keyboard"""
+    return SUPPORT_KEYBOARD
+
+def get_news_keyboard() -> InlineKeyboardMarkup:
+    """Get news keyboard"""
+    return NEWS_KEYBOARD
 
 def get_back_to_main_keyboard() -> InlineKeyboardMarkup:
     """Get back to main menu keyboard"""
-    keyboard = [
-        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return BACK_TO_MAIN_KEYBOARD
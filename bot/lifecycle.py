@@ -0,0 +1,51 @@
+"""Application start-up and shutdown hooks."""
+
+from __future__ import annotations
+
+import logging
+
+from telegram.ext import Application
+
+from ..config.database import dispose_engines, pool_stats
+from ..config.redis import close_redis
+from ..config.settings import get_settings
+from .metrics import start_metrics_server
+from .services.notification_service import get_notification_service
+from .services.user_service import statistics_snapshot
+from .utils.database import interaction_tracker, preference_store, unreachable_recipients
+
+logger = logging.getLogger(__name__)
+
+
+async def on_startup(application: Application) -> None:
+    """Start background writers once the application is initialised."""
+
+    interaction_tracker.start()
+    preference_store.start()
+    unreachable_recipients.start()
+    statistics_snapshot.start()
+    get_notification_service(application.bot).dispatcher.start()
+
+    settings = get_settings()
+    shard = application.bot_data.get("shard")
+    # In webhook mode the ingress app serves /metrics itself.
+    if settings.METRICS_ENABLED and settings.METRICS_PORT and (shard is not None or settings.BOT_MODE == "polling"):
+        port = settings.METRICS_PORT if shard is None else settings.METRICS_PORT + 1 + shard
+        application.bot_data["metrics_server"] = await start_metrics_server(settings.METRICS_HOST, port)
+        logger.info("Serving metrics on %s:%s/metrics", settings.METRICS_HOST, port)
+
+
+async def on_shutdown(application: Application) -> None:
+    """Flush buffered writes and release connections."""
+
+    metrics_server = application.bot_data.pop("metrics_server", None)
+    if metrics_server is not None:
+        await metrics_server.cleanup()
+    await get_notification_service(application.bot).dispatcher.stop()
+    await statistics_snapshot.stop()
+    await interaction_tracker.stop()
+    await preference_store.stop()
+    await unreachable_recipients.stop()
+    await close_redis()
+    logger.info("Database pool usage: %s", pool_stats())
+    await dispose_engines()
@@ -2,67 +2,88 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Final
 
 from telegram import Update
-from telegram.ext import (
-    Application,
-    CallbackQueryHandler,
-    CommandHandler,
-    MessageHandler,
-    filters,
-)
+from telegram.ext import Application
 
 from ..config.settings import get_settings
 from . import build_application
-from .handlers.app import (
-    back_to_main_callback,
-    handle_app_button,
-    link_wallet_callback,
-    open_mini_app_callback,
-    open_web_app_callback,
-)
-from .handlers.news import (
-    disable_notifications_callback,
-    enable_notifications_callback,
-    handle_news_button,
-    latest_news_callback,
-)
-from .handlers.start import start
-from .handlers.support import (
-    call_support_callback,
-    contact_support_callback,
-    handle_support_button,
-    send_email_callback,
-)
 
 LOGGER_NAME: Final[str] = "soulmine.bot"
 
 
 def create_application() -> Application:
-    """Create an application instance with all handlers registered."""
+    """Create an application instance with all handlers registered.
+
+    This is the bootstrap step: handler modules and the services behind them
+    are imported here rather than with this module, and database engines and
+    the Redis client are only created once a handler first needs them.
+    """
+
+    from telegram.ext import CommandHandler, TypeHandler
+
+    from .flood_guard import flood_guard
+    from .handlers import (
+        back_to_main_callback,
+        call_support_callback,
+        contact_support_callback,
+        disable_notifications_callback,
+        enable_notifications_callback,
+        handle_app_button,
+        handle_news_button,
+        handle_support_button,
+        latest_news_callback,
+        link_wallet_callback,
+        open_mini_app_callback,
+        open_web_app_callback,
+        send_email_callback,
+        start,
+    )
+    from .keyboards.main_keyboard import APP_BUTTON, NEWS_BUTTON, SUPPORT_BUTTON
+    from .router import CallbackDataRouter, ReplyButtonRouter
 
     application = build_application()
 
+    # Runs before every handler group and stops throttled, repeated or stale updates.
+    application.add_handler(TypeHandler(Update, flood_guard), group=-1)
+
     application.add_handler(CommandHandler("start", start))
 
-    application.add_handler(MessageHandler(filters.Regex("^📱 Приложение$"), handle_app_button))
-    application.add_handler(MessageHandler(filters.Regex("^🤝 Поддержка$"), handle_support_button))
-    application.add_handler(MessageHandler(filters.Regex("^📰 Новости$"), handle_news_button))
+    application.add_handler(
+        ReplyButtonRouter(
+            {
+                APP_BUTTON: handle_app_button,
+                SUPPORT_BUTTON: handle_support_button,
+                NEWS_BUTTON: handle_news_button,
+            }
+        )
+    )
 
-    application.add_handler(CallbackQueryHandler(link_wallet_callback, pattern="^link_wallet$"))
-    application.add_handler(CallbackQueryHandler(open_web_app_callback, pattern="^open_web_app$"))
-    application.add_handler(CallbackQueryHandler(open_mini_app_callback, pattern="^open_mini_app$"))
-    application.add_handler(CallbackQueryHandler(back_to_main_callback, pattern="^main_menu$"))
+    application.add_handler(
+        CallbackDataRouter(
+            {
+                "link_wallet": link_wallet_callback,
+                "open_web_app": open_web_app_callback,
+                "open_mini_app": open_mini_app_callback,
+                "main_menu": back_to_main_callback,
+                "send_email": send_email_callback,
+                "call_support": call_support_callback,
+                "contact_support": contact_support_callback,
+                "latest_news": latest_news_callback,
+                "enable_notifications": enable_notifications_callback,
+                "disable_notifications": disable_notifications_callback,
+            }
+        )
+    )
 
-    application.add_handler(CallbackQueryHandler(send_email_callback, pattern="^send_email$"))
-    application.add_handler(CallbackQueryHandler(call_support_callback, pattern="^call_support$"))
-    application.add_handler(CallbackQueryHandler(contact_support_callback, pattern="^contact_support$"))
+    if get_settings().METRICS_ENABLED:
+        from .metrics import collect_runtime_stats, instrument_application
 
-    application.add_handler(CallbackQueryHandler(latest_news_callback, pattern="^latest_news$"))
-    application.add_handler(CallbackQueryHandler(enable_notifications_callback, pattern="^enable_notifications$"))
-    application.add_handler(CallbackQueryHandler(disable_notifications_callback, pattern="^disable_notifications$"))
+        instrument_application(application)
+        collect_runtime_stats(application)
 
     return application
 
@@ -77,10 +98,21 @@ def main() -> None:
 
     logger = logging.getLogger(LOGGER_NAME)
     settings = get_settings()
-    logger.info("Starting SoulMine bot with webhook URL %s", settings.WEB_APP_URL)
+    logger.info("Starting SoulMine bot in %s mode", settings.BOT_MODE)
+
+    if settings.WORKER_PROCESSES > 1:
+        from .sharding import run_sharded
+
+        asyncio.run(run_sharded(create_application, settings.WORKER_PROCESSES))
+        return
 
     application = create_application()
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if settings.BOT_MODE == "webhook":
+        from .webhook import run_webhook
+
+        asyncio.run(run_webhook(application))
+    else:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == "__main__":
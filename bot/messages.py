@@ -0,0 +1,211 @@
+"""Prebuilt reply payloads: message text, parse mode and keyboard markup.
+
+Every payload is built once at import time and shared by all updates, so a
+handler sends a menu without allocating keyboards or re-serialising them.
+Texts with ``{placeholders}`` are formatted with the fields passed to
+:meth:`ReplyPayload.reply_to` / :meth:`ReplyPayload.edit`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+from telegram import CallbackQuery, InlineKeyboardMarkup, Message, ReplyKeyboardMarkup
+
+from .keyboards.main_keyboard import (
+    APP_KEYBOARD,
+    BACK_TO_MAIN_KEYBOARD,
+    MAIN_KEYBOARD,
+    NEWS_KEYBOARD,
+    SUPPORT_KEYBOARD,
+)
+
+__all__ = ["PAYLOADS", "ReplyPayload"]
+
+
+@dataclass(frozen=True)
+class ReplyPayload:
+    """An immutable reply that handlers send as is."""
+
+    text: str
+    reply_markup: Optional[Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]] = None
+    parse_mode: Optional[str] = None
+
+    def render(self, **fields: Any) -> str:
+        return self.text.format(**fields) if fields else self.text
+
+    async def reply_to(self, message: Message, **fields: Any) -> Message:
+        """Send this payload as a new message in ``message``'s chat."""
+
+        return await message.reply_text(
+            self.render(**fields), reply_markup=self.reply_markup, parse_mode=self.parse_mode
+        )
+
+    async def edit(self, query: CallbackQuery, **fields: Any) -> Any:
+        """Replace the message carrying ``query``'s button with this payload."""
+
+        return await query.edit_message_text(
+            self.render(**fields), reply_markup=self.reply_markup, parse_mode=self.parse_mode
+        )
+
+
+REGISTRATION_REQUIRED = ReplyPayload("Пожалуйста, сначала зарегистрируйтесь, используя команду /start")
+
+GENERIC_ERROR = ReplyPayload("Произошла ошибка. Попробуйте снова.", BACK_TO_MAIN_KEYBOARD)
+
+WELCOME = ReplyPayload(
+    "👋 Привет, {first_name}!\n\n"
+    "Добро пожаловать в SoulMine — платформу Web3 знакомств с майнингом $LOVE токенов!\n\n"
+    "Выберите действие из меню ниже:",
+    MAIN_KEYBOARD,
+)
+
+MAIN_MENU_TITLE = ReplyPayload("🏠 *Главное меню*", parse_mode="Markdown")
+
+MAIN_MENU = ReplyPayload("Выберите действие из меню ниже:", MAIN_KEYBOARD)
+
+APP_MENU = ReplyPayload(
+    "📱 *Приложение SoulMine*\n\n"
+    "Выберите, как вы хотите использовать приложение:\n\n"
+    "• 🌐 Веб-приложение — полная версия на сайте\n"
+    "• 📱 Mini App — лёгкая версия в Telegram\n"
+    "• 🔗 Привязать кошелёк — для работы с токенами $LOVE\n\n"
+    "Что вы хотите сделать?",
+    APP_KEYBOARD,
+    "Markdown",
+)
+
+LINK_WALLET = ReplyPayload(
+    "🔗 *Привязка кошелька*\n\n"
+    "Чтобы подключить TON-кошелёк:\n"
+    "1. Откройте приложение SoulMine.\n"
+    "2. Перейдите в раздел «Кошелёк».\n"
+    "3. Следуйте инструкциям на экране или используйте ссылку ниже.\n\n"
+    "👉 [Привязать кошелёк](https://soulmine.app/wallet)\n\n"
+    "После привязки вы сможете управлять токенами $LOVE и получать награды.",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+WEB_APP = ReplyPayload(
+    "🌐 *Веб-приложение SoulMine*\n\n"
+    "Полная версия доступна в браузере и поддерживает все функции платформы:\n"
+    "• Расширенный профиль\n"
+    "• Продвинутый поиск\n"
+    "• Управление наградами и кошельком\n\n"
+    "👉 [Открыть веб-приложение](https://soulmine.app)",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+MINI_APP = ReplyPayload(
+    "📱 *Mini App SoulMine*\n\n"
+    "Используйте лёгкую версию приложения прямо в Telegram:\n\n"
+    "👉 [Открыть Mini App](https://t.me/soulmine_bot?startapp=mini_app)\n\n"
+    "Mini App позволяет:\n"
+    "• Быстро общаться с пользователями\n"
+    "• Получать базовые награды\n"
+    "• Просматривать профили\n"
+    "• Участвовать в чатах\n\n"
+    "Идеально для быстрого использования!",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+NEWS_MENU = ReplyPayload(
+    "📰 *Новости SoulMine*\n\n"
+    "Оставайтесь в курсе последних событий:\n\n"
+    "• 📢 Последние новости - важные обновления\n"
+    "• 🔔 Включить уведомления - получайте оповещения\n"
+    "• 🔕 Выключить уведомления - отключите нотификации\n\n"
+    "Что вы хотите сделать?",
+    NEWS_KEYBOARD,
+    "Markdown",
+)
+
+LATEST_NEWS = ReplyPayload(
+    "📢 *Последние новости*\n\n"
+    "🎉 *Объявляем запуск нового сезона!* (20.10.2024)\n\n"
+    "Сегодня мы запускаем новый сезон с увеличенными наградами и новыми функциями:\n"
+    "• Увеличена награда за майнинг $LOVE токенов на 20%\n"
+    "• Добавлены новые NFT коллекции\n"
+    "• Улучшен алгоритм подбора пар\n"
+    "• Добавлена возможность видеозвонков\n\n"
+    "Спасибо, что вы с нами! 🎉",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+NOTIFICATIONS_ENABLED = ReplyPayload(
+    "🔔 *Уведомления включены*\n\n"
+    "Теперь вы будете получать уведомления о:\n"
+    "• Новых сообщениях\n"
+    "• Новых матчах\n"
+    "• Наградах за активность\n"
+    "• Акциях и событиях\n\n"
+    "Вы всегда можете отключить уведомления, нажав соответствующую кнопку.",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+NOTIFICATIONS_DISABLED = ReplyPayload(
+    "🔕 *Уведомления отключены*\n\n"
+    "Вы больше не будете получать уведомления.\n\n"
+    "Вы всегда можете включить их обратно, нажав соответствующую кнопку.",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+SUPPORT_MENU = ReplyPayload(
+    "🤝 *Поддержка SoulMine*\n\n"
+    "Мы здесь, чтобы помочь вам! Выберите способ связи с поддержкой:\n\n"
+    "• 💬 Написать в поддержку - быстрый ответ в Telegram\n"
+    "• 📧 Отправить письмо - подробный ответ по email\n"
+    "• 📞 Звонок в поддержку - если нужно срочно\n\n"
+    "Какой способ вам удобнее?",
+    SUPPORT_KEYBOARD,
+    "Markdown",
+)
+
+SUPPORT_EMAIL = ReplyPayload(
+    "📧 *Отправить письмо в поддержку*\n\n"
+    "Для отправки письма в поддержку:\n"
+    "1. Напишите ваш вопрос или проблему\n"
+    "2. Укажите ваш Telegram ID: `{user_id}`\n"
+    "3. Отправьте письмо на адрес: support@soulmine.app\n\n"
+    "Мы ответим вам в течение 24 часов.\n\n"
+    "Также вы можете использовать другие способы связи, перечисленные выше.",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+SUPPORT_CALL = ReplyPayload(
+    "📞 *Звонок в поддержку*\n\n"
+    "Для срочной помощи вы можете позвонить в поддержку:\n\n"
+    "☎️ Телефон: +1 (555) 123-4567\n"
+    "🕒 Рабочее время: 9:00-21:00 (UTC+3)\n\n"
+    "Если вы не можете дозвониться, оставьте сообщение и мы перезвоним вам в течение 30 минут.\n\n"
+    "Также доступны другие способы связи, перечисленные выше.",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+SUPPORT_CONTACT = ReplyPayload(
+    "💬 *Написать в поддержку*\n\n"
+    "Вы можете написать в поддержку прямо сейчас:\n\n"
+    "👉 [Написать в поддержку](tg://resolve?domain=soulmine_support)\n\n"
+    "Наши операторы ответят вам в течение 15 минут.\n\n"
+    "Также доступны другие способы связи, перечисленные выше.",
+    BACK_TO_MAIN_KEYBOARD,
+    "Markdown",
+)
+
+# Callback-query answers (toasts) for taps dropped by the flood guard.
+THROTTLED_ANSWER = "Слишком много запросов. Подождите немного."
+STALE_MENU_ANSWER = "Это меню устарело. Откройте его заново."
+
+# Every payload by name, e.g. for admin tooling or previews.
+PAYLOADS: Dict[str, ReplyPayload] = {
+    name: value for name, value in globals().items() if isinstance(value, ReplyPayload)
+}
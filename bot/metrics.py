@@ -0,0 +1,331 @@
+"""Hot-path instrumentation exported in the Prometheus text format.
+
+With ``METRICS_ENABLED``, :func:`instrument_application` wraps every handler
+callback registered on the application and records per handler:
+
+* the latency of the callback;
+* the database time spent on its behalf, from cursor events on every engine;
+* the Telegram Bot API time, from :class:`InstrumentedRequest`.
+
+Per-update totals are accumulated in a context variable, so concurrent
+updates do not mix. Cache, flood guard, outbox and connection pool figures
+are read from their owners when ``/metrics`` is scraped. Disabled, nothing is
+wrapped or listened to and the hot path is unchanged.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from telegram.ext import Application, ApplicationHandlerStop
+from telegram.request import HTTPXRequest
+
+__all__ = [
+    "InstrumentedRequest",
+    "collect_runtime_stats",
+    "instrument_application",
+    "instrument_engine",
+    "metrics",
+    "metrics_view",
+    "start_metrics_server",
+]
+
+#: Seconds; suited to handlers, single queries and Bot API calls alike.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+# Yields ``(labels, value)`` samples when the registry is rendered.
+SampleSource = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one label set."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HistogramFamily:
+    """Histograms of one metric, by label values."""
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Labels, Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = Histogram(self.buckets)
+        return child
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        bucket_names = (*self.labelnames, "le")
+        for values, child in sorted(self._children.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(bucket_names, (*values, bound))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, values)} {child.sum}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, values)} {child.count}"
+
+
+class CounterFamily:
+    """Monotonic counters of one metric, by label values."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for values, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {value}"
+
+
+class _Collected:
+    """A metric whose samples are read from ``source`` at scrape time."""
+
+    def __init__(self, name: str, kind: str, help_text: str, source: SampleSource) -> None:
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.source = source
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self.source():
+            yield f"{self.name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}"
+
+
+class Metrics:
+    """The process-wide registry."""
+
+    def __init__(self) -> None:
+        self.handler_seconds = HistogramFamily(
+            "soulmine_handler_duration_seconds", "Handler callback latency.", ("handler",)
+        )
+        self.handler_db_seconds = HistogramFamily(
+            "soulmine_handler_db_seconds", "Database time per handler call.", ("handler",)
+        )
+        self.handler_api_seconds = HistogramFamily(
+            "soulmine_handler_api_seconds", "Telegram Bot API time per handler call.", ("handler",)
+        )
+        self.handler_errors = CounterFamily(
+            "soulmine_handler_errors_total", "Handler calls that raised.", ("handler",)
+        )
+        self.db_query_seconds = HistogramFamily(
+            "soulmine_db_query_duration_seconds", "Database statement latency.", ("engine",)
+        )
+        self.api_request_seconds = HistogramFamily(
+            "soulmine_telegram_api_duration_seconds", "Telegram Bot API request latency.", ("method",)
+        )
+        self._families: List[Any] = [
+            self.handler_seconds,
+            self.handler_db_seconds,
+            self.handler_api_seconds,
+            self.handler_errors,
+            self.db_query_seconds,
+            self.api_request_seconds,
+        ]
+
+    def collect(self, name: str, kind: str, help_text: str, source: SampleSource) -> None:
+        """Export ``source``'s samples as ``name`` (``"gauge"`` or ``"counter"``)."""
+
+        self._families.append(_Collected(name, kind, help_text, source))
+
+    def render(self) -> str:
+        return "\n".join(line for family in self._families for line in family.render()) + "\n"
+
+
+metrics = Metrics()
+
+
+class _UpdateTiming:
+    __slots__ = ("db", "api")
+
+    def __init__(self) -> None:
+        self.db = 0.0
+        self.api = 0.0
+
+
+_current: ContextVar[Optional[_UpdateTiming]] = ContextVar("soulmine_update_timing", default=None)
+
+
+def _timed(name: str, callback: Callable[..., Any]) -> Callable[..., Any]:
+    latency = metrics.handler_seconds.labels(name)
+    db_time = metrics.handler_db_seconds.labels(name)
+    api_time = metrics.handler_api_seconds.labels(name)
+
+    @functools.wraps(callback)
+    async def timed(update: Any, context: Any) -> Any:
+        timing = _UpdateTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except ApplicationHandlerStop:
+            raise
+        except Exception:
+            metrics.handler_errors.inc(name)
+            raise
+        finally:
+            latency.observe(time.perf_counter() - started)
+            db_time.observe(timing.db)
+            api_time.observe(timing.api)
+            _current.reset(token)
+
+    return timed
+
+
+def _handler_name(callback: Callable[..., Any]) -> str:
+    return getattr(callback, "__name__", None) or type(callback).__name__
+
+
+def instrument_application(application: Application) -> None:
+    """Wrap every registered handler callback (and dispatch table route) with timing."""
+
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            routes = getattr(handler, "routes", None)
+            if routes is not None:
+                for key, callback in routes.items():
+                    routes[key] = _timed(_handler_name(callback), callback)
+            else:
+                handler.callback = _timed(_handler_name(handler.callback), handler.callback)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every statement run on ``engine`` (a sync engine, or an async one's ``sync_engine``)."""
+
+    histogram = metrics.db_query_seconds.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        histogram.observe(elapsed)
+        timing = _current.get()
+        if timing is not None:
+            timing.db += elapsed
+
+
+def collect_runtime_stats(application: Application) -> None:
+    """Export cache, flood guard, outbox and connection pool counters, read at scrape time."""
+
+    from ..config.database import pool_stats
+    from .flood_guard import flood_guard
+    from .services.notification_service import get_notification_service
+    from .utils.database import shared_cache_lookups, user_cache
+
+    def cache_lookups() -> Iterable[Tuple[Dict[str, str], float]]:
+        local = user_cache.stats()
+        yield {"tier": "local", "result": "hit"}, local["hits"]
+        yield {"tier": "local", "result": "miss"}, local["misses"]
+        yield {"tier": "redis", "result": "hit"}, shared_cache_lookups["hit"]
+        yield {"tier": "redis", "result": "miss"}, shared_cache_lookups["miss"]
+
+    def dropped_updates() -> Iterable[Tuple[Dict[str, str], float]]:
+        for reason, count in flood_guard.dropped.items():
+            yield {"reason": reason}, count
+
+    def outbox_messages() -> Iterable[Tuple[Dict[str, str], float]]:
+        dispatcher = get_notification_service(application.bot).dispatcher
+        yield {"outcome": "sent"}, dispatcher.sent
+        yield {"outcome": "retried"}, dispatcher.retried
+        yield {"outcome": "dead_lettered"}, dispatcher.dead_lettered
+
+    def pool_field(field: str) -> SampleSource:
+        def samples() -> Iterable[Tuple[Dict[str, str], float]]:
+            for name, stats in pool_stats().items():
+                if field in stats:
+                    yield {"engine": name}, stats[field]
+
+        return samples
+
+    metrics.collect("soulmine_user_cache_lookups_total", "counter", "User lookups by cache tier and result.", cache_lookups)
+    metrics.collect("soulmine_flood_guard_dropped_total", "counter", "Updates dropped by the flood guard.", dropped_updates)
+    metrics.collect("soulmine_outbox_messages_total", "counter", "Outbox deliveries by outcome.", outbox_messages)
+    metrics.collect("soulmine_db_pool_checkouts_total", "counter", "Connection checkouts.", pool_field("checkouts"))
+    metrics.collect("soulmine_db_pool_timeouts_total", "counter", "Checkouts that timed out.", pool_field("timeouts"))
+    metrics.collect(
+        "soulmine_db_pool_wait_seconds_total",
+        "counter",
+        "Time spent waiting for a connection.",
+        lambda: ((labels, value / 1000) for labels, value in pool_field("wait_ms_total")()),
+    )
+    metrics.collect("soulmine_db_pool_checked_out", "gauge", "Connections in use.", pool_field("checked_out"))
+    metrics.collect("soulmine_db_pool_overflow", "gauge", "Connections open beyond the pool size.", pool_field("overflow"))
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """Bot API transport timing every request, by API method."""
+
+    async def do_request(self, url: str, method: str, *args: Any, **kwargs: Any) -> Tuple[int, bytes]:
+        started = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.api_request_seconds.labels(url.rsplit("/", 1)[-1]).observe(elapsed)
+            timing = _current.get()
+            if timing is not None:
+                timing.api += elapsed
+
+
+async def metrics_view(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``/metrics`` on ``host:port``; clean up the returned runner to stop."""
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_view)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,70 @@
+"""Exact-match dispatch tables for callback queries and reply-keyboard buttons.
+
+Every menu button maps to a fixed string, so instead of one handler per
+button (each running a regex over every update) a single handler per update
+type resolves the callback with one dict lookup.
+"""
+
+from __future__ import annotations
+
+from abc import abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from telegram import Update
+from telegram.ext import Application, BaseHandler, CallbackContext
+
+__all__ = ["CallbackDataRouter", "DispatchTable", "ReplyButtonRouter"]
+
+HandlerCallback = Callable[[Update, CallbackContext], Awaitable[Any]]
+
+
+class DispatchTable(BaseHandler[Update, CallbackContext]):
+    """Routes an update to ``routes[key(update)]``, or declines it if there is no entry."""
+
+    def __init__(self, routes: Mapping[str, HandlerCallback], block: bool = True) -> None:
+        super().__init__(self._unrouted, block=block)
+        self.routes: Dict[str, HandlerCallback] = dict(routes)
+
+    @staticmethod
+    async def _unrouted(update: Update, context: CallbackContext) -> None:  # pragma: no cover
+        raise RuntimeError("DispatchTable callbacks are resolved per update")
+
+    @abstractmethod
+    def route_key(self, update: Update) -> Optional[str]:
+        """Return the key ``update`` is routed by, or None if this table does not apply."""
+
+    def check_update(self, update: object) -> Optional[HandlerCallback]:
+        if not isinstance(update, Update):
+            return None
+        key = self.route_key(update)
+        return self.routes.get(key) if key is not None else None
+
+    async def handle_update(
+        self,
+        update: Update,
+        application: Application,
+        check_result: HandlerCallback,
+        context: CallbackContext,
+    ) -> Any:
+        self.collect_additional_context(context, update, application, check_result)
+        return await check_result(update, context)
+
+
+class CallbackDataRouter(DispatchTable):
+    """Dispatches callback queries on their exact ``callback_data``."""
+
+    def route_key(self, update: Update) -> Optional[str]:
+        query = update.callback_query
+        if query is None or not isinstance(query.data, str):
+            return None
+        return query.data
+
+
+class ReplyButtonRouter(DispatchTable):
+    """Dispatches new text messages on their exact text, i.e. reply-keyboard presses."""
+
+    def route_key(self, update: Update) -> Optional[str]:
+        message = update.message
+        if message is None:
+            return None
+        return message.text
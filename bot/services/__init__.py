@@ -1,10 +1,16 @@
 """Service layer abstractions for the bot."""
 
+from .broadcast import BroadcastEngine, BroadcastStats, TokenBucket
 from .notification_service import NotificationService, get_notification_service
+from .templates import NotificationTemplate
 from .user_service import UserService, get_user_service
 
 __all__ = [
+    "BroadcastEngine",
+    "BroadcastStats",
     "NotificationService",
+    "NotificationTemplate",
+    "TokenBucket",
     "UserService",
     "get_notification_service",
     "get_user_service",
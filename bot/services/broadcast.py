@@ -0,0 +1,416 @@
+"""Concurrent, rate-limited delivery of one message to many chats."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from ...config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# A chat id, or a ``(chat_id, text)`` pair for a personalised message.
+Recipient = Union[str, Tuple[str, str]]
+Recipients = Union[Iterable[Recipient], AsyncIterable[Recipient]]
+ProgressCallback = Callable[["BroadcastStats"], Union[Awaitable[Any], Any]]
+ResultCallback = Callable[[str, bool], Union[Awaitable[Any], Any]]
+UnreachableCallback = Callable[[str], Any]
+
+# BadRequest descriptions meaning the chat is gone for good rather than the request being wrong.
+_UNREACHABLE_DESCRIPTIONS = (
+    "chat not found",
+    "user not found",
+    "user is deactivated",
+    "peer_id_invalid",
+    "bot was blocked by the user",
+)
+
+
+def is_unreachable(exc: TelegramError) -> bool:
+    """Whether ``exc`` means the chat can never be messaged again (blocked bot, deleted account)."""
+
+    if isinstance(exc, Forbidden):
+        return True
+    if isinstance(exc, BadRequest):
+        description = exc.message.lower()
+        return any(text in description for text in _UNREACHABLE_DESCRIPTIONS)
+    return False
+
+
+async def prefetch(batches: AsyncIterable[List[Recipient]], depth: int = 2) -> AsyncIterator[Recipient]:
+    """Flatten ``batches`` while fetching up to ``depth`` batches ahead in the background."""
+
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=depth)
+    finished = object()
+
+    async def fill() -> None:
+        try:
+            async for batch in batches:
+                await queue.put(batch)
+        except Exception as exc:
+            await queue.put(exc)
+        else:
+            await queue.put(finished)
+
+    task = asyncio.create_task(fill())
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            for recipient in item:
+                yield recipient
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+class TokenBucket:
+    """Token bucket allowing ``rate`` acquisitions per second with bursts up to ``capacity``."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+
+        now = self._clock()
+        if now < self._paused_until:
+            return False
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds`` and restart from an empty bucket."""
+
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self._tokens = 0.0
+
+
+class PerChatLimiter:
+    """Enforces a minimum interval between messages to the same chat."""
+
+    def __init__(self, interval: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.interval = interval
+        self._clock = clock
+        self._next_allowed: Dict[str, float] = {}
+
+    def delay(self, chat_id: str) -> float:
+        """Reserve the next slot for ``chat_id`` and return how long to wait for it."""
+
+        now = self._clock()
+        slot = max(now, self._next_allowed.get(chat_id, 0.0))
+        self._next_allowed[chat_id] = slot + self.interval
+        if len(self._next_allowed) > 10_000:
+            self._next_allowed = {key: value for key, value in self._next_allowed.items() if value > now}
+        return slot - now
+
+    def defer(self, chat_id: str, seconds: float) -> None:
+        """Push the next slot for ``chat_id`` at least ``seconds`` into the future."""
+
+        self._next_allowed[chat_id] = max(self._next_allowed.get(chat_id, 0.0), self._clock() + seconds)
+
+    async def acquire(self, chat_id: str) -> None:
+        """Wait for the next slot for ``chat_id``."""
+
+        wait = self.delay(chat_id)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class BroadcastStats:
+    """Running counters for a broadcast."""
+
+    queued: int = 0
+    success: int = 0
+    failed: int = 0
+    retried: int = 0
+    unreachable: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> int:
+        return self.success + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Messages resolved per second so far."""
+
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "total_sent": self.done,
+            "success_count": self.success,
+            "fail_count": self.failed,
+            "retry_count": self.retried,
+            "pruned_count": self.unreachable,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "messages_per_second": round(self.throughput, 2),
+        }
+
+
+class BroadcastEngine:
+    """Sends one message to many chats with bounded concurrency and rate limits.
+
+    Sends draw from a global :class:`TokenBucket` and a :class:`PerChatLimiter`.
+    ``RetryAfter`` defers that chat for the requested time and re-queues it;
+    several of them within a second are treated as global flood control and
+    pause the whole bucket. Network errors are retried with exponential
+    backoff. Other Telegram errors fail the recipient; those meaning the chat
+    is gone for good (see :func:`is_unreachable`) are also reported to
+    ``on_unreachable`` so the recipient can be pruned.
+    """
+
+    #: ``RetryAfter`` responses within one second that trigger a global pause.
+    FLOOD_THRESHOLD = 3
+
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        concurrency: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        per_chat_interval: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        progress_interval: Optional[float] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        limiter: Optional[TokenBucket] = None,
+        chat_limiter: Optional[PerChatLimiter] = None,
+        on_unreachable: Optional[UnreachableCallback] = None,
+    ) -> None:
+        settings = get_settings()
+        self.bot = bot
+        self.concurrency = concurrency or settings.BROADCAST_CONCURRENCY
+        self.max_retries = settings.BROADCAST_MAX_RETRIES if max_retries is None else max_retries
+        self.progress_interval = progress_interval or settings.BROADCAST_PROGRESS_INTERVAL
+        self.on_progress = on_progress
+        self.limiter = limiter or TokenBucket(rate_limit or settings.BROADCAST_RATE_LIMIT)
+        self.chat_limiter = chat_limiter or PerChatLimiter(
+            settings.BROADCAST_PER_CHAT_INTERVAL if per_chat_interval is None else per_chat_interval
+        )
+        self.on_unreachable = on_unreachable
+        self._recent_floods: Deque[float] = deque(maxlen=self.FLOOD_THRESHOLD)
+
+    async def run(
+        self,
+        recipients: Recipients,
+        text: Optional[str],
+        parse_mode: Optional[str] = None,
+        on_result: Optional[ResultCallback] = None,
+    ) -> BroadcastStats:
+        """Deliver ``text`` to every chat id in ``recipients`` and return the final stats.
+
+        Recipients given as ``(chat_id, text)`` pairs get their own text instead.
+
+        ``on_result(chat_id, success)`` is called once per recipient when its
+        outcome is final.
+        """
+
+        stats = BroadcastStats()
+        # Retries go back onto the (unbounded) queue; read-ahead from
+        # ``recipients`` is bounded by ``slots`` instead, which are released
+        # once a recipient is resolved.
+        queue: "asyncio.Queue[Tuple[str, str, int]]" = asyncio.Queue()
+        slots = asyncio.Semaphore(self.concurrency * 4)
+
+        async def enqueue(recipient: Recipient) -> None:
+            await slots.acquire()
+            stats.queued += 1
+            if isinstance(recipient, tuple):
+                queue.put_nowait((*recipient, 0))
+            else:
+                queue.put_nowait((recipient, text, 0))
+
+        async def produce() -> None:
+            if isinstance(recipients, AsyncIterable):
+                async for recipient in recipients:
+                    await enqueue(recipient)
+            else:
+                for recipient in recipients:
+                    await enqueue(recipient)
+
+        async def work() -> None:
+            while True:
+                chat_id, body, attempt = await queue.get()
+                try:
+                    try:
+                        outcome = await self._deliver(queue, stats, chat_id, body, attempt, parse_mode)
+                    except Exception:  # pragma: no cover - keep the worker alive
+                        logger.exception("Unexpected error broadcasting to %s", chat_id)
+                        stats.failed += 1
+                        outcome = False
+                    if outcome is not None:
+                        slots.release()
+                        if on_result is not None:
+                            await self._notify_result(on_result, chat_id, outcome)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        reporter = asyncio.create_task(self._report(stats))
+        try:
+            await produce()
+            await queue.join()
+        finally:
+            for task in (*workers, reporter):
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+            stats.finished_at = time.monotonic()
+
+        await self._emit_progress(stats)
+        return stats
+
+    async def _deliver(
+        self,
+        queue: "asyncio.Queue[Tuple[str, str, int]]",
+        stats: BroadcastStats,
+        chat_id: str,
+        text: str,
+        attempt: int,
+        parse_mode: Optional[str],
+    ) -> Optional[bool]:
+        """Attempt one send; return the final outcome, or None if the recipient was re-queued."""
+
+        await self.chat_limiter.acquire(chat_id)
+        await self.limiter.acquire()
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+        except RetryAfter as exc:
+            retry_after = exc.retry_after
+            delay = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+            self._on_flood(chat_id, delay)
+            return None if self._retry(queue, stats, chat_id, text, attempt, exc) else False
+        except NetworkError as exc:
+            await asyncio.sleep(min(30.0, 0.5 * 2**attempt))
+            return None if self._retry(queue, stats, chat_id, text, attempt, exc) else False
+        except TelegramError as exc:
+            stats.failed += 1
+            if is_unreachable(exc):
+                stats.unreachable += 1
+                logger.info("Broadcast recipient %s is unreachable: %s", chat_id, exc)
+                if self.on_unreachable is not None:
+                    self.on_unreachable(chat_id)
+            else:
+                logger.warning("Broadcast to %s failed: %s", chat_id, exc)
+            return False
+        stats.success += 1
+        return True
+
+    async def _notify_result(self, on_result: ResultCallback, chat_id: str, outcome: bool) -> None:
+        try:
+            result = on_result(chat_id, outcome)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            logger.exception("Broadcast result callback failed for %s", chat_id)
+
+    def _on_flood(self, chat_id: str, delay: float) -> None:
+        self.chat_limiter.defer(chat_id, delay)
+        now = time.monotonic()
+        self._recent_floods.append(now)
+        if len(self._recent_floods) == self.FLOOD_THRESHOLD and now - self._recent_floods[0] < 1.0:
+            logger.warning("Flood control hit, pausing broadcast for %.1fs", delay)
+            self.limiter.pause(delay)
+            self._recent_floods.clear()
+
+    def _retry(
+        self,
+        queue: "asyncio.Queue[Tuple[str, str, int]]",
+        stats: BroadcastStats,
+        chat_id: str,
+        text: str,
+        attempt: int,
+        exc: TelegramError,
+    ) -> bool:
+        """Re-queue ``chat_id`` unless it is out of retries; return whether it was re-queued."""
+
+        if attempt >= self.max_retries:
+            stats.failed += 1
+            logger.warning("Broadcast to %s failed after %s retries: %s", chat_id, attempt, exc)
+            return False
+        stats.retried += 1
+        queue.put_nowait((chat_id, text, attempt + 1))
+        return True
+
+    async def _report(self, stats: BroadcastStats) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self._emit_progress(stats)
+
+    async def _emit_progress(self, stats: BroadcastStats) -> None:
+        logger.info(
+            "Broadcast progress: %s/%s done (%s ok, %s failed, %s retried), %.1f msg/s",
+            stats.done,
+            stats.queued,
+            stats.success,
+            stats.failed,
+            stats.retried,
+            stats.throughput,
+        )
+        if self.on_progress is not None:
+            result = self.on_progress(stats)
+            if asyncio.iscoroutine(result):
+                await result
@@ -0,0 +1,348 @@
+"""Persistent, resumable broadcast jobs.
+
+A job is sent by one process at a time: :func:`run_broadcast_job` claims it
+with a lease (``owner``, ``lease_until``) in a single conditional UPDATE,
+renews the lease while sending and stops if another process took it over.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Deque, Dict, List, Mapping, Optional, Set, TypeVar
+
+from sqlalchemy import Select, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from ...config.database import get_async_db
+from ...config.settings import get_settings
+from ...models import BroadcastDelivery, BroadcastJob
+from ..utils.database import iter_subscriber_pages, preference_store, unreachable_recipients
+from .broadcast import BroadcastEngine, Recipient, prefetch
+from .templates import NotificationTemplate
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "LeaseLost",
+    "create_broadcast_job",
+    "get_unfinished_job_ids",
+    "run_broadcast_job",
+]
+
+
+T = TypeVar("T")
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired and another process claimed it."""
+
+
+def _owner() -> str:
+    # Per call rather than at import: forked shard workers must not share it.
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable(now: datetime) -> Any:
+    # Running jobs without a lease were started before leases existed.
+    return or_(
+        BroadcastJob.status == "pending",
+        (BroadcastJob.status == "running") & (BroadcastJob.lease_until.is_(None) | (BroadcastJob.lease_until < now)),
+    )
+
+
+async def _claim(job_id: str, owner: str, lease: float) -> bool:
+    """Atomically take job ``job_id`` for ``owner`` if it is pending or its lease expired."""
+
+    now = datetime.utcnow()
+    async with get_async_db() as db:
+        result = await db.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job_id, _claimable(now))
+            .values(status="running", owner=owner, lease_until=now + timedelta(seconds=lease))
+        )
+        await db.commit()
+    return result.rowcount == 1
+
+
+class _Page:
+    __slots__ = ("last_id", "pending")
+
+    def __init__(self, last_id: str, pending: int) -> None:
+        self.last_id = last_id
+        self.pending = pending
+
+
+class _JobCheckpointer:
+    """Tracks per-recipient outcomes and the resumable keyset position of a job.
+
+    Pages are resolved out of order by the engine's workers; the checkpoint only
+    advances past a page once it and every page before it are fully resolved.
+    Outcomes and the checkpoint are written together, in bulk, every
+    ``flush_interval`` seconds or ``flush_size`` outcomes. Each write also
+    renews ``owner``'s lease on the job, and :meth:`keep_leased` renews it
+    while nothing is being sent.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        cursor: Optional[str],
+        flush_interval: float,
+        flush_size: int,
+        owner: str,
+        lease: float,
+    ) -> None:
+        self.job_id = job_id
+        self.cursor = cursor
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.owner = owner
+        self.lease = lease
+        self._lost = asyncio.Event()
+        self._pages: Deque[_Page] = deque()
+        self._page_of: Dict[str, _Page] = {}
+        self._user_ids: Dict[str, str] = {}
+        self._outcomes: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def add_page(self, rows: List[Any], skip: Set[str]) -> List[Any]:
+        """Register a page and return the rows that still need a send."""
+
+        todo = [row for row in rows if row.telegram_id not in skip]
+        page = _Page(rows[-1].id, len(todo))
+        self._pages.append(page)
+        for row in todo:
+            self._page_of[row.telegram_id] = page
+            self._user_ids[row.telegram_id] = row.id
+        self._advance()
+        return todo
+
+    async def record(self, telegram_id: str, success: bool) -> None:
+        page = self._page_of.pop(telegram_id)
+        page.pending -= 1
+        self._outcomes.append(
+            {
+                "job_id": self.job_id,
+                "telegram_id": telegram_id,
+                "user_id": self._user_ids.pop(telegram_id),
+                "success": success,
+            }
+        )
+        self._advance()
+        if (
+            len(self._outcomes) >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+
+    def _advance(self) -> None:
+        while self._pages and self._pages[0].pending == 0:
+            self.cursor = self._pages.popleft().last_id
+
+    async def flush(self, status: Optional[str] = None, renew: bool = False, release: bool = False) -> None:
+        """Persist buffered outcomes and the current checkpoint in one transaction, renewing the lease.
+
+        ``release`` ends the lease instead, so another process can resume the
+        job at once. Raises :class:`LeaseLost` when finishing (``status``
+        given) a job another process has taken over; otherwise the loss is
+        reported by :meth:`keep_leased`.
+        """
+
+        async with self._lock:
+            if self._lost.is_set():
+                if status is not None:
+                    raise LeaseLost(f"Broadcast {self.job_id} was taken over by another process")
+                return
+            if status is None and not self._outcomes and not (renew or release):
+                return
+            outcomes, self._outcomes = self._outcomes, []
+            self._last_flush = time.monotonic()
+            successes = sum(1 for outcome in outcomes if outcome["success"])
+            now = datetime.utcnow()
+            values: Dict[str, Any] = {
+                "cursor": self.cursor,
+                "success_count": BroadcastJob.success_count + successes,
+                "fail_count": BroadcastJob.fail_count + (len(outcomes) - successes),
+                "updated_at": now,
+                "lease_until": now if release else now + timedelta(seconds=self.lease),
+            }
+            if status is not None:
+                values["status"] = status
+                if status == "completed":
+                    values["finished_at"] = now
+                    values["lease_until"] = None
+
+            try:
+                async with get_async_db() as db:
+                    result = await db.execute(
+                        update(BroadcastJob)
+                        .where(BroadcastJob.id == self.job_id, BroadcastJob.owner == self.owner)
+                        .values(**values)
+                    )
+                    if result.rowcount != 1:
+                        await db.rollback()
+                        self._lost.set()
+                        logger.warning("Lost the lease on broadcast %s; another process resumes it", self.job_id)
+                        if status is not None:
+                            raise LeaseLost(f"Broadcast {self.job_id} was taken over by another process")
+                        return
+                    if outcomes:
+                        await db.execute(insert(BroadcastDelivery), outcomes)
+                    await db.commit()
+            except SQLAlchemyError:
+                if status is not None:
+                    raise
+                # Keep the outcomes for the next flush rather than stalling the send.
+                logger.exception("Failed to checkpoint broadcast %s", self.job_id)
+                self._outcomes = outcomes + self._outcomes
+
+    async def keep_leased(self) -> None:
+        """Renew the lease every third of its length; raise :class:`LeaseLost` once it is lost."""
+
+        while not self._lost.is_set():
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.lease / 3)
+            except asyncio.TimeoutError:
+                await self.flush(renew=True)
+        raise LeaseLost(f"Broadcast {self.job_id} was taken over by another process")
+
+
+async def _while_leased(checkpointer: _JobCheckpointer, sending: Awaitable[T]) -> T:
+    """Await ``sending`` while keeping the job leased; cancel it if the lease is lost."""
+
+    send = asyncio.ensure_future(sending)
+    renew = asyncio.ensure_future(checkpointer.keep_leased())
+    try:
+        await asyncio.wait((send, renew), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not send.done():
+            send.cancel()
+        renew.cancel()
+        await asyncio.gather(send, renew, return_exceptions=True)
+    if not renew.cancelled():
+        renew.result()  # Raises LeaseLost.
+    return send.result()
+
+
+async def create_broadcast_job(
+    message: str, parse_mode: Optional[str] = None, variants: Optional[Mapping[str, str]] = None
+) -> str:
+    """Persist a new pending broadcast job and return its id.
+
+    With ``variants`` (possibly empty) the job is personalised: ``message`` and
+    the per-language ``variants`` are rendered as a :class:`NotificationTemplate`
+    for every recipient.
+    """
+
+    if variants is not None:
+        template = NotificationTemplate(message, variants, parse_mode)
+        if template.extra_fields:
+            raise ValueError(f"Broadcast templates cannot use non-user placeholders {sorted(template.extra_fields)}")
+        variants = dict(variants)
+
+    job_id = str(uuid.uuid4())
+    async with get_async_db() as db:
+        db.add(
+            BroadcastJob(id=job_id, message=message, parse_mode=parse_mode, variants=variants, status="pending")
+        )
+        await db.commit()
+    return job_id
+
+
+async def get_unfinished_job_ids() -> List[str]:
+    """Return ids of unfinished jobs no live process holds (pending, or their lease expired), oldest first."""
+
+    async with get_async_db() as db:
+        result = await db.execute(
+            select(BroadcastJob.id).where(_claimable(datetime.utcnow())).order_by(BroadcastJob.created_at)
+        )
+        return list(result.scalars())
+
+
+def _delivered_after_query(job_id: str, cursor: Optional[str]) -> Select:
+    # An index-only scan of idx_broadcast_deliveries_job_user_telegram (or the primary key).
+    stmt = select(BroadcastDelivery.telegram_id).where(BroadcastDelivery.job_id == job_id)
+    if cursor is not None:
+        stmt = stmt.where(BroadcastDelivery.user_id > cursor)
+    return stmt
+
+
+async def _delivered_after(job_id: str, cursor: Optional[str]) -> Set[str]:
+    """Telegram ids past the checkpoint that already have a recorded outcome."""
+
+    async with get_async_db() as db:
+        return set((await db.execute(_delivered_after_query(job_id, cursor))).scalars())
+
+
+async def run_broadcast_job(engine: BroadcastEngine, job_id: str) -> Dict[str, Any]:
+    """Run (or resume) job ``job_id`` on ``engine`` from its last checkpoint.
+
+    A crash or cancellation loses at most the outcomes buffered since the last
+    flush; those recipients are sent again on resume. A job leased by another
+    live process is left to it and reported with ``"claimed": False``; if
+    this process loses the lease while sending it stops with
+    :class:`LeaseLost`.
+    """
+
+    settings = get_settings()
+    owner = _owner()
+    claimed = await _claim(job_id, owner, settings.BROADCAST_LEASE_SECONDS)
+    # Read after the claim: until then the previous owner may still move the checkpoint.
+    async with get_async_db() as db:
+        job = await db.get(BroadcastJob, job_id)
+    if job is None:
+        raise LookupError(f"Unknown broadcast job {job_id}")
+    if not claimed:
+        if job.status == "completed":
+            return {"job_id": job_id, "status": job.status, "total_sent": 0}
+        logger.info("Broadcast %s is being sent by another process; skipping it", job_id)
+        return {"job_id": job_id, "status": job.status, "claimed": False, "total_sent": 0}
+
+    # Recipients are read from the database, so pending notification toggles must
+    # land first: this process's, then those other processes shared in Redis.
+    await preference_store.flush()
+    await preference_store.drain_shared()
+    resumed_from = job.cursor
+    skip = await _delivered_after(job_id, resumed_from)
+    checkpointer = _JobCheckpointer(
+        job_id,
+        resumed_from,
+        flush_interval=settings.BROADCAST_CHECKPOINT_INTERVAL,
+        flush_size=settings.BROADCAST_CHECKPOINT_SIZE,
+        owner=owner,
+        lease=settings.BROADCAST_LEASE_SECONDS,
+    )
+
+    # Personalised jobs render each page as it is read, while the previous one is being sent.
+    template = NotificationTemplate(job.message, job.variants, job.parse_mode) if job.variants is not None else None
+
+    async def pages() -> AsyncIterator[List[Recipient]]:
+        columns = template.columns if template is not None else ()
+        async for rows in iter_subscriber_pages(settings.BROADCAST_BATCH_SIZE, resumed_from, columns):
+            # Opt-outs recorded since the drain are not in the database yet.
+            opted_out = await preference_store.opted_out([row.telegram_id for row in rows])
+            todo = checkpointer.add_page(rows, skip | opted_out if opted_out else skip)
+            yield template.render_rows(todo) if template is not None else [row.telegram_id for row in todo]
+
+    if resumed_from is not None or skip:
+        logger.info("Resuming broadcast %s after %s (%s already delivered)", job_id, resumed_from, len(skip))
+    try:
+        stats = await _while_leased(
+            checkpointer,
+            engine.run(prefetch(pages()), job.message, job.parse_mode, on_result=checkpointer.record),
+        )
+    except BaseException:
+        await asyncio.shield(checkpointer.flush(release=True))
+        raise
+    await checkpointer.flush(status="completed")
+    await unreachable_recipients.flush()
+
+    return {"job_id": job_id, "status": "completed", "resumed_from": resumed_from, **stats.as_dict()}
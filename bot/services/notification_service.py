@@ -3,90 +3,137 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 from telegram import Bot
-from telegram.error import TelegramError
 
-from ...config.database import get_db
-from ...models import User
+from ...config.settings import get_settings
+from ..utils.database import mark_unreachable
+from .broadcast import BroadcastEngine, PerChatLimiter, ProgressCallback, TokenBucket
+from .broadcast_jobs import create_broadcast_job, get_unfinished_job_ids, run_broadcast_job
+from .outbox import TRANSACTIONAL, MemoryOutbox, OutboundMessage, OutboxDispatcher, RedisOutbox, create_outbox
+from .templates import MATCH_NOTIFICATION, REWARD_NOTIFICATION, WELCOME_NOTIFICATION, NotificationTemplate
 
 logger = logging.getLogger(__name__)
 
 
 class NotificationService:
-    """Service responsible for sending notifications to Telegram users."""
+    """Service responsible for sending notifications to Telegram users.
 
-    def __init__(self, bot: Bot):
-        self.bot = bot
-
-    async def send_notification(self, user_id: str, message: str, parse_mode: str | None = None) -> bool:
-        """Send notification to a single user."""
+    Individual notifications are queued in an outbox and delivered by
+    :attr:`dispatcher`; broadcasts and the dispatcher share one global and one
+    per-chat rate limiter, so bursts of either do not push the other into
+    Telegram flood control.
+    """
 
-        try:
-            await self.bot.send_message(chat_id=user_id, text=message, parse_mode=parse_mode)
-            return True
-        except TelegramError as exc:  # pragma: no cover - network errors
-            logger.error("Failed to send notification to %s: %s", user_id, exc)
-            return False
+    def __init__(self, bot: Bot, outbox: RedisOutbox | MemoryOutbox | None = None):
+        settings = get_settings()
+        self.bot = bot
+        self.limiter = TokenBucket(settings.BROADCAST_RATE_LIMIT)
+        self.chat_limiter = PerChatLimiter(settings.BROADCAST_PER_CHAT_INTERVAL)
+        self.outbox = outbox or create_outbox()
+        self.dispatcher = OutboxDispatcher(
+            bot,
+            self.outbox,
+            limiter=self.limiter,
+            chat_limiter=self.chat_limiter,
+            on_unreachable=mark_unreachable,
+        )
 
-    async def broadcast_notification(self, message: str, parse_mode: str | None = None) -> Dict[str, int]:
-        """Broadcast notification to all subscribed users."""
+    async def send_notification(
+        self,
+        user_id: str,
+        message: str,
+        parse_mode: str | None = None,
+        priority: str = TRANSACTIONAL,
+    ) -> bool:
+        """Queue a notification to a single user; the dispatcher sends it.
+
+        Returns True once the message is queued. Raises :class:`ValueError`
+        for a ``priority`` not in :data:`~.outbox.PRIORITIES`.
+        """
+
+        await self.outbox.push(OutboundMessage(str(user_id), message, parse_mode, priority))
+        self.dispatcher.notify()
+        return True
+
+    async def broadcast_notification(
+        self,
+        message: str,
+        parse_mode: str | None = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Broadcast notification to all subscribed users.
+
+        The broadcast is persisted as a job first, so it can be picked up with
+        :meth:`resume_broadcast` if the process stops halfway through.
+        """
+
+        job_id = await create_broadcast_job(message, parse_mode)
+        return await self.resume_broadcast(job_id, on_progress=on_progress)
+
+    async def broadcast_template(
+        self,
+        template: NotificationTemplate,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Broadcast ``template``, rendered per subscriber in their language, as a resumable job."""
+
+        job_id = await create_broadcast_job(template.default, template.parse_mode, template.variants)
+        return await self.resume_broadcast(job_id, on_progress=on_progress)
+
+    async def resume_broadcast(
+        self, job_id: str, on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Continue broadcast job ``job_id`` from its last checkpoint."""
+
+        engine = BroadcastEngine(
+            self.bot,
+            on_progress=on_progress,
+            limiter=self.limiter,
+            chat_limiter=self.chat_limiter,
+            on_unreachable=mark_unreachable,
+        )
+        return await run_broadcast_job(engine, job_id)
 
-        with get_db() as db:
-            recipients = db.query(User).filter(User.notifications_enabled.is_(True)).all()
+    async def resume_unfinished_broadcasts(self) -> List[Dict[str, Any]]:
+        """Resume every job left unfinished by a previous process, oldest first."""
 
-        success_count = 0
-        fail_count = 0
+        return [await self.resume_broadcast(job_id) for job_id in await get_unfinished_job_ids()]
 
-        for user in recipients:
-            if await self.send_notification(user.telegram_id, message, parse_mode):
-                success_count += 1
-            else:
-                fail_count += 1
+    async def send_template(
+        self,
+        user_id: str,
+        template: NotificationTemplate,
+        language_code: str | None = None,
+        priority: str = TRANSACTIONAL,
+        **fields: Any,
+    ) -> bool:
+        """Queue ``template`` rendered in ``language_code`` with ``fields`` to a single user."""
 
-        return {
-            "total_sent": len(recipients),
-            "success_count": success_count,
-            "fail_count": fail_count,
-        }
+        message = template.render(language_code, **fields)
+        return await self.send_notification(user_id, message, template.parse_mode, priority)
 
-    async def send_welcome_notification(self, user_id: str) -> bool:
+    async def send_welcome_notification(self, user_id: str, language_code: str | None = None) -> bool:
         """Send welcome notification to new user."""
 
-        message = (
-            "👋 Привет! Добро пожаловать в SoulMine!\n\n"
-            "Мы рады, что вы с нами. Вот что вы можете сделать:\n"
-            "• 📱 Откройте приложение и настройте профиль\n"
-            "• 🤝 Начните знакомства с другими пользователями\n"
-            "• 💰 Получайте $LOVE токены за активность\n"
-            "• 🎁 Получайте награды и достижения\n\n"
-            "Удачи в поиске пары!"
-        )
-
-        return await self.send_notification(user_id, message)
+        return await self.send_template(user_id, WELCOME_NOTIFICATION, language_code)
 
-    async def send_reward_notification(self, user_id: str, reward_amount: float, reward_type: str) -> bool:
+    async def send_reward_notification(
+        self, user_id: str, reward_amount: float, reward_type: str, language_code: str | None = None
+    ) -> bool:
         """Send reward notification to user."""
 
-        message = (
-            f"🎉 Поздравляем! Вы получили {reward_amount} {reward_type}!\n\n"
-            "Спасибо за вашу активность на платформе.\n"
-            "Продолжайте в том же духе!"
+        return await self.send_template(
+            user_id, REWARD_NOTIFICATION, language_code, amount=reward_amount, reward_type=reward_type
         )
 
-        return await self.send_notification(user_id, message)
-
-    async def send_match_notification(self, user_id: str, match_user_id: str) -> bool:
+    async def send_match_notification(
+        self, user_id: str, match_user_id: str, language_code: str | None = None
+    ) -> bool:
         """Send match notification to user."""
 
-        message = (
-            "💖 У вас есть новый матч!\n\n"
-            "Кто-то из пользователей отметил вас как интересного собеседника.\n"
-            "Посмотрите профиль и начните общение!"
-        )
-
-        return await self.send_notification(user_id, message)
+        return await self.send_template(user_id, MATCH_NOTIFICATION, language_code)
 
 
 _notification_service: NotificationService | None = None
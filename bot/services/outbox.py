@@ -0,0 +1,320 @@
+"""Persistent, priority-aware queue for individual outbound messages.
+
+:class:`NotificationService` sends go through an outbox instead of calling
+``send_message`` inline. :class:`OutboxDispatcher` drains it, transactional
+messages before marketing ones, through the same global and per-chat rate
+limiters as broadcasts. Transient failures are retried with exponential
+backoff; permanent ones (e.g. the user blocked the bot) are dead-lettered.
+
+The Redis outbox keeps one list per priority plus a sorted set of delayed
+retries per priority, and a capped ``outbox:dead`` list. Messages queued
+while Redis is unreachable go to an in-process fallback queue. A message
+being sent when the process dies is not redelivered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+from telegram import Bot
+from telegram.error import NetworkError, RetryAfter, TelegramError
+
+from ...config.redis import get_redis
+from ...config.settings import get_settings
+from .broadcast import PerChatLimiter, TokenBucket, UnreachableCallback, is_unreachable
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "MARKETING",
+    "MemoryOutbox",
+    "OutboundMessage",
+    "OutboxDispatcher",
+    "RedisOutbox",
+    "TRANSACTIONAL",
+    "create_outbox",
+]
+
+TRANSACTIONAL = "transactional"
+MARKETING = "marketing"
+#: Highest priority first.
+PRIORITIES = (TRANSACTIONAL, MARKETING)
+
+DEAD_LETTER_LIMIT = 10_000
+
+
+@dataclass
+class OutboundMessage:
+    """A queued ``sendMessage`` call."""
+
+    chat_id: str
+    text: str
+    parse_mode: Optional[str] = None
+    priority: str = TRANSACTIONAL
+    attempt: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    error: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        # An unknown priority has no queue: it would fail in memory and never be popped from Redis.
+        if self.priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {self.priority!r}; expected one of {PRIORITIES}")
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, payload: str) -> "OutboundMessage":
+        return cls(**json.loads(payload))
+
+
+class MemoryOutbox:
+    """In-process outbox; also the fallback of :class:`RedisOutbox`."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._ready: Dict[str, Deque[OutboundMessage]] = {priority: deque() for priority in PRIORITIES}
+        self._delayed: Dict[str, List[Tuple[float, int, OutboundMessage]]] = {priority: [] for priority in PRIORITIES}
+        self._sequence = itertools.count()
+        self.dead: Deque[OutboundMessage] = deque(maxlen=DEAD_LETTER_LIMIT)
+
+    async def push(self, message: OutboundMessage) -> None:
+        self._ready[message.priority].append(message)
+
+    async def pop(self) -> Optional[OutboundMessage]:
+        now = self._clock()
+        for priority in PRIORITIES:
+            delayed = self._delayed[priority]
+            while delayed and delayed[0][0] <= now:
+                self._ready[priority].append(heapq.heappop(delayed)[2])
+        for priority in PRIORITIES:
+            if self._ready[priority]:
+                return self._ready[priority].popleft()
+        return None
+
+    async def defer(self, message: OutboundMessage, delay: float) -> None:
+        heapq.heappush(self._delayed[message.priority], (self._clock() + delay, next(self._sequence), message))
+
+    async def dead_letter(self, message: OutboundMessage) -> None:
+        self.dead.append(message)
+
+    async def sizes(self) -> Dict[str, int]:
+        sizes = {priority: len(queue) for priority, queue in self._ready.items()}
+        sizes["delayed"] = sum(len(delayed) for delayed in self._delayed.values())
+        sizes["dead"] = len(self.dead)
+        return sizes
+
+
+# KEYS: (ready list, delayed zset) per priority, highest first. ARGV[1]: now.
+# Moves due retries back onto their ready lists, then pops the first message found.
+_POP = """
+for i = 1, #KEYS, 2 do
+  local due = redis.call('ZRANGEBYSCORE', KEYS[i + 1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+  for _, item in ipairs(due) do
+    redis.call('ZREM', KEYS[i + 1], item)
+    redis.call('RPUSH', KEYS[i], item)
+  end
+end
+for i = 1, #KEYS, 2 do
+  local item = redis.call('LPOP', KEYS[i])
+  if item then
+    return item
+  end
+end
+return false
+"""
+
+
+class RedisOutbox:
+    """Outbox persisted in Redis, falling back to memory while Redis is unavailable."""
+
+    def __init__(self, prefix: str = "outbox") -> None:
+        self.prefix = prefix
+        self.fallback = MemoryOutbox()
+        self._keys = [
+            key for priority in PRIORITIES for key in (f"{prefix}:{priority}", f"{prefix}:delayed:{priority}")
+        ]
+        self._script: Optional[AsyncScript] = None
+        self._unavailable = False
+
+    async def push(self, message: OutboundMessage) -> None:
+        try:
+            await get_redis().rpush(f"{self.prefix}:{message.priority}", message.dumps())
+        except RedisError as exc:
+            logger.warning("Queueing message %s in memory, Redis unavailable: %s", message.id, exc)
+            await self.fallback.push(message)
+
+    async def pop(self) -> Optional[OutboundMessage]:
+        message = await self.fallback.pop()
+        if message is not None:
+            return message
+        client = get_redis()
+        if self._script is None:
+            self._script = client.register_script(_POP)
+        try:
+            payload = await self._script(keys=self._keys, args=[time.time()], client=client)
+        except RedisError as exc:
+            # Idle workers poll constantly; only log when Redis goes away.
+            if not self._unavailable:
+                logger.warning("Failed to read the outbox from Redis: %s", exc)
+            self._unavailable = True
+            return None
+        self._unavailable = False
+        return OutboundMessage.loads(payload) if payload else None
+
+    async def defer(self, message: OutboundMessage, delay: float) -> None:
+        try:
+            await get_redis().zadd(
+                f"{self.prefix}:delayed:{message.priority}", {message.dumps(): time.time() + delay}
+            )
+        except RedisError as exc:
+            logger.warning("Deferring message %s in memory, Redis unavailable: %s", message.id, exc)
+            await self.fallback.defer(message, delay)
+
+    async def dead_letter(self, message: OutboundMessage) -> None:
+        key = f"{self.prefix}:dead"
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                await pipe.lpush(key, message.dumps()).ltrim(key, 0, DEAD_LETTER_LIMIT - 1).execute()
+        except RedisError as exc:
+            logger.warning("Dead-lettering message %s in memory, Redis unavailable: %s", message.id, exc)
+            await self.fallback.dead_letter(message)
+
+    async def sizes(self) -> Dict[str, int]:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for priority in PRIORITIES:
+                    pipe.llen(f"{self.prefix}:{priority}")
+                for priority in PRIORITIES:
+                    pipe.zcard(f"{self.prefix}:delayed:{priority}")
+                pipe.llen(f"{self.prefix}:dead")
+                counts = await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Failed to read outbox sizes from Redis: %s", exc)
+            return await self.fallback.sizes()
+        sizes = dict(zip(PRIORITIES, counts))
+        sizes["delayed"] = sum(counts[len(PRIORITIES):-1])
+        sizes["dead"] = counts[-1]
+        return sizes
+
+
+def create_outbox() -> "RedisOutbox | MemoryOutbox":
+    """Return the outbox selected by ``OUTBOX_BACKEND``."""
+
+    return RedisOutbox() if get_settings().OUTBOX_BACKEND == "redis" else MemoryOutbox()
+
+
+class OutboxDispatcher:
+    """Delivers outbox messages with ``concurrency`` workers under shared rate limits."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        outbox: "RedisOutbox | MemoryOutbox",
+        *,
+        limiter: TokenBucket,
+        chat_limiter: PerChatLimiter,
+        concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        on_unreachable: Optional[UnreachableCallback] = None,
+    ) -> None:
+        settings = get_settings()
+        self.bot = bot
+        self.outbox = outbox
+        self.limiter = limiter
+        self.chat_limiter = chat_limiter
+        self.concurrency = concurrency or settings.OUTBOX_CONCURRENCY
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        self.retry_base = settings.OUTBOX_RETRY_BASE if retry_base is None else retry_base
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL
+        self.on_unreachable = on_unreachable
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._workers: List[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a message was queued."""
+
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if not self._workers:
+            self._stopping = False
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let workers finish the message in hand, then stop them."""
+
+        self._stopping = True
+        self._wakeup.set()
+        if self._workers:
+            _, pending = await asyncio.wait(self._workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            message = await self.outbox.pop()
+            if message is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._deliver(message)
+            except Exception:  # pragma: no cover - keep the worker alive
+                logger.exception("Unexpected error delivering outbox message %s", message.id)
+
+    async def _deliver(self, message: OutboundMessage) -> None:
+        await self.chat_limiter.acquire(message.chat_id)
+        await self.limiter.acquire()
+        try:
+            await self.bot.send_message(chat_id=message.chat_id, text=message.text, parse_mode=message.parse_mode)
+        except RetryAfter as exc:
+            retry_after = exc.retry_after
+            delay = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+            self.chat_limiter.defer(message.chat_id, delay)
+            await self._retry(message, exc, delay)
+        except NetworkError as exc:
+            await self._retry(message, exc, min(300.0, self.retry_base * 2**message.attempt))
+        except TelegramError as exc:
+            # Forbidden (bot blocked), BadRequest (chat not found, bad markup), ...
+            if is_unreachable(exc) and self.on_unreachable is not None:
+                self.on_unreachable(message.chat_id)
+            await self._dead_letter(message, exc)
+        else:
+            self.sent += 1
+
+    async def _retry(self, message: OutboundMessage, exc: TelegramError, delay: float) -> None:
+        message.attempt += 1
+        if message.attempt >= self.max_attempts:
+            await self._dead_letter(message, exc)
+            return
+        self.retried += 1
+        await self.outbox.defer(message, delay)
+
+    async def _dead_letter(self, message: OutboundMessage, exc: TelegramError) -> None:
+        message.error = f"{type(exc).__name__}: {exc}"
+        self.dead_lettered += 1
+        logger.warning("Dead-lettered message %s to %s: %s", message.id, message.chat_id, message.error)
+        await self.outbox.dead_letter(message)
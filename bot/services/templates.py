@@ -0,0 +1,236 @@
+"""Personalised, per-language notification templates.
+
+A :class:`NotificationTemplate` holds one ``str.format`` text per language
+(keyed by the Telegram ``language_code``, e.g. ``"en"``; ``"en-GB"`` falls
+back to ``"en"``, unknown languages to the default text). Texts are parsed
+once, when the template is built, into their literal pieces and functions
+reading the user columns they need; a broadcast selects only those columns and
+renders each page of recipients in one pass while the previous page is being
+sent.
+
+User placeholders are ``{first_name}``, ``{username}``, ``{points}`` and
+``{level}`` (the loyalty level name from :func:`get_user_level`). Any other
+placeholder must be passed as a keyword when rendering a single message.
+User-supplied values are escaped for the template's parse mode.
+"""
+
+from __future__ import annotations
+
+import html
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
+
+from ..utils.helpers import get_user_level
+
+__all__ = [
+    "MATCH_NOTIFICATION",
+    "REWARD_NOTIFICATION",
+    "USER_PLACEHOLDERS",
+    "WELCOME_NOTIFICATION",
+    "NotificationTemplate",
+]
+
+_level_name = lru_cache(maxsize=None)(get_user_level)
+
+#: Placeholder -> (``User`` column it is read from, function reading its value from ``row``).
+USER_PLACEHOLDERS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "first_name": ("first_name", lambda row: row.first_name or ""),
+    "username": ("username", lambda row: row.username or ""),
+    "points": ("total_points", lambda row: row.total_points or 0),
+    "level": ("loyalty_level", lambda row: _level_name(row.loyalty_level or 1)),
+}
+# Free text typed by users, escaped for the template's parse mode.
+_ESCAPED = frozenset({"first_name", "username"})
+_CONVERSIONS: Dict[str, Callable[[Any], str]] = {"s": str, "r": repr, "a": ascii}
+
+Renderer = Callable[[Any, Mapping[str, Any]], str]
+
+
+def _escaper(parse_mode: Optional[str]) -> Optional[Callable[[str], str]]:
+    if parse_mode == ParseMode.MARKDOWN:
+        return escape_markdown
+    if parse_mode == ParseMode.MARKDOWN_V2:
+        return lambda text: escape_markdown(text, version=2)
+    if parse_mode == ParseMode.HTML:
+        return html.escape
+    return None
+
+
+def _placeholder(
+    name: str, conversion: Optional[str], spec: str, escape: Optional[Callable[[str], str]]
+) -> Renderer:
+    """Return a function rendering placeholder ``name`` from ``row`` (user placeholders) or ``fields``."""
+
+    if name in USER_PLACEHOLDERS:
+        read_user = USER_PLACEHOLDERS[name][1]
+        if escape is not None and name in _ESCAPED:
+            read: Renderer = lambda row, fields: escape(read_user(row))
+        else:
+            read = lambda row, fields: read_user(row)
+    else:
+        read = lambda row, fields: fields[name]
+    if conversion:
+        convert = _CONVERSIONS[conversion]
+        return lambda row, fields: format(convert(read(row, fields)), spec)
+    return lambda row, fields: format(read(row, fields), spec)
+
+
+def _compile(text: str, escape: Optional[Callable[[str], str]]) -> Tuple[Renderer, FrozenSet[str]]:
+    """Compile ``text`` into a function of ``(row, fields)`` and return it with its placeholders.
+
+    ``text`` is parsed once into literal pieces and placeholder functions
+    reading ``row`` (user placeholders) or ``fields`` (any other); rendering a
+    recipient joins them. Raises :class:`ValueError` for placeholders other
+    than plain names with an optional ``!s``/``!r``/``!a`` and format spec.
+    """
+
+    pieces: List[Union[str, Renderer]] = []
+    names = set()
+    for literal, field_name, spec, conversion in Formatter().parse(text):
+        if literal:
+            pieces.append(literal)
+        if field_name is None:
+            continue
+        if (
+            not field_name.isidentifier()
+            or (conversion is not None and conversion not in _CONVERSIONS)
+            or "{" in spec
+            or "}" in spec
+        ):
+            raise ValueError(f"Unsupported placeholder {{{field_name}}} in template {text!r}")
+        names.add(field_name)
+        pieces.append(_placeholder(field_name, conversion, spec, escape))
+
+    if all(isinstance(piece, str) for piece in pieces):
+        constant = "".join(pieces)  # type: ignore[arg-type]
+        return (lambda row, fields: constant), frozenset(names)
+    parts = tuple(pieces)
+
+    def render(row: Any, fields: Mapping[str, Any]) -> str:
+        return "".join([part if part.__class__ is str else part(row, fields) for part in parts])  # type: ignore[operator]
+
+    return render, frozenset(names)
+
+
+class _FieldsRow:
+    """Recipient row whose user columns are read from the ``fields`` given to :meth:`NotificationTemplate.render`."""
+
+    __slots__ = ("_fields",)
+
+    _PLACEHOLDERS = {column: name for name, (column, _) in USER_PLACEHOLDERS.items()}
+
+    def __init__(self, fields: Mapping[str, Any]) -> None:
+        self._fields = fields
+
+    def __getattr__(self, column: str) -> Any:
+        return self._fields[self._PLACEHOLDERS[column]]
+
+
+class NotificationTemplate:
+    """A notification text with per-language variants, compiled once."""
+
+    def __init__(
+        self,
+        default: str,
+        variants: Optional[Mapping[str, str]] = None,
+        parse_mode: Optional[str] = None,
+    ) -> None:
+        self.default = default
+        self.variants: Dict[str, str] = {code.lower(): text for code, text in (variants or {}).items()}
+        self.parse_mode = parse_mode
+
+        escape = _escaper(parse_mode)
+        self._default, fields = _compile(default, escape)
+        self._compiled: Dict[str, Renderer] = {}
+        for code, text in self.variants.items():
+            self._compiled[code], variant_fields = _compile(text, escape)
+            fields |= variant_fields
+        self._by_language: Dict[Optional[str], Renderer] = {}
+        self.user_fields = frozenset(fields & USER_PLACEHOLDERS.keys())
+        self.extra_fields = frozenset(fields - USER_PLACEHOLDERS.keys())
+
+    @property
+    def columns(self) -> List[str]:
+        """``User`` columns needed to render this template for a recipient."""
+
+        return ["language_code", *(USER_PLACEHOLDERS[name][0] for name in sorted(self.user_fields))]
+
+    def _renderer(self, language_code: Optional[str]) -> Renderer:
+        renderer = self._by_language.get(language_code)
+        if renderer is None:
+            code = (language_code or "").lower()
+            renderer = self._compiled.get(code) or self._compiled.get(code.split("-")[0]) or self._default
+            self._by_language[language_code] = renderer
+        return renderer
+
+    def render(self, language_code: Optional[str] = None, **fields: Any) -> str:
+        """Render the variant for ``language_code`` from ``fields`` alone, without a user.
+
+        User placeholders are passed as fields too, holding their column value
+        (e.g. ``points=120, level=2``), and are escaped as in :meth:`render_for`.
+        """
+
+        return self._renderer(language_code)(_FieldsRow(fields), fields)
+
+    def render_for(self, user: Any, **fields: Any) -> str:
+        """Render for ``user`` (a ``User`` or a row with :attr:`columns`), plus extra ``fields``."""
+
+        return self._renderer(user.language_code)(user, fields)
+
+    def render_rows(self, rows: List[Any]) -> List[Tuple[str, str]]:
+        """Render a page of recipient rows into ``(telegram_id, text)`` pairs."""
+
+        if self.extra_fields:
+            raise ValueError(f"Placeholders {sorted(self.extra_fields)} are not user fields")
+        by_language = self._by_language
+        renderer = self._renderer
+        return [
+            (row.telegram_id, (by_language.get(row.language_code) or renderer(row.language_code))(row, None))
+            for row in rows
+        ]
+
+
+WELCOME_NOTIFICATION = NotificationTemplate(
+    "👋 Привет! Добро пожаловать в SoulMine!\n\n"
+    "Мы рады, что вы с нами. Вот что вы можете сделать:\n"
+    "• 📱 Откройте приложение и настройте профиль\n"
+    "• 🤝 Начните знакомства с другими пользователями\n"
+    "• 💰 Получайте $LOVE токены за активность\n"
+    "• 🎁 Получайте награды и достижения\n\n"
+    "Удачи в поиске пары!",
+    {
+        "en": "👋 Hi! Welcome to SoulMine!\n\n"
+        "We are glad to have you. Here is what you can do:\n"
+        "• 📱 Open the app and set up your profile\n"
+        "• 🤝 Start meeting other users\n"
+        "• 💰 Earn $LOVE tokens for activity\n"
+        "• 🎁 Collect rewards and achievements\n\n"
+        "Good luck finding your match!",
+    },
+)
+
+REWARD_NOTIFICATION = NotificationTemplate(
+    "🎉 Поздравляем! Вы получили {amount} {reward_type}!\n\n"
+    "Спасибо за вашу активность на платформе.\n"
+    "Продолжайте в том же духе!",
+    {
+        "en": "🎉 Congratulations! You received {amount} {reward_type}!\n\n"
+        "Thank you for being active on the platform.\n"
+        "Keep it up!",
+    },
+)
+
+MATCH_NOTIFICATION = NotificationTemplate(
+    "💖 У вас есть новый матч!\n\n"
+    "Кто-то из пользователей отметил вас как интересного собеседника.\n"
+    "Посмотрите профиль и начните общение!",
+    {
+        "en": "💖 You have a new match!\n\n"
+        "Someone marked you as an interesting person to talk to.\n"
+        "Check out their profile and start chatting!",
+    },
+)
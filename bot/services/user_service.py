@@ -1,11 +1,48 @@
-from sqlalchemy.orm import Session
-from models.user import User
-from bot.utils.database import get_user_by_telegram_id
-from config.settings import settings
+import asyncio
 import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ...config.database import get_async_read_db
+from ...config.redis import get_redis
+from ...config.settings import get_settings
+from ...models.user import User, UserSnapshot
+from ..utils.database import get_user_by_telegram_id, preference_store, write_through_user
 
 logger = logging.getLogger(__name__)
 
+LOYALTY_LEVELS = range(1, 6)
+
+
+def _statistics_query():
+    """Totals per loyalty level in one scan: ``(level, users, active users)``."""
+
+    return select(
+        User.loyalty_level,
+        func.count(),
+        func.count().filter(User.is_active.is_(True)),
+    ).group_by(User.loyalty_level)
+
+
+def _statistics_from_rows(rows: Iterable[Any]) -> Dict[str, Any]:
+    users_by_level = {level: 0 for level in LOYALTY_LEVELS}
+    total_users = active_users = 0
+    for level, count, active in rows:
+        total_users += count
+        active_users += active
+        if level in users_by_level:
+            users_by_level[level] = count
+    return {
+        'total_users': total_users,
+        'active_users': active_users,
+        'users_by_level': users_by_level
+    }
+
 class UserService:
     def __init__(self, db: Session):
         self.db = db
@@ -24,49 +61,133 @@ class UserService:
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
+        await write_through_user(user)
         return user
     
     async def update_user(self, user: User, **kwargs) -> User:
-        """Update user information"""
+        """Update user information
+
+        ``user`` may come from another session (e.g. a replica read), so the
+        row is re-loaded on this one before it is changed.
+        """
+        user = self.db.get(User, user.id)
+        if "notifications_enabled" in kwargs:
+            preference_store.discard(user.telegram_id)
         for key, value in kwargs.items():
             setattr(user, key, value)
         self.db.commit()
         self.db.refresh(user)
+        await write_through_user(user)
         return user
     
     async def get_user_by_id(self, user_id: str) -> User:
         """Get user by internal ID"""
         return self.db.query(User).filter(User.id == user_id).first()
     
-    async def get_users_by_level(self, level: int) -> list[User]:
-        """Get users by loyalty level"""
-        return self.db.query(User).filter(User.loyalty_level == level).all()
+    async def get_users_by_level(self, level: int) -> list[UserSnapshot]:
+        """Get users by loyalty level (read-only snapshots, from the replica if configured)"""
+        async with get_async_read_db() as db:
+            result = await db.execute(
+                select(*UserSnapshot.columns()).where(User.loyalty_level == level)
+            )
+            return [UserSnapshot(*row) for row in result]
     
     async def get_total_users(self) -> int:
         """Get total number of users"""
-        return self.db.query(User).count()
+        async with get_async_read_db() as db:
+            return await db.scalar(select(func.count()).select_from(User))
     
     async def get_active_users(self) -> int:
         """Get number of active users"""
-        return self.db.query(User).filter(User.is_active == True).count()
+        async with get_async_read_db() as db:
+            return await db.scalar(
+                select(func.count()).select_from(User).where(User.is_active.is_(True))
+            )
     
     async def get_user_statistics(self) -> dict:
         """Get user statistics"""
-        total_users = self.get_total_users()
-        active_users = self.get_active_users()
-        
-        # Get users by level
-        users_by_level = {}
-        for level in range(1, 6):
-            count = self.db.query(User).filter(User.loyalty_level == level).count()
-            users_by_level[level] = count
-        
+        async with get_async_read_db() as db:
+            return _statistics_from_rows(await db.execute(_statistics_query()))
+
+    async def get_cached_user_statistics(self) -> dict:
+        """Get user statistics from the shared snapshot, computing it if missing"""
+        snapshot = await statistics_snapshot.read()
+        if snapshot is None:
+            snapshot = await statistics_snapshot.refresh()
+        return snapshot
+
+
+class StatisticsSnapshot:
+    """User statistics kept in a Redis hash and refreshed every ``interval`` seconds.
+
+    Dashboards read the hash in one round-trip instead of aggregating ``users``.
+    """
+
+    KEY = "stats:users"
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute the statistics, store them in Redis and return them shaped as :meth:`read` does."""
+
+        async with get_async_read_db() as db:
+            stats = _statistics_from_rows(await db.execute(_statistics_query()))
+        stats['refreshed_at'] = time.time()
+
+        mapping = {
+            "total_users": stats["total_users"],
+            "active_users": stats["active_users"],
+            "refreshed_at": stats["refreshed_at"],
+            **{f"level:{level}": count for level, count in stats["users_by_level"].items()},
+        }
+        try:
+            await get_redis().hset(self.KEY, mapping=mapping)
+        except RedisError as exc:
+            logger.warning("Failed to store statistics snapshot: %s", exc)
+        return stats
+
+    async def read(self) -> Optional[Dict[str, Any]]:
+        """Return the stored snapshot, or None if there is none (or Redis is down)."""
+
+        try:
+            raw = await get_redis().hgetall(self.KEY)
+        except RedisError as exc:
+            logger.warning("Failed to read statistics snapshot: %s", exc)
+            return None
+        if not raw:
+            return None
         return {
-            'total_users': total_users,
-            'active_users': active_users,
-            'users_by_level': users_by_level
+            'total_users': int(raw["total_users"]),
+            'active_users': int(raw["active_users"]),
+            'users_by_level': {level: int(raw.get(f"level:{level}", 0)) for level in LOYALTY_LEVELS},
+            'refreshed_at': float(raw["refreshed_at"]),
         }
 
+    def start(self) -> None:
+        """Start the periodic refresh on the running loop (no-op when the interval is 0)."""
+
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh statistics snapshot")
+            await asyncio.sleep(self.interval)
+
+
+statistics_snapshot = StatisticsSnapshot(get_settings().STATS_SNAPSHOT_INTERVAL)
+
 # Global service instance
 user_service = None
 
@@ -0,0 +1,277 @@
+"""Sharded update processing: one ingress process feeding N worker processes.
+
+The ingress process receives updates (long polling or webhook) and forwards
+their raw JSON to worker ``chat_id % N`` over a multiprocessing queue. Every
+worker runs its own :class:`Application` built by ``create_application`` with
+its own database and Redis pools. Within a worker,
+:class:`ChatOrderedUpdateProcessor` keeps updates of one chat in arrival order
+while other chats are processed concurrently, so per-user ordering holds end
+to end.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter
+from telegram.ext import Application, BaseUpdateProcessor
+
+from ..config.settings import get_settings
+from .webhook import create_ingress_app, serve_webhook, shutdown_event
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ChatOrderedUpdateProcessor", "ShardRouter", "WorkerPool", "run_sharded", "shard_key"]
+
+ApplicationFactory = Callable[[], Application]
+
+# Worker processes are spawned, not forked, so no event loop, pool or socket of
+# the ingress process leaks into them.
+_CONTEXT = multiprocessing.get_context("spawn")
+
+POLL_TIMEOUT = 30
+SUPERVISE_INTERVAL = 1.0
+
+
+def shard_key(payload: Dict[str, Any]) -> int:
+    """Return the chat id (or, failing that, user id) a raw update belongs to."""
+
+    for field, body in payload.items():
+        if field == "update_id" or not isinstance(body, dict):
+            continue
+        chat = body.get("chat") or (body.get("message") or {}).get("chat")
+        if chat:
+            return int(chat["id"])
+        sender = body.get("from") or body.get("user")
+        if sender:
+            return int(sender["id"])
+    return int(payload.get("update_id", 0))
+
+
+def _update_key(update: object) -> Optional[int]:
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes up to ``max_concurrent_updates`` updates at once, one at a time per chat.
+
+    An update of a chat that already has one running is appended to that
+    chat's backlog and gives its concurrency slot back at once; the running
+    update works through the backlog in arrival order within its own slot. A
+    chat with a backlog therefore holds at most one slot and never delays
+    updates of other chats.
+    """
+
+    def __init__(self, max_concurrent_updates: int) -> None:
+        super().__init__(max_concurrent_updates)
+        self._backlogs: Dict[int, Deque[Awaitable[Any]]] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = _update_key(update)
+        if key is None:
+            await coroutine
+            return
+        backlog = self._backlogs.get(key)
+        if backlog is not None:
+            backlog.append(coroutine)
+            return
+
+        backlog = self._backlogs[key] = deque()
+        try:
+            await coroutine
+        finally:
+            try:
+                while backlog:
+                    try:
+                        await backlog.popleft()
+                    except Exception:
+                        # Handler errors were already passed to the error handlers.
+                        logger.exception("Queued update of chat %s failed", key)
+            finally:
+                del self._backlogs[key]
+                for pending in backlog:
+                    if asyncio.iscoroutine(pending):
+                        pending.close()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+class ShardRouter:
+    """Partitions raw updates by :func:`shard_key` across worker inboxes."""
+
+    def __init__(self, inboxes: List[Any]) -> None:
+        self.inboxes = inboxes
+
+    def route(self, payloads: Iterable[Dict[str, Any]]) -> None:
+        """Forward ``payloads``, batched per worker, preserving their order."""
+
+        batches: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        shards = len(self.inboxes)
+        for payload in payloads:
+            batches[shard_key(payload) % shards].append(payload)
+        for index, batch in batches.items():
+            self.inboxes[index].put(batch)
+
+    def close(self) -> None:
+        """Ask every worker to finish its queued updates and exit."""
+
+        for inbox in self.inboxes:
+            inbox.put(None)
+
+
+async def _serve_shard(index: int, inbox: Any, application: Application) -> None:
+    loop = asyncio.get_running_loop()
+    application.bot_data["shard"] = index
+    await application.initialize()
+    if application.post_init is not None:
+        await application.post_init(application)
+    try:
+        await application.start()
+        logger.info("Shard %s ready", index)
+        while True:
+            batch = await loop.run_in_executor(None, inbox.get)
+            if batch is None:
+                break
+            for payload in batch:
+                try:
+                    update = Update.de_json(payload, application.bot)
+                except (ValueError, TypeError, KeyError):
+                    logger.warning("Shard %s dropped malformed update %s", index, payload.get("update_id"))
+                    continue
+                application.update_queue.put_nowait(update)
+    finally:
+        # stop() lets the update fetcher drain everything already queued.
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        if application.post_shutdown is not None:
+            await application.post_shutdown(application)
+
+
+def _worker_main(index: int, inbox: Any, factory: ApplicationFactory) -> None:
+    # The ingress process owns shutdown and signals workers through their inbox.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logging.basicConfig(
+        format=f"%(asctime)s - shard {index} - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+    asyncio.run(_serve_shard(index, inbox, factory()))
+
+
+class WorkerPool:
+    """Spawned worker processes, one inbox queue each."""
+
+    def __init__(self, factory: ApplicationFactory, processes: int) -> None:
+        self.factory = factory
+        self.inboxes = [_CONTEXT.Queue() for _ in range(processes)]
+        self.processes: List[Any] = [None] * processes
+        self.closing = False
+
+    def _spawn(self, index: int) -> None:
+        process = _CONTEXT.Process(
+            target=_worker_main,
+            args=(index, self.inboxes[index], self.factory),
+            name=f"soulmine-shard-{index}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start(self) -> None:
+        for index in range(len(self.inboxes)):
+            self._spawn(index)
+
+    def alive(self) -> int:
+        return sum(1 for process in self.processes if process is not None and process.is_alive())
+
+    async def supervise(self) -> None:
+        """Restart workers that exit unexpectedly; their queued updates are kept."""
+
+        while not self.closing:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if not self.closing and not process.is_alive():
+                    logger.error("Shard %s exited with %s; restarting", index, process.exitcode)
+                    self._spawn(index)
+
+    async def join(self) -> None:
+        self.closing = True
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join)
+
+
+async def _poll(bot: Bot, router: ShardRouter) -> None:
+    await bot.delete_webhook()
+    offset: Optional[int] = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=POLL_TIMEOUT, allowed_updates=Update.ALL_TYPES
+            )
+        except RetryAfter as exc:
+            await asyncio.sleep(float(exc.retry_after))
+            continue
+        except NetworkError:
+            logger.warning("Polling failed; retrying", exc_info=True)
+            await asyncio.sleep(1)
+            continue
+        if updates:
+            offset = updates[-1].update_id + 1
+            router.route(update.to_dict() for update in updates)
+
+
+async def run_sharded(factory: ApplicationFactory, processes: int) -> None:
+    """Run ``processes`` update workers behind a single polling or webhook ingress."""
+
+    settings = get_settings()
+    stop = shutdown_event()
+    pool = WorkerPool(factory, processes)
+    router = ShardRouter(pool.inboxes)
+    pool.start()
+    supervisor = asyncio.create_task(pool.supervise())
+    logger.info("Sharding updates across %s worker processes", processes)
+
+    async with Bot(settings.TELEGRAM_BOT_TOKEN, base_url=settings.TELEGRAM_API_BASE_URL) as bot:
+        try:
+            if settings.BOT_MODE == "webhook":
+
+                async def sink(payload: Dict[str, Any]) -> None:
+                    router.route((payload,))
+
+                def health() -> Tuple[bool, Dict[str, Any]]:
+                    alive = pool.alive()
+                    return alive == processes, {"status": "ok" if alive == processes else "degraded", "workers": alive}
+
+                await serve_webhook(bot, create_ingress_app(sink, health, settings), stop, settings)
+            else:
+                poller = asyncio.create_task(_poll(bot, router))
+                stopped = asyncio.create_task(stop.wait())
+                done, _ = await asyncio.wait((poller, stopped), return_when=asyncio.FIRST_COMPLETED)
+                for task in (poller, stopped):
+                    task.cancel()
+                await asyncio.gather(poller, stopped, return_exceptions=True)
+                if poller in done:
+                    poller.result()
+        finally:
+            supervisor.cancel()
+            router.close()
+            await pool.join()
+            logger.info("All shards stopped")
@@ -2,19 +2,308 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import threading
+import time
 import uuid
+from collections import Counter, OrderedDict
+from dataclasses import replace
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
-import redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+from sqlalchemy import Row, Select, String, bindparam, column, func, select, update, values
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from ...config.database import get_async_db, get_db, is_primary, recent_writes
+from ...config.redis import get_redis, get_sync_redis
 from ...config.settings import get_settings
-from ...models import User
+from ...models import User, UserSnapshot
+from .helpers import generate_referral_code
+from .write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
-redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+class UserLookupCache:
+    """Bounded LRU cache of Telegram id -> :class:`UserSnapshot` lookups with per-entry expiry.
+
+    Misses (``None``) are cached too, with a shorter TTL, so repeated taps from
+    unregistered users do not each hit the database.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 300.0,
+        negative_ttl: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Optional[UserSnapshot]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, telegram_id: str) -> Tuple[bool, Optional[UserSnapshot]]:
+        """Return ``(found, user)``; ``found`` is False on a miss or expiry."""
+
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(telegram_id)
+                    self.hits += 1
+                    return True, user
+                del self._entries[telegram_id]
+            self.misses += 1
+            return False, None
+
+    def store(self, telegram_id: str, user: Optional[UserSnapshot]) -> None:
+        """Cache ``user`` (or a negative result) for ``telegram_id``."""
+
+        ttl = self.ttl if user is not None else self.negative_ttl
+        with self._lock:
+            self._entries[telegram_id] = (self._clock() + ttl, user)
+            self._entries.move_to_end(telegram_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: str) -> None:
+        """Drop any cached entry for ``telegram_id``."""
+
+        with self._lock:
+            self._entries.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current size."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+
+user_cache = UserLookupCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+    negative_ttl=settings.USER_CACHE_NEGATIVE_TTL,
+)
+# Redis-tier outcomes of lookups that missed :data:`user_cache`.
+shared_cache_lookups: Counter = Counter()
+
+
+async def bulk_update_users(db: AsyncSession, field: str, updates: Dict[str, Any]) -> None:
+    """Set ``users.<field>`` per telegram id in one statement (``updates`` maps id -> value).
+
+    PostgreSQL gets a single ``UPDATE ... FROM (VALUES ...)``; other dialects
+    fall back to an executemany of the same UPDATE.
+    """
+
+    table = User.__table__
+    target = table.c[field]
+    if db.bind.dialect.name == "postgresql":
+        rows = values(
+            column("telegram_id", String),
+            column("value", target.type),
+            name="pending",
+        ).data(list(updates.items()))
+        stmt = update(table).where(table.c.telegram_id == rows.c.telegram_id).values({target: rows.c.value})
+        await db.execute(stmt)
+    else:
+        stmt = update(table).where(table.c.telegram_id == bindparam("key")).values({target: bindparam("value")})
+        await db.execute(stmt, [{"key": key, "value": value} for key, value in updates.items()])
+    await db.commit()
+
+
+class InteractionTracker(WriteBehindBuffer[datetime]):
+    """Coalesces ``users.last_interaction`` updates into periodic bulk writes."""
+
+    async def _write(self, batch: Dict[str, datetime]) -> None:
+        async with get_async_db() as db:
+            await bulk_update_users(db, "last_interaction", batch)
+
+
+interaction_tracker = InteractionTracker(
+    interval=settings.INTERACTION_FLUSH_INTERVAL,
+    max_entries=settings.INTERACTION_FLUSH_SIZE,
+)
+
+
+# Deletes the hash fields whose value is still the one that was written.
+_UNSHARE_WRITTEN = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+  if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+    removed = removed + redis.call('HDEL', KEYS[1], ARGV[i])
+  end
+end
+return removed
+"""
+
+
+class PreferenceStore(WriteBehindBuffer[bool]):
+    """Write-behind store for ``users.notifications_enabled`` toggles.
+
+    :func:`set_notifications_enabled` updates both cache tiers at once; the
+    column is written in bulk on the next flush, last write per user wins.
+    Users loaded from Redis or the database before that flush get their
+    pending value applied by :func:`_apply_pending_preferences`.
+
+    Pending toggles are also mirrored in the Redis hash :attr:`SHARED_KEY`
+    until written, so other processes see them: a broadcast writes them with
+    :meth:`drain_shared` before its audience scan and drops pending opt-outs
+    from each page with :meth:`opted_out`.
+    """
+
+    SHARED_KEY = "user:notifications:pending"
+
+    def __init__(self, interval: float, max_entries: int) -> None:
+        super().__init__(interval, max_entries)
+        self._unshare: Optional[AsyncScript] = None
+
+    async def share(self, telegram_id: str, enabled: bool) -> None:
+        """Publish a toggle recorded in this process to the other processes."""
+
+        try:
+            await get_redis().hset(self.SHARED_KEY, telegram_id, int(enabled))
+        except RedisError as exc:
+            logger.warning("Failed to share notification toggle of %s: %s", telegram_id, exc)
+
+    async def unshare(self, telegram_id: str) -> None:
+        """Withdraw the shared toggle of ``telegram_id``, e.g. after it was written directly."""
+
+        try:
+            await get_redis().hdel(self.SHARED_KEY, telegram_id)
+        except RedisError as exc:
+            logger.warning("Failed to withdraw notification toggle of %s: %s", telegram_id, exc)
+
+    async def drain_shared(self) -> int:
+        """Write the toggles still pending in any process and return how many were written."""
+
+        async with self._lock:
+            try:
+                shared = await get_redis().hgetall(self.SHARED_KEY)
+            except RedisError as exc:
+                logger.warning("Failed to read shared notification toggles: %s", exc)
+                return 0
+            if shared:
+                await self._write({telegram_id: value == "1" for telegram_id, value in shared.items()})
+        return len(shared)
+
+    async def opted_out(self, telegram_ids: Sequence[str]) -> Set[str]:
+        """Return the ``telegram_ids`` whose opt-out is pending here or in another process."""
+
+        opted_out = {telegram_id for telegram_id in telegram_ids if self.pending(telegram_id) is False}
+        if not telegram_ids:
+            return opted_out
+        try:
+            shared = await get_redis().hmget(self.SHARED_KEY, list(telegram_ids))
+        except RedisError as exc:
+            logger.warning("Failed to read shared notification toggles: %s", exc)
+            return opted_out
+        return opted_out | {
+            telegram_id for telegram_id, value in zip(telegram_ids, shared) if value == "0"
+        }
+
+    async def _write(self, batch: Dict[str, bool]) -> None:
+        async with get_async_db() as db:
+            await bulk_update_users(db, "notifications_enabled", batch)
+        for telegram_id in batch:
+            recent_writes.record(telegram_id)
+        client = get_redis()
+        if self._unshare is None:
+            self._unshare = client.register_script(_UNSHARE_WRITTEN)
+        args = [item for telegram_id, enabled in batch.items() for item in (telegram_id, int(enabled))]
+        try:
+            await self._unshare(keys=[self.SHARED_KEY], args=args, client=client)
+        except RedisError as exc:
+            # Left in the hash, they are rewritten by the next drain_shared; harmless.
+            logger.warning("Failed to withdraw %s written notification toggles: %s", len(batch), exc)
+
+
+preference_store = PreferenceStore(
+    interval=settings.PREFERENCE_FLUSH_INTERVAL,
+    max_entries=settings.PREFERENCE_FLUSH_SIZE,
+)
+
+
+class UnreachableRecipients(WriteBehindBuffer[bool]):
+    """Marks users the bot can no longer message (blocked it, deleted account) inactive, in bulk."""
+
+    async def _write(self, batch: Dict[str, bool]) -> None:
+        async with get_async_db() as db:
+            await db.execute(
+                update(User).where(User.telegram_id.in_(list(batch))).values(is_active=False)
+            )
+            await db.commit()
+        logger.info("Pruned %s unreachable users", len(batch))
+
+
+unreachable_recipients = UnreachableRecipients(
+    interval=settings.PRUNE_FLUSH_INTERVAL,
+    max_entries=settings.PRUNE_FLUSH_SIZE,
+)
+
+
+def mark_unreachable(telegram_id: str) -> None:
+    """Queue ``telegram_id`` to be excluded from future broadcasts."""
+
+    unreachable_recipients.record(str(telegram_id), True)
+
+
+def _apply_pending_preferences(user: Optional[UserSnapshot]) -> Optional[UserSnapshot]:
+    if user is not None:
+        pending = preference_store.pending(user.telegram_id)
+        if pending is not None and user.notifications_enabled != pending:
+            return replace(user, notifications_enabled=pending)
+    return user
+
+
+async def set_notifications_enabled(user: UserSnapshot, enabled: bool) -> UserSnapshot:
+    """Toggle notifications for ``user`` in the caches now and in the database on the next flush."""
+
+    user = replace(user, notifications_enabled=enabled)
+    preference_store.record(user.telegram_id, enabled)
+    user_cache.store(user.telegram_id, user)
+    await preference_store.share(user.telegram_id, enabled)
+    await set_user_cache(user.telegram_id, user)
+    return user
+
+
+def _cache_user(user: User) -> UserSnapshot:
+    """Store the snapshot of a freshly persisted ``user`` in :data:`user_cache` and return it."""
+
+    snapshot = _apply_pending_preferences(UserSnapshot.from_user(user))
+    user_cache.store(user.telegram_id, snapshot)
+    return snapshot
+
+
+_SNAPSHOT_COLUMNS = UserSnapshot.columns()
 
 
 def get_user_by_telegram_id(db: Session, telegram_id: str) -> Optional[User]:
@@ -23,6 +312,32 @@ def get_user_by_telegram_id(db: Session, telegram_id: str) -> Optional[User]:
     return db.query(User).filter(User.telegram_id == telegram_id).first()
 
 
+def get_user_snapshot(db: Session, telegram_id: str) -> Optional[UserSnapshot]:
+    """Return the :class:`UserSnapshot` columns of a user, without loading the entity."""
+
+    row = db.execute(select(*_SNAPSHOT_COLUMNS).where(User.telegram_id == telegram_id).limit(1)).first()
+    return UserSnapshot(*row) if row is not None else None
+
+
+def get_user_cached(db: Session, telegram_id: str) -> Optional[UserSnapshot]:
+    """Read-through variant of :func:`get_user_snapshot` backed by :data:`user_cache`.
+
+    Misses are filled from the primary, also when ``db`` is a replica session.
+    """
+
+    found, user = user_cache.lookup(telegram_id)
+    if found:
+        return user
+    if is_primary(db):
+        user = get_user_snapshot(db, telegram_id)
+    else:
+        with get_db() as primary:
+            user = get_user_snapshot(primary, telegram_id)
+    user = _apply_pending_preferences(user)
+    user_cache.store(telegram_id, user)
+    return user
+
+
 def create_user(db: Session, telegram_id: str, **kwargs) -> User:
     """Create a new user entity and persist it immediately."""
 
@@ -30,48 +345,355 @@ def create_user(db: Session, telegram_id: str, **kwargs) -> User:
     db.add(user)
     db.commit()
     db.refresh(user)
+    recent_writes.record(telegram_id)
+    clear_user_cache_sync(telegram_id)
     return user
 
 
 def update_user(db: Session, user: User, **kwargs) -> User:
     """Update user information and persist the changes."""
 
+    if "notifications_enabled" in kwargs:
+        preference_store.discard(user.telegram_id)
     for key, value in kwargs.items():
         setattr(user, key, value)
     db.commit()
     db.refresh(user)
+    recent_writes.record(user.telegram_id)
+    clear_user_cache_sync(user.telegram_id)
     return user
 
 
 def get_or_create_user(db: Session, telegram_id: str, **kwargs) -> User:
-    """Return an existing user or create a new one."""
+    """Return an existing user or create a new one.
+
+    ``last_interaction`` of existing users is buffered in
+    :data:`interaction_tracker` rather than committed here.
+    """
 
     user = get_user_by_telegram_id(db, telegram_id)
     if not user:
         return create_user(db, telegram_id, **kwargs)
 
-    user.last_interaction = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    interaction_tracker.record(telegram_id, datetime.utcnow())
+    return user
+
+
+async def get_user_by_telegram_id_async(db: AsyncSession, telegram_id: str) -> Optional[User]:
+    """Async variant of :func:`get_user_by_telegram_id`."""
+
+    result = await db.execute(select(User).where(User.telegram_id == telegram_id).limit(1))
+    return result.scalar_one_or_none()
+
+
+async def get_user_snapshot_async(db: AsyncSession, telegram_id: str) -> Optional[UserSnapshot]:
+    """Async variant of :func:`get_user_snapshot`."""
+
+    row = (await db.execute(select(*_SNAPSHOT_COLUMNS).where(User.telegram_id == telegram_id).limit(1))).first()
+    return UserSnapshot(*row) if row is not None else None
+
+
+async def get_user_cached_async(db: Optional[AsyncSession], telegram_id: str) -> Optional[UserSnapshot]:
+    """Two-tier read-through lookup: :data:`user_cache`, then Redis, then the database.
+
+    Returns a :class:`UserSnapshot`; handlers that need to write load the
+    ``User`` entity separately.
+
+    Concurrent misses for the same ``telegram_id`` share a single lookup, so a
+    burst of taps from one user results in at most one database query. If
+    the caller running that lookup is cancelled, the others do it themselves.
+
+    Misses are always read from the primary: the result is shared through
+    Redis for up to ``REDIS_USER_CACHE_TTL``, so a row (or absence) a replica
+    has not caught up with must not end up there. ``db`` is used for that read
+    if it is a primary session; otherwise (or when it is None, as in the
+    handlers) a primary session is checked out only on a miss.
+    """
+
+    found, user = user_cache.lookup(telegram_id)
+    if found:
+        return user
+
+    pending = _inflight_lookups.get(telegram_id)
+    while pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # If only the leading lookup was cancelled, not this caller, look up again.
+            if not pending.cancelled() or asyncio.current_task().cancelling():
+                raise
+        pending = _inflight_lookups.get(telegram_id)
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight_lookups[telegram_id] = future
+    try:
+        found, user = await get_user_cache(telegram_id)
+        shared_cache_lookups["hit" if found else "miss"] += 1
+        if not found:
+            if db is not None and is_primary(db):
+                user = await get_user_snapshot_async(db, telegram_id)
+            else:
+                async with get_async_db() as primary:
+                    user = await get_user_snapshot_async(primary, telegram_id)
+            await set_user_cache(telegram_id, user)
+        user = _apply_pending_preferences(user)
+        user_cache.store(telegram_id, user)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        future.exception()  # Mark as retrieved when nobody else is waiting.
+        raise
+    else:
+        future.set_result(user)
+        return user
+    finally:
+        _inflight_lookups.pop(telegram_id, None)
+
+
+async def create_user_async(db: AsyncSession, telegram_id: str, **kwargs) -> User:
+    """Async variant of :func:`create_user`, writing the new row through both cache tiers."""
+
+    user = User(id=str(uuid.uuid4()), telegram_id=telegram_id, **kwargs)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    await write_through_user(user)
+    return user
+
+
+async def update_user_async(db: AsyncSession, user: User, **kwargs) -> User:
+    """Async variant of :func:`update_user`, writing the row through both cache tiers."""
+
+    if "notifications_enabled" in kwargs:
+        # A pending toggle must neither be flushed after this commit nor be
+        # in flight while it runs, or the older value would overwrite it.
+        async with preference_store.writing_through(user.telegram_id):
+            await preference_store.unshare(user.telegram_id)
+            for key, value in kwargs.items():
+                setattr(user, key, value)
+            await db.commit()
+    else:
+        for key, value in kwargs.items():
+            setattr(user, key, value)
+        await db.commit()
+    await db.refresh(user)
+    await write_through_user(user)
+    return user
+
+
+async def get_or_create_user_async(db: AsyncSession, telegram_id: str, **kwargs) -> User:
+    """Async variant of :func:`get_or_create_user`."""
+
+    user = await get_user_by_telegram_id_async(db, telegram_id)
+    if not user:
+        return await create_user_async(db, telegram_id, **kwargs)
+
+    interaction_tracker.record(telegram_id, datetime.utcnow())
+    return user
+
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE ... RETURNING.
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+REFERRAL_CODE_ATTEMPTS = 5
+
+
+async def upsert_user_async(db: AsyncSession, telegram_id: str, **kwargs) -> User:
+    """Return the user for ``telegram_id``, creating it if needed, in one round-trip.
+
+    Issues ``INSERT ... ON CONFLICT (telegram_id) DO UPDATE ... RETURNING`` which
+    also assigns a referral code to users that lack one. ``kwargs`` are only
+    used for new rows. A referral code collision is retried with a fresh code.
+    Dialects without ``ON CONFLICT`` fall back to :func:`get_or_create_user_async`.
+    """
+
+    insert = _UPSERT_INSERTS.get(db.bind.dialect.name)
+    if insert is None:
+        user = await get_or_create_user_async(db, telegram_id, **kwargs)
+        if not user.referral_code or not user.is_active:
+            user = await update_user_async(
+                db, user, referral_code=user.referral_code or generate_referral_code(telegram_id), is_active=True
+            )
+        unreachable_recipients.discard(telegram_id)
+        return user
+
+    for attempt in range(1, REFERRAL_CODE_ATTEMPTS + 1):
+        stmt = insert(User).values(
+            id=str(uuid.uuid4()),
+            telegram_id=telegram_id,
+            referral_code=generate_referral_code(telegram_id),
+            **kwargs,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                "referral_code": func.coalesce(User.referral_code, stmt.excluded.referral_code),
+                # /start from a pruned user means they unblocked the bot.
+                "is_active": True,
+            },
+        ).returning(User)
+        try:
+            result = await db.execute(stmt, execution_options={"populate_existing": True})
+            user = result.scalar_one()
+            await db.commit()
+        except IntegrityError:
+            # ON CONFLICT covers telegram_id, so this is a referral code collision.
+            await db.rollback()
+            if attempt == REFERRAL_CODE_ATTEMPTS:
+                raise
+            continue
+        break
+
+    interaction_tracker.record(telegram_id, datetime.utcnow())
+    unreachable_recipients.discard(telegram_id)
+    await write_through_user(user)
     return user
 
 
-def set_user_cache(user_id: str, data: dict) -> None:
-    """Set user data in cache for one hour."""
+def subscriber_page_query(batch_size: int, after_id: Optional[str] = None, columns: Sequence[str] = ()) -> Select:
+    """One page of :func:`iter_subscriber_pages`.
+
+    Its WHERE clause is the predicate of the ``idx_users_subscribers`` partial
+    index, which also covers ``telegram_id``; keep the two in step.
+    """
+
+    stmt = (
+        select(User.id, User.telegram_id, *(getattr(User, column) for column in columns))
+        .where(User.notifications_enabled.is_(True), User.is_active.is_(True))
+        .order_by(User.id)
+        .limit(batch_size)
+    )
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    return stmt
+
+
+async def iter_subscriber_pages(
+    batch_size: int = 1000, after_id: Optional[str] = None, columns: Sequence[str] = ()
+) -> AsyncIterator[List[Row]]:
+    """Yield ``(id, telegram_id)`` rows of reachable users with notifications enabled, page by page.
+
+    Rows also carry the named extra ``User`` ``columns``, e.g. for rendering
+    personalised messages.
+
+    Pages are keyset-paginated on the primary key (``id > last ORDER BY id
+    LIMIT n``) and each runs in its own short session, so memory is bounded by
+    ``batch_size`` and no transaction stays open for the length of a broadcast.
+    Pages are read from the primary, never the replica: a broadcast flushes
+    pending opt-outs and prunes just before it starts, and must see them.
+    ``after_id`` resumes after a previously returned ``id``.
+    """
+
+    last_id = after_id
+    while True:
+        async with get_async_db() as db:
+            rows = (await db.execute(subscriber_page_query(batch_size, last_id, columns))).all()
+        if not rows:
+            return
+
+        last_id = rows[-1].id
+        yield rows
+        if len(rows) < batch_size:
+            return
+
+
+async def iter_subscriber_batches(
+    batch_size: int = 1000, after_id: Optional[str] = None
+) -> AsyncIterator[List[str]]:
+    """Like :func:`iter_subscriber_pages`, yielding only the telegram ids."""
+
+    async for rows in iter_subscriber_pages(batch_size, after_id):
+        yield [row.telegram_id for row in rows]
+
+
+# Columns kept in the shared Redis tier, in serialisation order.
+USER_CACHE_FIELDS: Tuple[str, ...] = UserSnapshot.__slots__
+
+# Stored for telegram ids known not to be registered.
+_NEGATIVE_MARKER = "0"
+
+_inflight_lookups: Dict[str, asyncio.Future] = {}
+
+
+def _user_cache_key(telegram_id: str) -> str:
+    # Versioned: entries used to hold more columns, in another order.
+    return f"user:v2:{telegram_id}"
+
+
+def serialize_user(user: UserSnapshot) -> str:
+    """Encode the cached columns of ``user`` as a compact JSON array."""
+
+    row: List[Any] = [getattr(user, field) for field in USER_CACHE_FIELDS]
+    return json.dumps(row, separators=(",", ":"), ensure_ascii=False)
+
+
+def deserialize_user(payload: str) -> UserSnapshot:
+    """Rebuild a :class:`UserSnapshot` from :func:`serialize_user` output."""
+
+    return UserSnapshot(*json.loads(payload))
+
+
+async def set_user_cache(telegram_id: str, user: Optional[UserSnapshot]) -> None:
+    """Store ``user`` (or a negative result) in Redis."""
+
+    if user is None:
+        payload, ttl = _NEGATIVE_MARKER, max(1, int(settings.USER_CACHE_NEGATIVE_TTL))
+    else:
+        payload, ttl = serialize_user(user), settings.REDIS_USER_CACHE_TTL
+    try:
+        await get_redis().set(_user_cache_key(telegram_id), payload, ex=ttl)
+    except RedisError as exc:
+        logger.warning("Failed to cache user %s in Redis: %s", telegram_id, exc)
+
+
+async def get_user_cache(telegram_id: str) -> Tuple[bool, Optional[UserSnapshot]]:
+    """Return ``(found, user)`` from Redis; Redis errors count as a miss."""
+
+    try:
+        payload = await get_redis().get(_user_cache_key(telegram_id))
+    except RedisError as exc:
+        logger.warning("Failed to read user %s from Redis: %s", telegram_id, exc)
+        return False, None
+    if payload is None:
+        return False, None
+    if payload == _NEGATIVE_MARKER:
+        return True, None
+    return True, deserialize_user(payload)
+
+
+async def write_through_user(user: User) -> UserSnapshot:
+    """Record a committed write of ``user`` and store its snapshot in both cache tiers.
+
+    Every write path goes through this (or :func:`clear_user_cache_sync`), so
+    neither tier keeps serving the row as it was before the write.
+    """
 
-    redis_client.setex(f"user:{user_id}", 3600, json.dumps(data))
+    recent_writes.record(user.telegram_id)
+    snapshot = _cache_user(user)
+    await set_user_cache(user.telegram_id, snapshot)
+    return snapshot
 
 
-def get_user_cache(user_id: str) -> Optional[dict]:
-    """Retrieve cached user data if available."""
+async def clear_user_cache(telegram_id: str) -> None:
+    """Remove ``telegram_id`` from both cache tiers."""
 
-    data = redis_client.get(f"user:{user_id}")
-    if data:
-        return json.loads(data)
-    return None
+    user_cache.invalidate(telegram_id)
+    try:
+        await get_redis().delete(_user_cache_key(telegram_id))
+    except RedisError as exc:
+        logger.warning("Failed to clear cached user %s: %s", telegram_id, exc)
 
 
-def clear_user_cache(user_id: str) -> None:
-    """Remove cached user data."""
+def clear_user_cache_sync(telegram_id: str) -> None:
+    """Blocking variant of :func:`clear_user_cache`, for the sync write helpers."""
 
-    redis_client.delete(f"user:{user_id}")
\ No newline at end of file
+    user_cache.invalidate(telegram_id)
+    try:
+        get_sync_redis().delete(_user_cache_key(telegram_id))
+    except RedisError as exc:
+        logger.warning("Failed to clear cached user %s: %s", telegram_id, exc)
@@ -0,0 +1,114 @@
+"""Buffered, batched persistence of hot per-user values."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class WriteBehindBuffer(ABC, Generic[V]):
+    """Collects last-write-wins values keyed by Telegram id and persists them in batches.
+
+    Values are written by :meth:`_write` every ``interval`` seconds once
+    :meth:`start` has been called, as soon as ``max_entries`` keys are pending,
+    and on :meth:`stop`. A failed write keeps its values for the next flush
+    unless newer ones were recorded in the meantime.
+    """
+
+    def __init__(self, interval: float, max_entries: int) -> None:
+        self.interval = interval
+        self.max_entries = max_entries
+        self._pending: Dict[str, V] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, key: str, value: V) -> None:
+        """Buffer ``value`` for ``key``, replacing any pending value."""
+
+        self._pending[key] = value
+        if len(self._pending) >= self.max_entries:
+            self._schedule_flush()
+
+    def discard(self, key: str) -> None:
+        """Drop the pending value for ``key``, e.g. after it was written directly."""
+
+        self._pending.pop(key, None)
+
+    @asynccontextmanager
+    async def writing_through(self, key: str) -> AsyncIterator[None]:
+        """Hold off flushes while ``key`` is written directly, dropping its pending value.
+
+        A batch already being written finishes first, so an older value for
+        ``key`` cannot land after the direct write.
+        """
+
+        async with self._lock:
+            self.discard(key)
+            yield
+
+    def pending(self, key: str, default: Optional[V] = None) -> Optional[V]:
+        """Return the not-yet-persisted value for ``key``, if any."""
+
+        return self._pending.get(key, default)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:  # No running loop (sync caller); the periodic flush picks it up.
+            pass
+
+    async def flush(self) -> int:
+        """Persist every pending value and return how many were written."""
+
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            try:
+                await self._write(batch)
+            except Exception:
+                logger.exception("%s failed to write %s entries", type(self).__name__, len(batch))
+                for key, value in batch.items():
+                    self._pending.setdefault(key, value)
+                return 0
+            return len(batch)
+
+    @abstractmethod
+    async def _write(self, batch: Dict[str, V]) -> None:
+        """Persist ``batch``; raising keeps its values for the next flush."""
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running loop."""
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write whatever is still pending."""
+
+        for task in (self._task, self._flush_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._task = self._flush_task = None
+        await self.flush()
+        if self._pending:
+            logger.error("%s stopped with %s unwritten entries", type(self).__name__, len(self._pending))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
@@ -0,0 +1,141 @@
+"""aiohttp server receiving updates from Telegram via webhook."""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from aiohttp import web
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from ..config.database import pool_stats
+from ..config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["create_ingress_app", "create_webhook_app", "run_webhook", "serve_webhook", "shutdown_event"]
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Receives the decoded JSON body of every accepted webhook request.
+UpdateSink = Callable[[Dict[str, Any]], Awaitable[None]]
+# Returns whether the service is ready and the body served on ``/healthz``.
+HealthCheck = Callable[[], Tuple[bool, Dict[str, Any]]]
+
+SINK_KEY = web.AppKey("update_sink", UpdateSink)
+HEALTH_KEY = web.AppKey("health_check", HealthCheck)
+
+
+async def _receive_update(request: web.Request) -> web.Response:
+    # Settings refuse webhook mode without a secret; were it unset, every request is rejected.
+    secret = (get_settings().WEBHOOK_SECRET or "").encode()
+    if not secret or not hmac.compare_digest(request.headers.get(SECRET_HEADER, "").encode(), secret):
+        return web.Response(status=403)
+
+    try:
+        payload = await request.json(loads=json.loads)
+        if not isinstance(payload, dict):
+            raise TypeError("update payload must be an object")
+        await request.app[SINK_KEY](payload)
+    except (ValueError, TypeError, KeyError):
+        return web.Response(status=400)
+    return web.Response()
+
+
+async def _health(request: web.Request) -> web.Response:
+    ready, body = request.app[HEALTH_KEY]()
+    return web.json_response(body, status=200 if ready else 503)
+
+
+def create_ingress_app(sink: UpdateSink, health: HealthCheck, settings: Settings | None = None) -> web.Application:
+    """Return an aiohttp app passing webhook payloads to ``sink`` and serving ``/healthz``."""
+
+    settings = settings or get_settings()
+    app = web.Application()
+    app[SINK_KEY] = sink
+    app[HEALTH_KEY] = health
+    app.router.add_post(settings.WEBHOOK_PATH, _receive_update)
+    app.router.add_get("/healthz", _health)
+    if settings.METRICS_ENABLED:
+        from .metrics import metrics_view
+
+        app.router.add_get("/metrics", metrics_view)
+    return app
+
+
+def create_webhook_app(application: Application, settings: Settings | None = None) -> web.Application:
+    """Return the aiohttp app feeding ``application``'s update queue."""
+
+    async def sink(payload: Dict[str, Any]) -> None:
+        # Processing happens on the application's update queue, concurrently up to
+        # UPDATE_CONCURRENCY, so Telegram gets its 200 without waiting on handlers.
+        await application.update_queue.put(Update.de_json(payload, application.bot))
+
+    def health() -> Tuple[bool, Dict[str, Any]]:
+        return application.running, {
+            "status": "ok" if application.running else "starting",
+            "queued_updates": application.update_queue.qsize(),
+            "db_pool": pool_stats(),
+        }
+
+    return create_ingress_app(sink, health, settings)
+
+
+def shutdown_event() -> asyncio.Event:
+    """Return an event set on SIGINT/SIGTERM in the running loop."""
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    return stop
+
+
+async def serve_webhook(bot: Bot, app: web.Application, stop: asyncio.Event, settings: Settings | None = None) -> None:
+    """Register the webhook for ``bot`` and serve ``app`` until ``stop`` is set."""
+
+    settings = settings or get_settings()
+    if not settings.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL must be set when BOT_MODE is 'webhook'")
+
+    await bot.set_webhook(
+        url=f"{settings.WEBHOOK_URL.rstrip('/')}{settings.WEBHOOK_PATH}",
+        secret_token=settings.WEBHOOK_SECRET,
+        allowed_updates=Update.ALL_TYPES,
+        max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT).start()
+        logger.info("Serving webhook on %s:%s%s", settings.WEBHOOK_HOST, settings.WEBHOOK_PORT, settings.WEBHOOK_PATH)
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_webhook(application: Application) -> None:
+    """Register the webhook with Telegram and serve updates until SIGINT/SIGTERM."""
+
+    settings = get_settings()
+    if not settings.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL must be set when BOT_MODE is 'webhook'")
+
+    stop = shutdown_event()
+    await application.initialize()
+    if application.post_init is not None:
+        await application.post_init(application)
+    try:
+        await application.start()
+        await serve_webhook(application.bot, create_webhook_app(application, settings), stop, settings)
+    finally:
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        if application.post_shutdown is not None:
+            await application.post_shutdown(application)
@@ -1,14 +1,52 @@
-"""Database and settings configuration for the SoulMine bot."""
+"""Database and settings configuration for the SoulMine bot.
 
-from .database import Base, SessionLocal, engine, init_db
-from .settings import Settings, get_settings, settings
+Database and Redis names are resolved from their submodules on first access,
+so importing the settings does not pull in SQLAlchemy or Redis.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Any
+
+from .settings import Settings, get_settings
+
+# ``settings`` is the settings instance (read lazily), not the submodule.
+del settings
 
 __all__ = [
+    "AsyncSessionLocal",
     "Base",
     "SessionLocal",
+    "async_engine",
     "engine",
+    "get_async_db",
     "init_db",
+    "close_redis",
+    "get_redis",
     "Settings",
     "get_settings",
     "settings",
 ]
+
+_SUBMODULES = {
+    "AsyncSessionLocal": ".database",
+    "Base": ".database",
+    "SessionLocal": ".database",
+    "async_engine": ".database",
+    "engine": ".database",
+    "get_async_db": ".database",
+    "init_db": ".database",
+    "close_redis": ".redis",
+    "get_redis": ".redis",
+    "settings": ".settings",
+}
+
+
+def __getattr__(name: str) -> Any:
+    submodule = _SUBMODULES.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(submodule, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,49 +1,412 @@
-"""Database helpers for the Telegram bot."""
+"""Database helpers for the Telegram bot.
+
+Engines and session factories are created on first use (:func:`get_engine`,
+:func:`get_db`, ...), not at import; ``engine``, ``SessionLocal`` and the
+other module attributes are still available and trigger the same creation.
+"""
 
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple, Type, Union
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from .settings import Settings, get_settings
+
+__all__ = [
+    "AsyncReplicaSessionLocal",
+    "AsyncSessionLocal",
+    "Base",
+    "ReplicaSessionLocal",
+    "SessionLocal",
+    "async_engine",
+    "async_replica_engine",
+    "dispose_engines",
+    "engine",
+    "get_async_db",
+    "get_async_engine",
+    "get_async_read_db",
+    "get_db",
+    "get_engine",
+    "get_read_db",
+    "init_db",
+    "is_primary",
+    "pool_stats",
+    "recent_writes",
+    "replica_engine",
+    "to_async_url",
+]
+
+
+# Async drivers used when ``DATABASE_URL`` names a synchronous one.
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Return ``url`` rewritten to use an asyncio-compatible driver."""
+
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None or parsed.get_driver_name() == driver:
+        return url
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+class PoolStats:
+    """Checkout counters for one engine's connection pool.
+
+    Counts come from pool events; the time spent waiting for a connection is
+    measured by the pool classes from :func:`_timed_pool`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", lambda *args: self._on_checkout(engine.pool))
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_invalidate)
+
+    def _on_connect(self, *args: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, pool: Pool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if isinstance(pool, QueuePool):
+                self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+                self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def _on_invalidate(self, *args: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.timeouts += timed_out
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Return the counters together with ``pool``'s current occupancy."""
+
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "pool": type(pool).__name__.replace("Timed", "", 1),
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_seconds * 1000, 3),
+                "wait_ms_avg": round(self.wait_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.max_wait_seconds * 1000, 3),
+            }
+            if isinstance(pool, QueuePool):
+                stats.update(
+                    size=pool.size(),
+                    checked_out=pool.checkedout(),
+                    peak_checked_out=self.peak_checked_out,
+                    # Connections open beyond ``size``.
+                    overflow=max(0, pool.overflow()),
+                    peak_overflow=max(0, self.peak_overflow),
+                )
+            return stats
+
+
+def _timed_pool(base: Type[Pool], stats: PoolStats) -> Type[Pool]:
+    """Return a subclass of ``base`` recording checkout wait times into ``stats``."""
 
-from .settings import get_settings
+    def _do_get(self: Pool) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except PoolTimeoutError:
+            stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        stats.record_wait(time.perf_counter() - started)
+        return connection
 
-__all__ = ["Base", "SessionLocal", "engine", "get_db", "init_db"]
+    # ``Pool.recreate()`` (e.g. on ``dispose()``) instantiates the same class, keeping the stats.
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
 
 
-settings = get_settings()
+def _unique_statement_name() -> str:
+    # Statements asyncpg still prepares (e.g. for a single execution) must not clash with
+    # ones another client left on a server connection PgBouncer hands out again.
+    return f"__asyncpg_{uuid.uuid4()}__"
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False,
-    future=True,
+
+def _engine_options(url: str, queue_pool: Type[Pool], stats: PoolStats, settings: Settings) -> Dict[str, Any]:
+    """Pool keyword arguments for an engine on ``url``."""
+
+    if settings.DATABASE_PGBOUNCER:
+        options: Dict[str, Any] = {"poolclass": _timed_pool(NullPool, stats)}
+        if make_url(url).get_driver_name() == "asyncpg":
+            # Transaction pooling hands each transaction a different server connection.
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _unique_statement_name,
+            }
+        return options
+
+    options = {"pool_pre_ping": settings.DATABASE_POOL_PRE_PING}
+    # SQLite keeps its own pool choice (a single connection for in-memory databases).
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=_timed_pool(queue_pool, stats),
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        )
+    return options
+
+
+def _create_engines(url: str, async_url: str, settings: Settings) -> Tuple[Engine, AsyncEngine, PoolStats, PoolStats]:
+    """Create the sync and async engines for one database, with their pool stats."""
+
+    sync_stats, async_stats = PoolStats(), PoolStats()
+    sync_engine = create_engine(
+        url,
+        echo=False,
+        future=True,
+        **_engine_options(url, QueuePool, sync_stats, settings),
+    )
+    asyncio_engine = create_async_engine(
+        async_url,
+        echo=False,
+        **_engine_options(async_url, AsyncAdaptedQueuePool, async_stats, settings),
+    )
+    sync_stats.attach(sync_engine)
+    async_stats.attach(asyncio_engine.sync_engine)
+    return sync_engine, asyncio_engine, sync_stats, async_stats
+
+
+class _Database:
+    """The engines and session factories, created together on first use."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.engine, self.async_engine, sync_stats, async_stats = _create_engines(
+            settings.DATABASE_URL, settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL), settings
+        )
+        self.pool_stats = {"sync": (sync_stats, self.engine), "async": (async_stats, self.async_engine.sync_engine)}
+        # Without a replica the read engines are the primary ones.
+        if settings.DATABASE_REPLICA_URL:
+            self.replica_engine, self.async_replica_engine, replica_stats, async_replica_stats = _create_engines(
+                settings.DATABASE_REPLICA_URL, to_async_url(settings.DATABASE_REPLICA_URL), settings
+            )
+            self.pool_stats["replica_sync"] = (replica_stats, self.replica_engine)
+            self.pool_stats["replica_async"] = (async_replica_stats, self.async_replica_engine.sync_engine)
+        else:
+            self.replica_engine, self.async_replica_engine = self.engine, self.async_engine
+
+        if settings.METRICS_ENABLED:
+            from ..bot.metrics import instrument_engine
+
+            for name, (_, sync_engine) in self.pool_stats.items():
+                instrument_engine(sync_engine, name)
+
+        self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.AsyncSessionLocal = async_sessionmaker(bind=self.async_engine, expire_on_commit=False)
+        self.ReplicaSessionLocal = sessionmaker(bind=self.replica_engine, expire_on_commit=False)
+        self.AsyncReplicaSessionLocal = async_sessionmaker(bind=self.async_replica_engine, expire_on_commit=False)
+
+
+_database: Optional[_Database] = None
+_database_lock = threading.Lock()
+
+# Module attributes served by :func:`__getattr__` from the lazily created :class:`_Database`.
+_LAZY_ATTRIBUTES = frozenset(
+    {
+        "engine",
+        "async_engine",
+        "replica_engine",
+        "async_replica_engine",
+        "SessionLocal",
+        "AsyncSessionLocal",
+        "ReplicaSessionLocal",
+        "AsyncReplicaSessionLocal",
+    }
 )
 
 
-class Base(DeclarativeBase):
-    """Base class for declarative SQLAlchemy models."""
+def _get_database() -> _Database:
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = _Database(get_settings())
+    return _database
+
+
+def __getattr__(name: str) -> Any:
+    # Engines are created on first access rather than at import, keeping
+    # imports cheap and free of I/O (see :func:`get_engine`).
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(_get_database(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_engine() -> Engine:
+    """Return the primary engine, creating the engines on first use."""
 
+    return _get_database().engine
 
-SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+def get_async_engine() -> AsyncEngine:
+    """Return the primary asyncio engine, creating the engines on first use."""
+
+    return _get_database().async_engine
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of the asyncio engines, if they were created."""
+
+    database = _database
+    if database is None:
+        return
+    await database.async_engine.dispose()
+    if database.async_replica_engine is not database.async_engine:
+        await database.async_replica_engine.dispose()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection pool counters and occupancy of the sync and async engines (and replica ones).
+
+    Empty until the engines have been created.
+    """
+
+    database = _database
+    if database is None:
+        return {}
+    return {name: stats.snapshot(sync_engine.pool) for name, (stats, sync_engine) in database.pool_stats.items()}
+
+
+class RecentWrites:
+    """Keys (telegram ids) written within the last ``window`` seconds.
+
+    Their reads are kept on the primary until the replica has had time to
+    catch up, so users always see their own changes. The state is per process;
+    sharded workers receive all updates of a chat, and so all its writes.
+    """
+
+    def __init__(self, window: float, maxsize: int = 100_000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.window = window
+        self.maxsize = maxsize
+        self._clock = clock
+        self._written: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: str) -> None:
+        now = self._clock()
+        with self._lock:
+            self._written[key] = now + self.window
+            self._written.move_to_end(key)
+            # Entries are in expiry order; drop the expired and any beyond ``maxsize``.
+            while self._written and (
+                len(self._written) > self.maxsize or next(iter(self._written.values())) <= now
+            ):
+                self._written.popitem(last=False)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            expires_at = self._written.get(key)  # type: ignore[arg-type]
+        return expires_at is not None and expires_at > self._clock()
+
+
+recent_writes = RecentWrites(get_settings().DATABASE_REPLICA_STICKY_SECONDS)
+
+
+class Base(DeclarativeBase):
+    """Base class for declarative SQLAlchemy models."""
 
 
 @contextmanager
 def get_db() -> Iterator[Session]:
     """Provide a transactional scope around a series of operations."""
 
-    db = SessionLocal()
+    db = _get_database().SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
+@asynccontextmanager
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of :func:`get_db` for use inside handlers."""
+
+    async with _get_database().AsyncSessionLocal() as db:
+        yield db
+
+
+@contextmanager
+def get_read_db(telegram_id: Optional[str] = None) -> Iterator[Session]:
+    """Session for queries only, on the replica unless ``telegram_id`` wrote recently.
+
+    Results may lag the primary by the replication delay; objects loaded here
+    must not be modified and committed through another session.
+    """
+
+    database = _get_database()
+    if telegram_id is not None and telegram_id in recent_writes:
+        db = database.SessionLocal()
+    else:
+        db = database.ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def get_async_read_db(telegram_id: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+    """Async counterpart of :func:`get_read_db`."""
+
+    database = _get_database()
+    if telegram_id is not None and telegram_id in recent_writes:
+        factory = database.AsyncSessionLocal
+    else:
+        factory = database.AsyncReplicaSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def is_primary(db: Union[Session, AsyncSession]) -> bool:
+    """Whether ``db`` reads from the primary; always true without a replica."""
+
+    database = _get_database()
+    return db.bind is database.engine or db.bind is database.async_engine
+
+
 def init_db() -> None:
     """Create database tables for all models."""
 
-    from ..models import user  # noqa: F401  Import models for metadata registration
+    from .. import models  # noqa: F401  Import models for metadata registration
 
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=get_engine())
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Redis connection helpers for the Telegram bot."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from redis import ConnectionPool as SyncConnectionPool, Redis as SyncRedis
+from redis.asyncio import ConnectionPool, Redis
+
+from .settings import get_settings
+
+__all__ = ["close_redis", "get_redis", "get_sync_redis"]
+
+
+_pool: Optional[ConnectionPool] = None
+_client: Optional[Redis] = None
+_sync_client: Optional[SyncRedis] = None
+
+
+def get_redis() -> Redis:
+    """Return the shared asyncio Redis client, creating its pool on first use."""
+
+    global _pool, _client
+    if _client is None:
+        settings = get_settings()
+        _pool = ConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            decode_responses=True,
+        )
+        _client = Redis(connection_pool=_pool)
+    return _client
+
+
+def get_sync_redis() -> SyncRedis:
+    """Return a blocking client for code that cannot await, e.g. the sync database helpers."""
+
+    global _sync_client
+    if _sync_client is None:
+        settings = get_settings()
+        _sync_client = SyncRedis(
+            connection_pool=SyncConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                decode_responses=True,
+            )
+        )
+    return _sync_client
+
+
+async def close_redis() -> None:
+    """Close the shared clients and disconnect their pools."""
+
+    global _pool, _client, _sync_client
+    if _client is not None:
+        await _client.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client.connection_pool.disconnect()
+    _pool = None
+    _client = None
+    _sync_client = None
@@ -0,0 +1,157 @@
+"""Versioned schema changes for existing databases.
+
+:func:`~bot.config.database.init_db` creates missing tables from the models,
+but never alters tables that already exist, e.g. ones created by
+``init-scripts/init.sql`` or by an older release. :func:`migrate` brings those
+up to date: it applies each step of :data:`MIGRATIONS` once, in order, and
+records it in ``schema_migrations``. Steps are idempotent, so they are also
+safe on databases that ``init_db`` created with the current schema.
+
+Columns are added as nullable, which needs no table rewrite. On PostgreSQL
+indexes are built and dropped ``CONCURRENTLY``, without blocking writes. A
+concurrent build that failed leaves an INVALID index behind, which ``IF NOT
+EXISTS`` would keep; such an index is dropped and built again when its
+migration is retried. Run both steps with::
+
+    python -m bot.config.schema
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from .database import get_engine, init_db
+
+__all__ = ["MIGRATIONS", "Migration", "migrate"]
+
+logger = logging.getLogger(__name__)
+
+# Kept out of the models' metadata: it belongs to the migration step, not the app.
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("id", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema change: model columns to add, model indexes to create, then index names to drop."""
+
+    id: str
+    add_columns: Tuple[Tuple[str, str], ...] = ()  # (table, column name) as defined on the models
+    create_indexes: Tuple[Tuple[str, str], ...] = ()  # (table, index name) as defined on the models
+    drop_indexes: Tuple[str, ...] = ()
+
+    def statements(self, connection: Connection) -> List[str]:
+        from .. import models  # noqa: F401  Import models for metadata registration
+        from .database import Base
+
+        dialect = connection.dialect
+        concurrently = " CONCURRENTLY" if dialect.name == "postgresql" else ""
+        statements = []
+        inspector = inspect(connection)
+        for table, name in self.add_columns:
+            # SQLite has no ADD COLUMN IF NOT EXISTS.
+            if name not in {column["name"] for column in inspector.get_columns(table)}:
+                ddl = CreateColumn(Base.metadata.tables[table].c[name]).compile(dialect=dialect)
+                statements.append(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+        for table, name in self.create_indexes:
+            if dialect.name == "postgresql" and _is_invalid_index(connection, name):
+                statements.append(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            index = _model_index(Base.metadata.tables[table].indexes, name)
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+            statements.append(ddl.replace("CREATE INDEX", f"CREATE INDEX{concurrently}", 1))
+        statements.extend(f"DROP INDEX{concurrently} IF EXISTS {name}" for name in self.drop_indexes)
+        return statements
+
+
+_INVALID_INDEX = text(
+    "SELECT 1 FROM pg_index i"
+    " JOIN pg_class c ON c.oid = i.indexrelid"
+    " JOIN pg_namespace n ON n.oid = c.relnamespace"
+    " WHERE c.relname = :name AND n.nspname = current_schema() AND NOT i.indisvalid"
+)
+
+
+def _is_invalid_index(connection: Connection, name: str) -> bool:
+    """Whether index ``name`` exists but is INVALID, e.g. left by a failed ``CREATE INDEX CONCURRENTLY``."""
+
+    return connection.execute(_INVALID_INDEX, {"name": name}).first() is not None
+
+
+def _model_index(indexes: "set[Index]", name: str) -> Index:
+    for index in indexes:
+        if index.name == name:
+            return index
+    raise LookupError(f"No index {name!r} on the models")
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(
+        "0001_query_aligned_indexes",
+        create_indexes=(
+            ("users", "idx_users_subscribers"),
+            ("broadcast_deliveries", "idx_broadcast_deliveries_job_user_telegram"),
+        ),
+        drop_indexes=(
+            # Duplicates of the primary key and UNIQUE constraints.
+            "ix_users_id",
+            "idx_users_telegram_id",
+            "idx_users_referral_code",
+            # Low-cardinality columns no query filters on selectively.
+            "idx_users_notifications_enabled",
+            "idx_users_loyalty_level",
+            "idx_users_subscription_status",
+            # Rewritten on every interaction flush, never queried; it also
+            # prevents those updates from being HOT.
+            "idx_users_last_interaction",
+            # Superseded by idx_broadcast_deliveries_job_user_telegram.
+            "idx_broadcast_deliveries_job_user",
+        ),
+    ),
+    Migration(
+        "0002_broadcast_job_leases",
+        add_columns=(
+            ("broadcast_jobs", "owner"),
+            ("broadcast_jobs", "lease_until"),
+        ),
+    ),
+)
+
+
+def migrate(engine: Optional[Engine] = None) -> List[str]:
+    """Apply the pending :data:`MIGRATIONS` to ``engine`` (the primary by default); return their ids."""
+
+    engine = engine or get_engine()
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = set(connection.scalars(select(schema_migrations.c.id)))
+
+    done = []
+    for migration in MIGRATIONS:
+        if migration.id in applied:
+            continue
+        # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction.
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for statement in migration.statements(connection):
+                logger.info("%s: %s", migration.id, statement)
+                connection.exec_driver_sql(statement)
+            connection.execute(insert(schema_migrations).values(id=migration.id, applied_at=datetime.utcnow()))
+        logger.info("Applied migration %s", migration.id)
+        done.append(migration.id)
+    return done
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    init_db()
+    migrate()
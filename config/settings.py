@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import Iterable, List
+from typing import Any, Iterable, List, Literal, Optional
 
-from pydantic import AnyHttpUrl, field_validator
+from pydantic import AnyHttpUrl, Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 __all__ = ["Settings", "get_settings", "settings"]
@@ -15,10 +15,108 @@ class Settings(BaseSettings):
     """Runtime configuration loaded from environment variables."""
 
     TELEGRAM_BOT_TOKEN: str = "TEST_TOKEN"
+    # Bot API endpoint the token is appended to, e.g. a local Bot API server.
+    TELEGRAM_API_BASE_URL: str = "https://api.telegram.org/bot"
     DATABASE_URL: str = "sqlite:///./soulmine.db"
+    # Derived from ``DATABASE_URL`` (asyncpg / aiosqlite) when left unset.
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool per engine (sync and async each get one): persistent connections,
+    # extra connections allowed under load, seconds to wait for a free one, and seconds
+    # after which a connection is replaced (-1 never).
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = 1800
+    # Test connections with a round-trip on every checkout. Off, dead connections are
+    # only noticed when a query fails (the pool then discards them all) and by recycling.
+    DATABASE_POOL_PRE_PING: bool = True
+    # Behind PgBouncer in transaction mode: no client-side pool and no prepared statements.
+    DATABASE_PGBOUNCER: bool = False
+    # Optional read replica for query-only paths (statistics, read-only listings).
+    # A user's reads stay on the primary for this many seconds after their own writes.
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DATABASE_REPLICA_STICKY_SECONDS: float = 5.0
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_USER_CACHE_TTL: int = 3600
+
+    # In-process user lookup cache (seconds for TTLs).
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 300.0
+    USER_CACHE_NEGATIVE_TTL: float = 5.0
     WEB_APP_URL: AnyHttpUrl = "https://example.com"
 
+    # Update delivery: long polling (default) or a webhook served by aiohttp.
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_URL: Optional[str] = None  # Public base URL Telegram should call
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    # Required in webhook mode: Telegram echoes it in every request, which is rejected without it.
+    # 1-256 characters of A-Z, a-z, 0-9, "_" and "-".
+    WEBHOOK_SECRET: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_-]{1,256}$")
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    # Updates processed concurrently by the application.
+    UPDATE_CONCURRENCY: int = 64
+    # Update-handling processes. Above 1, a single ingress process (polling or webhook)
+    # shards updates across them by chat id.
+    WORKER_PROCESSES: int = 1
+
+    # users.last_interaction is written in bulk every interval or once this many users are pending.
+    INTERACTION_FLUSH_INTERVAL: float = 30.0
+    INTERACTION_FLUSH_SIZE: int = 1000
+    # Notification toggles are acknowledged at once and written in bulk on this schedule.
+    PREFERENCE_FLUSH_INTERVAL: float = 5.0
+    PREFERENCE_FLUSH_SIZE: int = 1000
+    # Users found unreachable (blocked the bot, deleted account) are marked inactive in bulk.
+    PRUNE_FLUSH_INTERVAL: float = 10.0
+    PRUNE_FLUSH_SIZE: int = 1000
+
+    # Broadcast delivery. Telegram allows roughly 30 messages per second overall
+    # and one per second to the same chat.
+    BROADCAST_CONCURRENCY: int = 20
+    BROADCAST_RATE_LIMIT: float = 25.0
+    BROADCAST_PER_CHAT_INTERVAL: float = 1.0
+    BROADCAST_MAX_RETRIES: int = 5
+    BROADCAST_PROGRESS_INTERVAL: float = 10.0
+    BROADCAST_BATCH_SIZE: int = 1000
+    # Persisted broadcast jobs flush outcomes and their resume position this often.
+    BROADCAST_CHECKPOINT_INTERVAL: float = 2.0
+    BROADCAST_CHECKPOINT_SIZE: int = 500
+    # A running job is leased to the process sending it and renewed while it runs;
+    # another process may take it over only once the lease has expired.
+    BROADCAST_LEASE_SECONDS: float = 60.0
+
+    # Outbound queue for individual notifications; "redis" survives restarts.
+    OUTBOX_BACKEND: Literal["redis", "memory"] = "redis"
+    OUTBOX_CONCURRENCY: int = 8
+    # Attempts before a transiently failing message is dead-lettered; the backoff starts
+    # at OUTBOX_RETRY_BASE seconds and doubles per attempt.
+    OUTBOX_MAX_ATTEMPTS: int = 6
+    OUTBOX_RETRY_BASE: float = 1.0
+    OUTBOX_POLL_INTERVAL: float = 0.5
+
+    # Prometheus metrics (handler latency, DB and Bot API time, cache and pool stats).
+    # Webhook mode serves /metrics on the webhook port; polling mode and shard workers
+    # serve it on METRICS_PORT (worker i on METRICS_PORT + 1 + i), 0 disables that server.
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 9100
+
+    # Seconds between refreshes of the Redis user-statistics snapshot; 0 disables it.
+    STATS_SNAPSHOT_INTERVAL: float = 300.0
+
+    # Flood guard: per-user token bucket (updates per second, burst size) and window in which an
+    # identical repeated button tap is dropped.
+    FLOOD_USER_RATE: float = 1.0
+    FLOOD_USER_BURST: int = 5
+    FLOOD_DEBOUNCE_SECONDS: float = 1.0
+    # Process-wide cap on accepted updates per second; unset disables it.
+    FLOOD_GLOBAL_RATE: Optional[float] = None
+    # Keep flood-guard counters in Redis so limits hold across replicas and shards.
+    FLOOD_GUARD_REDIS: bool = False
+
     SUPPORT_CHAT_ID: int = 0
     NEWS_CHANNEL_ID: int = 0
 
@@ -43,6 +141,17 @@ class Settings(BaseSettings):
 
         return [int(item) for item in value]
 
+    @model_validator(mode="after")
+    def _require_webhook_settings(self) -> "Settings":
+        """Refuse to start a webhook that anyone could post updates to."""
+
+        if self.BOT_MODE == "webhook":
+            if not self.WEBHOOK_URL:
+                raise ValueError("WEBHOOK_URL must be set when BOT_MODE is 'webhook'")
+            if not self.WEBHOOK_SECRET:
+                raise ValueError("WEBHOOK_SECRET must be set when BOT_MODE is 'webhook'")
+        return self
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -53,4 +162,9 @@ def get_settings() -> Settings:
 
 # Backwards compatibility -----------------------------------------------------
 
-settings = get_settings()
\ No newline at end of file
+
+def __getattr__(name: str) -> Any:
+    # ``settings`` used to be built at import; it is now read on first access.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -27,13 +27,44 @@ CREATE TABLE IF NOT EXISTS users (
     metadata JSONB DEFAULT '{}'
 );
 
+-- Create broadcast job tables
+CREATE TABLE IF NOT EXISTS broadcast_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    message TEXT NOT NULL,
+    parse_mode VARCHAR(20),
+    variants JSONB,
+    status VARCHAR(20) DEFAULT 'pending',
+    owner VARCHAR(255),
+    lease_until TIMESTAMP,
+    cursor VARCHAR(36),
+    success_count INTEGER DEFAULT 0,
+    fail_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    finished_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+    job_id VARCHAR(36) REFERENCES broadcast_jobs(id) ON DELETE CASCADE,
+    telegram_id VARCHAR(36),
+    user_id VARCHAR(36) NOT NULL,
+    success BOOLEAN NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (job_id, telegram_id)
+);
+
+-- Resume query: telegram ids of a job past the user_id checkpoint, index-only.
+CREATE INDEX IF NOT EXISTS idx_broadcast_deliveries_job_user_telegram ON broadcast_deliveries(job_id, user_id) INCLUDE (telegram_id);
+
 -- Create indexes for performance
-CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id);
+-- (telegram_id and referral_code are indexed by their UNIQUE constraints.)
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_wallet_address ON users(wallet_address);
 CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at);
-CREATE INDEX IF NOT EXISTS idx_users_last_interaction ON users(last_interaction);
-CREATE INDEX IF NOT EXISTS idx_users_referral_code ON users(referral_code);
+-- Broadcast recipient pages (WHERE ... AND id > :last ORDER BY id), index-only.
+-- The predicate must match the query in bot/utils/database.py.
+CREATE INDEX IF NOT EXISTS idx_users_subscribers ON users(id) INCLUDE (telegram_id)
+    WHERE notifications_enabled IS TRUE AND is_active IS TRUE;
 
 -- Create initial admin user
 INSERT INTO users (id, telegram_id, username, first_name, last_name, language_code, is_active, created_at, updated_at, last_interaction, wallet_address, verified, subscription_status, subscription_end_date, referral_code, referred_by, total_points, loyalty_level, notifications_enabled, preferences, metadata)
@@ -46,8 +77,3 @@ VALUES
 ('user-1', '987654321', 'john_doe', 'John', 'Doe', 'en', TRUE, NOW(), NOW(), NOW(), 'UQABCD1234567890', TRUE, 'premium', NOW() + INTERVAL '6 months', 'REF-JOHN-5678', 'admin-1', 5000, 4, TRUE, '{"theme": "light"}', '{}'),
 ('user-2', '567890123', 'jane_smith', 'Jane', 'Smith', 'ru', TRUE, NOW(), NOW(), NOW(), 'UQEF1234567890', TRUE, 'free', NULL, 'REF-JANE-1234', 'admin-1', 2000, 3, TRUE, '{"theme": "dark"}', '{}')
 ON CONFLICT (telegram_id) DO NOTHING;
-
--- Create indexes for faster queries
-CREATE INDEX IF NOT EXISTS idx_users_subscription_status ON users(subscription_status);
-CREATE INDEX IF NOT EXISTS idx_users_loyalty_level ON users(loyalty_level);
-CREATE INDEX IF NOT EXISTS idx_users_notifications_enabled ON users(notifications_enabled);
\ No newline at end of file
@@ -1,5 +1,6 @@
 """Database models used by the bot."""
 
-from .user import User
+from .broadcast import BroadcastDelivery, BroadcastJob
+from .user import User, UserSnapshot
 
-__all__ = ["User"]
\ No newline at end of file
+__all__ = ["BroadcastDelivery", "BroadcastJob", "User", "UserSnapshot"]
\ No newline at end of file
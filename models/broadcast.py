@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from ..config.database import Base
+from .user import JSONType
+
+class BroadcastJob(Base):
+    __tablename__ = "broadcast_jobs"
+
+    id = Column(String, primary_key=True)
+    message = Column(Text, nullable=False)
+    parse_mode = Column(String)
+    # Per-language texts of a personalised broadcast; ``message`` is then the default text.
+    variants = Column(JSONType)
+    status = Column(String, default='pending')  # 'pending', 'running', 'completed'
+    # Process sending a running job ("host:pid") and until when it holds the job.
+    owner = Column(String)
+    lease_until = Column(DateTime)
+    # Highest users.id up to which every recipient has a recorded delivery.
+    cursor = Column(String)
+    success_count = Column(Integer, default=0)
+    fail_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+
+class BroadcastDelivery(Base):
+    __tablename__ = "broadcast_deliveries"
+    # Covers the resume query (telegram ids of a job past the ``user_id`` checkpoint).
+    __table_args__ = (
+        Index(
+            "idx_broadcast_deliveries_job_user_telegram",
+            "job_id",
+            "user_id",
+            postgresql_include=["telegram_id"],
+        ),
+    )
+
+    job_id = Column(String, ForeignKey("broadcast_jobs.id", ondelete="CASCADE"), primary_key=True)
+    telegram_id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    success = Column(Boolean, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,14 +1,19 @@
+from dataclasses import dataclass, fields
 from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String␊
-from sqlalchemy.dialects.postgresql import JSONB␊
-␊
 from ..config.database import Base
 
+# JSONB on PostgreSQL, plain JSON elsewhere (e.g. the default SQLite database).
+JSONType = JSON().with_variant(JSONB, "postgresql")
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True)
     telegram_id = Column(String, unique=True, index=True)
     username = Column(String, index=True)
     first_name = Column(String)
@@ -27,5 +32,47 @@ class User(Base):
     total_points = Column(Integer, default=0)
     loyalty_level = Column(Integer, default=1)
     notifications_enabled = Column(Boolean, default=True)
-    preferences = Column(JSONB, default=dict)
-    profile_metadata = Column("metadata", JSONB, default=dict)
\ No newline at end of file
+    preferences = Column(JSONType, default=dict)
+    profile_metadata = Column("metadata", JSONType, default=dict)
+
+    __table_args__ = (
+        # Broadcast recipients: keyset pages of ``id > :last ORDER BY id`` returning
+        # ``telegram_id``, as an index-only scan over subscribed users only. The
+        # predicate must match the query's WHERE clause for the planner to use it.
+        Index(
+            "idx_users_subscribers",
+            "id",
+            postgresql_include=["telegram_id"],
+            postgresql_where=(notifications_enabled.is_(True) & is_active.is_(True)),
+            sqlite_where=(notifications_enabled.is_(True) & is_active.is_(True)),
+        ),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """The ``User`` columns read on the request path, as a plain immutable value.
+
+    Loaded with a column-restricted query and shared through the user caches;
+    ``User`` entities are only materialised on write paths. Carries the
+    columns user notification templates read, so ``render_for`` accepts it.
+    """
+
+    id: str
+    telegram_id: str
+    username: Optional[str]
+    first_name: Optional[str]
+    language_code: Optional[str]
+    notifications_enabled: Optional[bool]
+    total_points: Optional[int]
+    loyalty_level: Optional[int]
+
+    @classmethod
+    def columns(cls) -> Tuple[Any, ...]:
+        """The ``User`` columns to select, in field order."""
+
+        return tuple(getattr(User, field.name) for field in fields(cls))
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(*(getattr(user, field.name) for field in fields(cls)))
@@ -20,8 +20,8 @@ docker-compose down
 # Start new services
 docker-compose up -d
 
-# Run database migrations (if any)
-# docker-compose exec bot python -c "from bot.utils.database import init_db; init_db()"
+# Run database migrations (creates missing tables, then applies pending schema steps)
+docker-compose exec bot python -m bot.config.schema
 
 # Restart services to apply changes
 docker-compose restart